@@ -0,0 +1,28 @@
+bl_info = {
+    "name": "骨骼重命名工具",
+    "author": "AI Assistant",
+    "version": (2, 10),
+    "blender": (4, 4, 3),
+    "location": "View3D > Sidebar > 工具",
+    "description": "将角色2的骨骼按角色1的命名规范重命名，支持骨骼名称映射库",
+    "category": "骨骼",
+}
+
+# 插件的界面、操作和批量处理位于 addon.py，只在 Blender 中加载；
+# 匹配核心 bone_matcher 和匹配服务 bone_match_server 不依赖 bpy，在普通 Python 中也可以按包导入：
+#     from BoneRename.bone_matcher import load_library
+import importlib
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if bpy is not None:
+    # 重新加载插件时模块全局变量仍在，需要一并重新加载 addon（addon 会再重新加载匹配核心）
+    from . import addon
+    if "register" in locals():
+        importlib.reload(addon)
+    register = addon.register
+    unregister = addon.unregister
+    run_cli = addon.run_cli
@@ -0,0 +1,2395 @@
+"""骨骼重命名插件的界面、操作和批量处理（依赖 bpy，由包的 __init__ 在 Blender 中加载）"""
+
+import bpy
+import re
+import json
+import fnmatch
+import threading
+import os
+import time
+import hashlib
+import pickle
+import io
+import importlib
+from collections import OrderedDict
+from bpy.app.handlers import persistent
+
+# 匹配核心位于包内的 bone_matcher.py（不依赖 bpy）；重新加载插件时模块全局变量仍在，需要一并重新加载匹配核心
+from . import bone_matcher
+if "BoneLibrary" in locals():
+    importlib.reload(bone_matcher)
+from .bone_matcher import (DOWNLOAD_TIMEOUT, BoneLibrary, SpatialBoneMatcher, StageProfiler, check_mapping_data,
+                           describe_download_error, dump_mapping_text, match_by_hierarchy, merge_mapping_layers,
+                           parse_mapping_text, plan_bone_renames, update_mapping_cache, write_file_atomic)
+
+# urllib.request、ast、difflib 只在下载、解析和相似度匹配时才需要，
+# 在使用处导入，减少插件启用和Blender启动的耗时
+
+# 全局配置
+BONE_MAPPING_URL = "https://raw.githubusercontent.com/LgcChina/Text/refs/heads/main/%E9%AA%A8%E9%AA%BC.json"
+# 映射库镜像：同时请求，最先返回且通过校验的获胜（GitHub 在部分地区很慢或无法访问）；
+# 可在面板中填写自定义镜像，或用环境变量 BONE_RENAME_MAPPING_URLS（逗号分隔）替换（例如指向本机的测试服务器）
+BONE_MAPPING_MIRRORS = [
+    BONE_MAPPING_URL,
+    "https://cdn.jsdelivr.net/gh/LgcChina/Text@main/%E9%AA%A8%E9%AA%BC.json",
+    "https://fastly.jsdelivr.net/gh/LgcChina/Text@main/%E9%AA%A8%E9%AA%BC.json",
+]
+if os.environ.get("BONE_RENAME_MAPPING_URLS"):
+    BONE_MAPPING_MIRRORS = [url.strip() for url in os.environ["BONE_RENAME_MAPPING_URLS"].split(",") if url.strip()]
+CACHE_FILE = "bone_data.json"
+# 记录上次下载的 ETag / Last-Modified，用于条件请求
+DOWNLOAD_META_FILE = "bone_data.meta.json"
+# 预编译快照：保存解析后的映射库和编译好的索引，与缓存文件的修改时间和内容哈希绑定
+SNAPSHOT_FILE = "bone_data.compiled.pickle"
+SNAPSHOT_FORMAT = 3
+# 持久匹配缓存文件（与 bone_data.json 放在同一目录）
+MATCH_CACHE_FILE = "bone_data.matches.pickle"
+MATCH_CACHE_FORMAT = 2
+# 最多缓存的 (映射库, 参考骨架, 手指选项) 组合数，超出时淘汰最久未使用的
+MATCH_CACHE_SIZE = 32
+# 每个组合下最多缓存的完整预览结果数（不同的目标骨架或匹配选项）
+MATCH_CACHE_RESULTS = 16
+# 每个组合下最多缓存的逐骨骼匹配结果数
+MATCH_CACHE_BONES = 20000
+# 缓存文件的大小上限，超出时淘汰最久未使用的组合
+MATCH_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# 单个组合的大小上限，超出时先淘汰该组合中最久未使用的完整预览结果
+MATCH_CACHE_ENTRY_BYTES = MATCH_CACHE_MAX_BYTES // 4
+# 后台下载的检查间隔（秒）；镜像、增量清单和下载超时见 bone_matcher 中的映射库下载部分
+DOWNLOAD_POLL_INTERVAL = 0.2
+bone_mapping_data = None
+version_info = "未加载版本信息"
+last_updated_info = ""
+file_exists = False
+# 当前使用的映射库：没有启用叠加层时就是 base_library，否则为基础库与叠加层合并后的结果
+bone_library = None
+# 从缓存文件（下载或加载的映射库）编译的基础库
+base_library = None
+# 启用的叠加层 [(层名称, 文件路径)]，靠后的优先
+active_mapping_layers = []
+# 已读取的叠加层文件: 路径 -> (文件状态, 映射库数据)
+mapping_layer_files = {}
+# 读取失败的叠加层: 层名称 -> 错误信息
+mapping_layer_errors = {}
+# 上次合并时的 (基础库签名, ((层名称, 文件状态), ...))，未变化时不重新合并
+merged_library_key = None
+BASE_LAYER_NAME = "基础库"
+download_task = None
+# 本次会话中已加载的缓存文件状态 (路径, 修改时间, 大小)
+loaded_cache_state = None
+# 插件启用后映射库延迟加载，加载完成前为 True
+mapping_load_pending = False
+# 延迟加载的等待时间（秒），让Blender先完成启动
+DEFERRED_LOAD_DELAY = 0.5
+download_status = ""
+# 最近一次预览/执行的性能记录: 操作名称 -> StageProfiler
+last_profiles = {}
+# 性能记录中阶段和计数的显示名称
+PROFILE_LABELS = {
+    "collect": "读取骨骼",
+    "normalization": "标准化",
+    "reference_index": "参考索引",
+    "exact": "精确匹配",
+    "fuzzy": "相似度匹配",
+    "assignment": "一一分配",
+    "hierarchy": "层级匹配",
+    "spatial": "位置匹配",
+    "match_cache": "匹配缓存",
+    "fill_results": "写入结果",
+    "plan": "规划",
+    "rename": "重命名",
+}
+
+@persistent
+def load_handler(dummy):
+    """Blender启动和打开文件时检查本地文件，并按当前场景的叠加层设置更新映射库"""
+    load_local_cache()
+    
+    # 命令行批量处理由参数指定叠加层，打开文件时不能换成文件中场景的设置
+    scene = getattr(bpy.context, "scene", None)
+    if not bpy.app.background and scene is not None and hasattr(scene, "bone_rename_tool"):
+        sync_mapping_layers(scene.bone_rename_tool)
+
+def load_local_cache():
+    """检查并加载本地缓存文件"""
+    global file_exists, version_info, last_updated_info, mapping_load_pending
+    
+    mapping_load_pending = False
+    file_path = get_cache_path()
+    file_exists = os.path.exists(file_path)
+    
+    if file_exists:
+        try:
+            # 本次会话中已加载过且文件未变化时无需重新加载
+            if bone_mapping_data is not None and loaded_cache_state == get_file_state(file_path):
+                return
+            
+            load_cache_file(file_path)
+            
+            # 验证JSON结构
+            if "bone_regions" in bone_mapping_data:
+                version_info = bone_mapping_data.get("version", "未知版本")
+                last_updated_info = bone_mapping_data.get("last_updated", "")
+                print(f"骨骼映射库已加载: {version_info}, 更新日期: {last_updated_info}")
+            else:
+                version_info = "无效的映射库格式"
+                last_updated_info = ""
+                print("本地映射库缺少bone_regions字段")
+        except Exception as e:
+            version_info = f"加载错误: {str(e)}"
+            last_updated_info = ""
+            print(f"加载本地映射库失败: {str(e)}")
+    else:
+        version_info = "本地无数据文件，请下载"
+        last_updated_info = ""
+        print("未找到本地骨骼映射库文件")
+
+def ensure_mapping_loaded():
+    """如果映射库仍在等待延迟加载，立即加载（操作执行前调用）"""
+    if mapping_load_pending:
+        load_handler(None)
+
+def deferred_load_mapping():
+    """插件启用后由一次性定时器调用，加载本地映射库"""
+    ensure_mapping_loaded()
+    tag_redraw_panels()
+    return None
+
+def get_cache_path():
+    """获取缓存文件完整路径"""
+    config_dir = bpy.utils.user_resource('CONFIG')
+    return os.path.join(config_dir, CACHE_FILE)
+
+def get_snapshot_path():
+    """获取预编译快照文件完整路径"""
+    config_dir = bpy.utils.user_resource('CONFIG')
+    return os.path.join(config_dir, SNAPSHOT_FILE)
+
+def get_file_state(file_path):
+    """返回文件的 (路径, 修改时间, 大小)，用于判断文件是否变化"""
+    stat = os.stat(file_path)
+    return file_path, stat.st_mtime_ns, stat.st_size
+
+class SnapshotUnpickler(pickle.Unpickler):
+    """快照只包含内置类型，拒绝加载任何类或函数"""
+    
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"快照中包含不允许的对象: {module}.{name}")
+
+def load_cache_file(file_path):
+    """读取本地缓存文件，优先从匹配的预编译快照恢复，否则解析JSON并重新编译"""
+    global bone_mapping_data, loaded_cache_state
+    
+    state = get_file_state(file_path)
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    content_hash = hashlib.sha256(content).hexdigest()
+    
+    if not restore_mapping_snapshot(state, content_hash):
+        bone_mapping_data = json.loads(content.decode('utf-8'))
+        compile_bone_mapping()
+        write_mapping_snapshot(state, content_hash)
+    
+    loaded_cache_state = state
+
+def save_mapping_cache():
+    """把当前基础库以紧凑格式原子写入缓存文件，记录文件状态并更新快照，返回缓存文件路径"""
+    global loaded_cache_state
+    
+    file_path = get_cache_path()
+    content = dump_mapping_text(bone_mapping_data).encode('utf-8')
+    write_file_atomic(file_path, content)
+    
+    state = get_file_state(file_path)
+    write_mapping_snapshot(state, hashlib.sha256(content).hexdigest())
+    loaded_cache_state = state
+    return file_path
+
+def write_mapping_snapshot(state, content_hash):
+    """把当前已编译的基础库写入快照"""
+    if base_library is None:
+        return
+    
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "mtime_ns": state[1],
+        "size": state[2],
+        "sha256": content_hash,
+        "library": base_library.snapshot(),
+    }
+    
+    try:
+        write_file_atomic(get_snapshot_path(), pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+    except (OSError, pickle.PickleError) as e:
+        print(f"保存映射库快照失败: {str(e)}")
+
+def restore_mapping_snapshot(state, content_hash):
+    """从快照恢复映射库和编译结果，快照不存在或与缓存文件不一致时返回 False"""
+    global bone_mapping_data, base_library
+    
+    try:
+        with open(get_snapshot_path(), 'rb') as f:
+            snapshot = SnapshotUnpickler(f).load()
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        print(f"映射库快照无效，将重新编译: {str(e)}")
+        return False
+    
+    if (not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT
+            or snapshot.get("mtime_ns") != state[1] or snapshot.get("size") != state[2]
+            or snapshot.get("sha256") != content_hash):
+        return False
+    
+    try:
+        library = BoneLibrary.from_snapshot(snapshot["library"])
+    except (KeyError, TypeError, ValueError, re.error) as e:
+        print(f"映射库快照无效，将重新编译: {str(e)}")
+        return False
+    
+    # 与 compile_bone_mapping 相同：映射库未变化时保留名称标准化缓存
+    if base_library is not None and base_library.signature == library.signature:
+        library.cache = base_library.cache
+    
+    bone_mapping_data = library.data
+    base_library = library
+    refresh_layered_library()
+    return True
+
+def get_download_meta_path():
+    """获取下载记录文件完整路径"""
+    config_dir = bpy.utils.user_resource('CONFIG')
+    return os.path.join(config_dir, DOWNLOAD_META_FILE)
+
+def clear_download_meta():
+    """缓存文件被其他来源覆盖后删除下载记录，避免下次条件请求误判为未修改"""
+    try:
+        os.remove(get_download_meta_path())
+    except OSError:
+        pass
+
+def apply_downloaded_mapping(data, status, message):
+    """应用 update_mapping_cache 的结果（必须在主线程调用），返回 (是否成功, 提示信息)
+    
+    下载成功时缓存文件和下载记录已在下载线程中写入，这里编译映射库、记录缓存文件状态并更新快照
+    """
+    global file_exists, version_info, last_updated_info, bone_mapping_data, loaded_cache_state
+    
+    if status == "failed":
+        return use_cached_mapping(message)
+    
+    if status == "unchanged":
+        if bone_mapping_data is None:
+            success, reload_message = reload_local_mapping()
+            if not success:
+                return False, reload_message
+        return True, message
+    
+    bone_mapping_data = data
+    compile_bone_mapping()
+    
+    file_path = get_cache_path()
+    state = get_file_state(file_path)
+    with open(file_path, 'rb') as f:
+        write_mapping_snapshot(state, hashlib.sha256(f.read()).hexdigest())
+    loaded_cache_state = state
+    
+    # 更新全局状态
+    file_exists = True
+    version_info = bone_mapping_data.get("version", "未知版本")
+    last_updated_info = bone_mapping_data.get("last_updated", "")
+    
+    return True, f"下载成功！ ({message})"
+
+def use_cached_mapping(message):
+    """下载失败时继续使用本地缓存（尚未加载时立即加载），返回 (False, 提示信息)"""
+    if bone_mapping_data is None and os.path.exists(get_cache_path()):
+        reload_local_mapping()
+    if bone_mapping_data is not None:
+        return False, f"{message}，继续使用本地缓存 (版本 {version_info})"
+    return False, message
+
+def get_mirror_urls(tool=None):
+    """映射库镜像列表：面板中填写的镜像（逗号或换行分隔）优先，未填写时使用默认镜像"""
+    if tool is not None and tool.mirror_urls.strip():
+        return [url.strip() for url in re.split(r'[,\n]', tool.mirror_urls) if url.strip()]
+    return list(BONE_MAPPING_MIRRORS)
+
+def get_current_mapping():
+    """已加载且缓存文件仍存在的基础库数据，作为增量更新和条件请求的起点"""
+    return bone_mapping_data if os.path.exists(get_cache_path()) else None
+
+def download_mapping(urls=None, timeout=DOWNLOAD_TIMEOUT):
+    """下载映射库数据并保存到本地（同步执行，界面中使用后台下载任务）"""
+    urls = urls or get_mirror_urls()
+    try:
+        data, status, message = update_mapping_cache(urls, get_cache_path(), get_download_meta_path(),
+                                                     get_current_mapping(), timeout)
+        return apply_downloaded_mapping(data, status, message)
+    except Exception as e:
+        return use_cached_mapping(describe_download_error(e))
+
+class MappingDownloadTask:
+    """后台下载任务：网络请求和解析在线程中进行，结果由主线程的定时器应用"""
+    
+    def __init__(self, urls, timeout):
+        self.urls = urls
+        self.timeout = timeout
+        self.received = 0
+        self.total = None
+        self.data = None
+        self.status = None
+        self.message = ""
+        self.error = None
+        self.done = False
+        
+        # 在主线程取得当前映射库（只读，增量在副本上应用）和配置目录中的文件路径
+        self.current = get_current_mapping()
+        self.cache_path = get_cache_path()
+        self.meta_path = get_download_meta_path()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def run(self):
+        try:
+            self.data, self.status, self.message = update_mapping_cache(
+                self.urls, self.cache_path, self.meta_path, self.current, self.timeout, self.on_progress)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+    
+    def on_progress(self, received, total):
+        # 多个镜像同时下载，显示最快的一个的进度
+        if received >= self.received:
+            self.received = received
+            self.total = total
+    
+    def progress_text(self):
+        """下载进度描述"""
+        if self.total:
+            return f"正在下载映射库... {self.received * 100 // self.total}%"
+        if self.received:
+            return f"正在下载映射库... {self.received // 1024} KB"
+        return "正在连接服务器..."
+
+def tag_redraw_panels():
+    """刷新3D视图侧边栏"""
+    window_manager = bpy.context.window_manager
+    if window_manager is None:
+        return
+    for window in window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+def start_mapping_download(urls=None, timeout=DOWNLOAD_TIMEOUT):
+    """开始后台从各镜像下载映射库，已有下载任务时返回 False"""
+    global download_task, download_status
+    
+    if download_task is not None:
+        return False
+    
+    download_task = MappingDownloadTask(urls or get_mirror_urls(), timeout)
+    download_status = ""
+    download_task.start()
+    bpy.app.timers.register(poll_download_task, first_interval=DOWNLOAD_POLL_INTERVAL)
+    return True
+
+def poll_download_task():
+    """定时检查后台下载任务，完成后在主线程应用结果"""
+    global download_task, download_status
+    
+    task = download_task
+    if task is None:
+        return None
+    
+    tag_redraw_panels()
+    if not task.done:
+        return DOWNLOAD_POLL_INTERVAL
+    
+    download_task = None
+    if task.error is not None:
+        success, message = use_cached_mapping(describe_download_error(task.error))
+    else:
+        try:
+            success, message = apply_downloaded_mapping(task.data, task.status, task.message)
+        except Exception as e:
+            success, message = False, f"下载失败: {str(e)}"
+    
+    download_status = message
+    print(f"{message} 版本: {version_info}" if success else message)
+    
+    # 更新UI显示
+    for scene in bpy.data.scenes:
+        scene.bone_rename_tool.mapping_version = version_info
+        scene.bone_rename_tool.mapping_last_updated = last_updated_info
+    
+    tag_redraw_panels()
+    return None
+
+def reload_local_mapping():
+    """从本地缓存文件重新加载映射库"""
+    global version_info, last_updated_info
+    
+    file_path = get_cache_path()
+    
+    if not os.path.exists(file_path):
+        return False, "本地文件不存在"
+    
+    try:
+        load_cache_file(file_path)
+        
+        # 验证JSON结构
+        if "bone_regions" not in bone_mapping_data:
+            return False, "无效的骨骼映射库格式: 缺少bone_regions字段"
+        
+        version_info = bone_mapping_data.get("version", "未知版本")
+        last_updated_info = bone_mapping_data.get("last_updated", "")
+        return True, "重新加载成功"
+    except Exception as e:
+        return False, f"加载失败: {str(e)}"
+
+def get_bone_mapping():
+    """获取当前骨骼映射库"""
+    return bone_mapping_data
+
+def compile_bone_mapping():
+    """根据当前映射库重建编译后的 BoneLibrary，每次加载映射库后调用"""
+    global base_library
+    
+    if not bone_mapping_data or not isinstance(bone_mapping_data, dict):
+        base_library = None
+        refresh_layered_library()
+        return
+    
+    library = BoneLibrary(bone_mapping_data)
+    
+    # 加载的映射库版本和内容未变化时保留名称标准化缓存
+    if base_library is not None and base_library.signature == library.signature:
+        library.cache = base_library.cache
+    base_library = library
+    
+    report_variant_conflicts(base_library)
+    refresh_layered_library()
+
+def report_variant_conflicts(library):
+    """报告被多个标准名称声明的变体，这些变体实际归属于库中靠前的标准名称"""
+    for variant, owners in library.index.conflicts.items():
+        claimed = ", ".join(f"{region}/{standard}" for region, standard in owners)
+        print(f"骨骼映射库变体冲突: '{variant}' 同时属于 {claimed}，使用 {owners[0][0]}/{owners[0][1]}")
+
+def load_mapping_layer(file_path):
+    """读取一个叠加层文件，文件未变化时直接使用上次读取的数据，返回 (文件状态, 映射库数据)"""
+    state = get_file_state(file_path)
+    cached = mapping_layer_files.get(file_path)
+    if cached is not None and cached[0] == state:
+        return cached
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = parse_mapping_text(f.read())
+    check_mapping_data(data)
+    mapping_layer_files[file_path] = (state, data)
+    return state, data
+
+def refresh_layered_library():
+    """把基础库和启用的叠加层合并为当前使用的映射库
+    
+    基础库和各层文件都未变化时沿用上次合并的结果；读取失败的层跳过并记录在 mapping_layer_errors 中
+    """
+    global bone_library, merged_library_key
+    
+    if base_library is None:
+        bone_library = None
+        merged_library_key = None
+        return
+    
+    layers = []
+    states = []
+    errors = {}
+    for layer_name, file_path in active_mapping_layers:
+        try:
+            state, data = load_mapping_layer(file_path)
+        except Exception as e:
+            errors[layer_name] = str(e)
+            continue
+        layers.append((layer_name, data))
+        states.append((layer_name, state))
+    
+    for layer_name, message in errors.items():
+        if mapping_layer_errors.get(layer_name) != message:
+            print(f"加载映射库叠加层 {layer_name} 失败: {message}")
+    mapping_layer_errors.clear()
+    mapping_layer_errors.update(errors)
+    
+    if not layers:
+        bone_library = base_library
+        merged_library_key = None
+        return
+    
+    key = (base_library.signature, tuple(states))
+    if key == merged_library_key and bone_library is not None:
+        return
+    
+    library = BoneLibrary(merge_mapping_layers([(BASE_LAYER_NAME, base_library.data)] + layers))
+    if bone_library is not None and bone_library.signature == library.signature:
+        library.cache = bone_library.cache
+    bone_library = library
+    merged_library_key = key
+    report_variant_conflicts(library)
+
+def get_layer_display_name(layer):
+    """叠加层的显示名称，未命名时使用文件名"""
+    return layer.name or os.path.splitext(os.path.basename(layer.filepath))[0]
+
+def sync_mapping_layers(tool):
+    """按场景中的叠加层设置更新当前使用的映射库
+    
+    在打开文件（load_handler）、预览、批量重命名和修改叠加层时调用；执行重命名使用预览的结果，不再重新匹配
+    """
+    global active_mapping_layers
+    
+    active_mapping_layers = [(get_layer_display_name(layer), bpy.path.abspath(layer.filepath))
+                             for layer in tool.mapping_layers if layer.enabled and layer.filepath]
+    refresh_layered_library()
+
+def extract_base_name_and_side(name):
+    """提取骨骼名称的基础部分和侧别信息"""
+    if not bone_mapping_data or bone_library is None:
+        return name, None
+    
+    return bone_library.extract_base_name_and_side(name)
+
+def map_to_standard_name(bone_name):
+    """将骨骼名称映射到标准名称"""
+    if not bone_mapping_data or bone_library is None:
+        return bone_name, None, "other"
+    
+    return bone_library.map_to_standard_name(bone_name)
+
+def get_bone_category(standard_name):
+    """获取骨骼的区域"""
+    if not bone_mapping_data or bone_library is None:
+        return "other"
+    
+    return bone_library.region_of(standard_name) or "other"
+
+def find_best_match(target_name, source_names, include_fingers=False):
+    """在源名称列表中查找与目标名称最匹配的名称"""
+    if bone_library is None:
+        return None, 0
+    
+    return bone_library.reference_index(source_names).find_match(target_name, include_fingers)
+
+def start_profile(tool, name):
+    """按面板选项创建性能记录（未启用时为空操作）"""
+    return StageProfiler(name, enabled=tool.profile_enabled, use_cprofile=tool.profile_enabled and tool.profile_cprofile)
+
+def finish_profile(profiler):
+    """结束性能记录，保存并输出到控制台"""
+    if not profiler.enabled:
+        return
+    profiler.finish()
+    last_profiles[profiler.name] = profiler
+    print(f"性能记录({profiler.name}): {format_profile(profiler)}")
+    if profiler.counts:
+        print("  调用计数: " + ", ".join(f"{name} {count}" for name, count in profiler.counts.items()))
+    if profiler.values:
+        print("  " + ", ".join(f"{name} {value}" for name, value in profiler.values.items()))
+
+def format_profile(profiler):
+    """简短的分阶段耗时说明"""
+    parts = [f"{PROFILE_LABELS.get(name, name)} {seconds * 1000:.1f}" for name, seconds in profiler.stages.items()]
+    return f"总计 {profiler.elapsed * 1000:.1f} ms | " + " | ".join(parts)
+
+def apply_bone_renames(armature, rename_map, profiler=None):
+    """按 plan_bone_renames 的顺序批量重命名骨骼
+    
+    Blender 的 Bone.name 会在每次重命名时同步更新顶点组、F曲线路径、约束目标和驱动器，
+    Python API 无法推迟这一步，因此这里只减少重命名次数并避免名称冲突。
+    返回 (重命名数量, 冲突列表, 耗时秒数)
+    """
+    profiler = profiler or StageProfiler("apply_bone_renames", enabled=False)
+    start = time.perf_counter()
+    bones = armature.data.bones
+    with profiler.stage("plan"):
+        steps, renamed_count, conflicts = plan_bone_renames(rename_map, [bone.name for bone in bones])
+    
+    with profiler.stage("rename"):
+        for current_name, new_name in steps:
+            bones[current_name].name = new_name
+    profiler.count("rename_steps", len(steps))
+    
+    return renamed_count, conflicts, time.perf_counter() - start
+
+# 参考骨架索引缓存: (映射库签名, 骨骼名称指纹) -> ReferenceBoneIndex
+reference_index_cache = OrderedDict()
+REFERENCE_INDEX_CACHE_SIZE = 8
+
+# 上次预览的输入: 属性组指针 -> {"key", "targets", "revision", "count"}
+preview_states = {}
+
+def get_bone_fingerprint(bone_names):
+    """骨骼名称列表的指纹（名称和顺序都会影响匹配结果）"""
+    return hashlib.sha1("\0".join(bone_names).encode('utf-8')).hexdigest()
+
+def get_reference_index(bone_names, fingerprint=None):
+    """获取参考骨架索引，骨骼名称和映射库都未变化时直接复用，返回 (索引, 是否复用)"""
+    key = (bone_library.signature, fingerprint or get_bone_fingerprint(bone_names))
+    reference_index = reference_index_cache.get(key)
+    if reference_index is not None:
+        reference_index_cache.move_to_end(key)
+        return reference_index, True
+    
+    reference_index = bone_library.reference_index(bone_names)
+    reference_index_cache[key] = reference_index
+    if len(reference_index_cache) > REFERENCE_INDEX_CACHE_SIZE:
+        reference_index_cache.popitem(last=False)
+    return reference_index, False
+
+def fill_match_result(result, match, conflict_with="", method=""):
+    """把 match_names 的一条结果写入匹配结果属性组，没有找到匹配的骨骼保持原名"""
+    bone_name, matched_name, score, region, side = match
+    result.original_name = bone_name
+    result.matched_name = matched_name
+    result.similarity = score
+    result.region = region
+    result.side = side or ""
+    result.conflict_with = conflict_with
+    result.match_method = method
+    result.layer = get_match_layer(match, method)
+
+# 持久匹配缓存: 缓存键 -> {"raw": {目标骨骼: 贪心匹配结果或 None}, "results": {结果键: 完整预览结果}}，
+# 按使用顺序排列；None 表示映射库中没有定义、不参与名称匹配的骨骼
+match_cache = None
+# 各条目序列化后的内容: 缓存键 -> bytes。条目变化时重新序列化，保存文件时直接拼接，大小即字节数
+match_cache_blobs = {}
+# 后台写入: 写入线程运行期间只保留最新一份待写入的 (路径, 内容)
+match_cache_writer = {"pending": None, "thread": None}
+match_cache_lock = threading.Lock()
+
+def get_match_cache_path():
+    """获取持久匹配缓存文件完整路径"""
+    config_dir = bpy.utils.user_resource('CONFIG')
+    return os.path.join(config_dir, MATCH_CACHE_FILE)
+
+def load_match_cache():
+    """读取持久匹配缓存（每次会话只读取一次），文件不存在或无效时返回空缓存"""
+    global match_cache
+    
+    if match_cache is not None:
+        return match_cache
+    
+    match_cache = OrderedDict()
+    match_cache_blobs.clear()
+    try:
+        with open(get_match_cache_path(), 'rb') as f:
+            stored = SnapshotUnpickler(f).load()
+    except FileNotFoundError:
+        return match_cache
+    except Exception as e:
+        print(f"匹配缓存无效，将重新建立: {str(e)}")
+        return match_cache
+    
+    if not isinstance(stored, dict) or stored.get("format") != MATCH_CACHE_FORMAT:
+        return match_cache
+    for item in stored.get("entries", []):
+        if not (isinstance(item, tuple) and len(item) == 2 and isinstance(item[1], bytes)):
+            continue
+        try:
+            entry = SnapshotUnpickler(io.BytesIO(item[1])).load()
+        except Exception:
+            continue
+        if isinstance(entry, dict) and isinstance(entry.get("raw"), dict) and isinstance(entry.get("results"), dict):
+            match_cache[item[0]] = entry
+            match_cache_blobs[item[0]] = item[1]
+    return match_cache
+
+def save_match_cache():
+    """把持久匹配缓存交给后台线程原子写入文件，连续多次保存时只写入最新的内容"""
+    stored = {
+        "format": MATCH_CACHE_FORMAT,
+        "entries": [(cache_key, match_cache_blobs[cache_key]) for cache_key in match_cache],
+    }
+    content = pickle.dumps(stored, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    with match_cache_lock:
+        match_cache_writer["pending"] = (get_match_cache_path(), content)
+        if match_cache_writer["thread"] is not None:
+            return
+        thread = threading.Thread(target=write_match_cache_worker, name="bone-match-cache", daemon=True)
+        match_cache_writer["thread"] = thread
+    thread.start()
+
+def write_match_cache_worker():
+    """后台写入线程：写入最新的待写入内容，直到没有新的内容"""
+    while True:
+        with match_cache_lock:
+            pending = match_cache_writer["pending"]
+            match_cache_writer["pending"] = None
+            if pending is None:
+                match_cache_writer["thread"] = None
+                return
+        try:
+            write_file_atomic(*pending)
+        except OSError as e:
+            print(f"保存匹配缓存失败: {str(e)}")
+
+def clear_match_cache():
+    """清空持久匹配缓存并删除缓存文件，返回清除的条目数"""
+    global match_cache
+    
+    count = len(load_match_cache())
+    match_cache = OrderedDict()
+    match_cache_blobs.clear()
+    
+    # 丢弃尚未写入的内容，并等待正在进行的写入结束，避免删除后又被写回
+    with match_cache_lock:
+        match_cache_writer["pending"] = None
+        thread = match_cache_writer["thread"]
+    if thread is not None:
+        thread.join()
+    
+    try:
+        os.remove(get_match_cache_path())
+    except FileNotFoundError:
+        pass
+    return count
+
+def get_match_cache_key(reference_fingerprint, include_fingers):
+    """逐骨骼匹配结果的缓存键：每个目标骨骼的贪心匹配只取决于它的名称、映射库内容、参考骨架和手指选项"""
+    key = repr((bone_library.signature, reference_fingerprint, bool(include_fingers)))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def get_match_result_key(tool, target_fingerprint):
+    """完整预览结果的缓存键：目标骨骼名称和影响分配的选项；按层级或位置匹配时还取决于两个骨架的骨骼布局"""
+    parts = [target_fingerprint, tool.unique_assignment, tool.hierarchy_matching, tool.spatial_fallback]
+    if tool.hierarchy_matching or tool.spatial_fallback:
+        parts.append(repr(get_bone_layout(tool.character1)))
+        parts.append(repr(get_bone_layout(tool.character2)))
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+def lookup_match_cache(cache_key):
+    """查找持久匹配缓存条目并标记为最近使用，没有时返回 None"""
+    cache = load_match_cache()
+    entry = cache.get(cache_key)
+    if entry is not None:
+        cache.move_to_end(cache_key)
+    return entry
+
+def store_match_cache(cache_key, raw_matches, result_key, result):
+    """写入逐骨骼匹配结果和完整预览结果，超出数量或字节数上限时淘汰最久未使用的内容
+    
+    内容没有变化时只更新使用顺序，不重写缓存文件
+    """
+    cache = load_match_cache()
+    entry = cache.get(cache_key)
+    if entry is None:
+        entry = cache[cache_key] = {"raw": {}, "results": {}}
+    cache.move_to_end(cache_key)
+    
+    cached_raw = entry["raw"]
+    if (entry["results"].get(result_key) == result
+            and all(bone_name in cached_raw and cached_raw[bone_name] == match for bone_name, match in raw_matches.items())):
+        return
+    
+    # 不同的目标骨架共享逐骨骼结果，当前目标骨架的骨骼排在最后，超出数量时先丢弃最久未出现的骨骼
+    raw = {bone_name: match for bone_name, match in cached_raw.items() if bone_name not in raw_matches}
+    raw.update(raw_matches)
+    for bone_name in list(raw)[:max(0, len(raw) - MATCH_CACHE_BONES)]:
+        del raw[bone_name]
+    entry["raw"] = raw
+    # 缓存文件只允许内置类型，结果按插入顺序淘汰，重新写入即移到最后
+    results = entry["results"]
+    results.pop(result_key, None)
+    results[result_key] = result
+    for old_key in list(results)[:max(0, len(results) - MATCH_CACHE_RESULTS)]:
+        del results[old_key]
+    
+    blob = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+    while len(blob) > MATCH_CACHE_ENTRY_BYTES and len(results) > 1:
+        del results[next(iter(results))]
+        blob = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+    match_cache_blobs[cache_key] = blob
+    
+    # 当前组合总是保留，其余按最久未使用淘汰
+    total = sum(len(match_cache_blobs[key]) for key in cache)
+    while len(cache) > 1 and (len(cache) > MATCH_CACHE_SIZE or total > MATCH_CACHE_MAX_BYTES):
+        old_key, _ = cache.popitem(last=False)
+        total -= len(match_cache_blobs.pop(old_key))
+    save_match_cache()
+
+def get_match_layer(match, method):
+    """提供该匹配的映射库层名称，只有按名称匹配成功的骨骼才有"""
+    if method or not match[2] or bone_library is None:
+        return ""
+    return bone_library.layer_of(match[0])
+
+def sync_match_results(results, matches, lost, methods):
+    """增量更新匹配结果，使其与按 matches 完整重建的结果相同
+    
+    删除已不存在的骨骼，只改写内容变化的结果，追加新骨骼的结果并移动到对应位置。
+    lost: {落选的目标骨骼: 它原本匹配的参考骨骼}，methods: {目标骨骼: 匹配方式}。返回是否有变化
+    """
+    changed = False
+    desired = {match[0]: match for match in matches}
+    
+    for index in range(len(results) - 1, -1, -1):
+        if results[index].original_name not in desired:
+            results.remove(index)
+            changed = True
+    
+    existing = set()
+    for result in results:
+        bone_name = result.original_name
+        existing.add(bone_name)
+        _, matched_name, score, region, side = desired[bone_name]
+        conflict_with = lost.get(bone_name, "")
+        method = methods.get(bone_name, "")
+        if (result.matched_name != matched_name or abs(result.similarity - score) > 1e-6
+                or result.conflict_with != conflict_with or result.match_method != method
+                or result.region != region or result.side != (side or "")
+                or result.layer != get_match_layer(desired[bone_name], method)):
+            fill_match_result(result, desired[bone_name], conflict_with, method)
+            changed = True
+    
+    for match in matches:
+        if match[0] not in existing:
+            fill_match_result(results.add(), match, lost.get(match[0], ""), methods.get(match[0], ""))
+            changed = True
+    
+    # 新结果追加在末尾，和骨骼顺序变化一起移动到与完整预览相同的位置
+    position = {match[0]: index for index, match in enumerate(matches)}
+    current_names = [result.original_name for result in results]
+    desired_names = sorted(current_names, key=position.__getitem__)
+    for target_index, bone_name in enumerate(desired_names):
+        if current_names[target_index] != bone_name:
+            source_index = current_names.index(bone_name, target_index + 1)
+            results.move(source_index, target_index)
+            current_names.insert(target_index, current_names.pop(source_index))
+            changed = True
+    
+    return changed
+
+def get_bone_layout(armature):
+    """骨骼位置和层级: [(名称, 头部坐标, 尾部坐标, 父骨骼名称)]，坐标为骨架空间"""
+    return [(bone.name, tuple(bone.head_local), tuple(bone.tail_local), bone.parent.name if bone.parent else None)
+            for bone in armature.data.bones]
+
+def match_unresolved_by_hierarchy(reference_index, reference_armature, target_armature, matches, bone_names, lost, include_fingers):
+    """从名称匹配的骨骼出发沿骨骼层级向下，为仍未匹配的目标骨骼在对应参考子树中查找参考骨骼
+    
+    一一分配中落选的骨骼不参与；不重命名手指时手指骨骼（目标或参考一方属于手指区域）也不参与。
+    返回 (按骨骼顺序合并后的结果, {目标骨骼: "hierarchy"})
+    """
+    anchors = {match[0]: match[1] for match in matches if match[2] > 0}
+    candidates = set()
+    for bone_name in bone_names:
+        if bone_name in anchors or bone_name in lost:
+            continue
+        if not include_fingers and bone_library.map_to_standard_name(bone_name)[2] == "fingers":
+            continue
+        candidates.add(bone_name)
+    if not anchors or not candidates:
+        return matches, {}
+    
+    reference_parents = {name: parent for name, _, _, parent in get_bone_layout(reference_armature)}
+    target_parents = {name: parent for name, _, _, parent in get_bone_layout(target_armature)}
+    hierarchy = match_by_hierarchy(reference_index, reference_parents, target_parents, anchors, candidates)
+    if not include_fingers:
+        hierarchy = {bone_name: result for bone_name, result in hierarchy.items()
+                     if bone_library.map_to_standard_name(result[0])[2] != "fingers"}
+    if not hierarchy:
+        return matches, {}
+    
+    by_name = {match[0]: match for match in matches}
+    for bone_name, (reference_name, score) in hierarchy.items():
+        _, side, region = bone_library.map_to_standard_name(reference_name)
+        by_name[bone_name] = (bone_name, reference_name, score, region, side)
+    merged = [by_name[bone_name] for bone_name in bone_names if bone_name in by_name]
+    return merged, {bone_name: "hierarchy" for bone_name in hierarchy}
+
+def match_unresolved_by_position(reference_armature, target_armature, matches, bone_names):
+    """为映射库无法识别（区域为 other）的目标骨骼按位置查找参考骨骼
+    
+    已通过名称匹配的骨骼作为对齐锚点，并且不会再被分配。
+    返回 (按骨骼顺序合并后的结果, {目标骨骼: "spatial"})
+    """
+    anchors = {match[0]: match[1] for match in matches if match[2] > 0}
+    resolved = {match[0] for match in matches}
+    unresolved = [bone_name for bone_name in bone_names
+                  if bone_name not in resolved and bone_library.map_to_standard_name(bone_name)[2] == "other"]
+    if not unresolved:
+        return matches, {}
+    
+    matcher = SpatialBoneMatcher(get_bone_layout(reference_armature))
+    spatial = matcher.match(get_bone_layout(target_armature), unresolved, anchors)
+    if not spatial:
+        return matches, {}
+    
+    by_name = {match[0]: match for match in matches}
+    for bone_name, (reference_name, score) in spatial.items():
+        by_name[bone_name] = (bone_name, reference_name, score, "other", bone_library.map_to_standard_name(bone_name)[1])
+    merged = [by_name[bone_name] for bone_name in bone_names if bone_name in by_name]
+    return merged, {bone_name: "spatial" for bone_name in spatial}
+
+# 结果列表的过滤和排序缓存: 属性组指针 -> (缓存键, 过滤标记, 新顺序)
+result_filter_cache = {}
+# 映射库无法识别的骨骼所在的区域
+UNRESOLVED_REGION = "other"
+# 侧别在区域排序中的顺序：左、无侧别、右
+SIDE_ORDER = {"LEFT": 0, "": 1, "RIGHT": 2}
+
+def get_result_filter(tool, visible_flag, filter_name="", invert=False, region="ALL", side="ALL",
+                      min_similarity=0.0, sort_by='ORDER', reverse=False):
+    """计算结果列表的过滤标记和显示顺序，返回 (过滤标记列表, 新顺序列表)
+    
+    结果列表每次重绘都会调用，这里只在结果、映射库或过滤设置变化后重新计算一次，
+    其余时候直接返回缓存，重绘耗时只取决于可见的行数
+    """
+    results = tool.match_results
+    cache_key = (tool.results_revision, len(results), bone_library.signature if bone_library else None,
+                 visible_flag, filter_name, invert, region, side, round(min_similarity, 4), sort_by, reverse)
+    pointer = tool.as_pointer()
+    cached = result_filter_cache.get(pointer)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1], cached[2]
+    
+    pattern = f"*{filter_name.lower()}*" if filter_name else None
+    flags = []
+    for result in results:
+        visible = ((pattern is None or fnmatch.fnmatchcase(result.original_name.lower(), pattern)
+                    or fnmatch.fnmatchcase(result.matched_name.lower(), pattern))
+                   and (region == 'ALL' or result.region == region)
+                   and (side == 'ALL' or result.side == ("" if side == 'NONE' else side))
+                   and result.similarity >= min_similarity - 1e-6)
+        flags.append(visible_flag if visible != invert else 0)
+    
+    order = []
+    if sort_by != 'ORDER' or reverse:
+        if sort_by == 'NAME':
+            keys = [result.original_name.lower() for result in results]
+        elif sort_by == 'SIMILARITY':
+            keys = [-result.similarity for result in results]
+        elif sort_by == 'REGION':
+            # 按映射库中的区域顺序，未识别的骨骼在最后；区域内左、中、右
+            region_names = list(bone_library.regions) if bone_library else []
+            positions = {region_name: index for index, region_name in enumerate(region_names)}
+            keys = [(positions.get(result.region, len(positions)), SIDE_ORDER.get(result.side, 1))
+                    for result in results]
+        else:
+            keys = [0] * len(results)
+        ranked = sorted(range(len(results)), key=lambda index: (keys[index], index), reverse=reverse)
+        order = [0] * len(results)
+        for position, index in enumerate(ranked):
+            order[index] = position
+    
+    result_filter_cache[pointer] = (cache_key, flags, order)
+    return flags, order
+
+def get_region_items(self, context):
+    """结果列表区域过滤的选项：映射库中的区域和未识别骨骼"""
+    items = [('ALL', "全部区域", "")]
+    if bone_library:
+        items.extend((region_name, region_data.get("name", region_name), "")
+                     for region_name, region_data in bone_library.regions.items())
+    if not bone_library or UNRESOLVED_REGION not in bone_library.regions:
+        items.append((UNRESOLVED_REGION, "未识别骨骼", ""))
+    # Blender 要求动态枚举的字符串在使用期间保持引用
+    region_filter_items[:] = items
+    return region_filter_items
+
+# 区域过滤选项（保持引用，见 get_region_items）
+region_filter_items = []
+
+def get_region_icon(region_name):
+    """获取区域的图标"""
+    icon_map = {
+        "core": 'ORIENTATION_LOCAL',
+        "arms": 'VIEW_PAN',
+        "legs": 'CON_FOLLOWPATH',
+        "fingers": 'HAND',
+        "other": 'PIVOT_CURSOR'
+    }
+    return icon_map.get(region_name, 'QUESTION')
+
+def get_result_label(bone):
+    """单个骨骼匹配结果的显示文字和图标，来自叠加映射库时附带提供匹配的层名称"""
+    if bone.conflict_with:
+        return f"{bone.original_name} (冲突落选: {bone.conflict_with})", 'ERROR'
+    if bone.original_name == bone.matched_name:
+        return f"{bone.original_name} (保持原名)", 'BONE_DATA'
+    if bone.match_method == "hierarchy":
+        return f"{bone.original_name} → {bone.matched_name} (层级)", 'BONE_DATA'
+    if bone.match_method == "spatial":
+        return f"{bone.original_name} → {bone.matched_name} (位置)", 'BONE_DATA'
+    if bone.layer:
+        return f"{bone.original_name} → {bone.matched_name} [{bone.layer}]", 'BONE_DATA'
+    return f"{bone.original_name} → {bone.matched_name}", 'BONE_DATA'
+
+class BONE_RENAME_UL_match_results(bpy.types.UIList):
+    """匹配结果列表：只绘制可见的行，过滤和排序结果按结果版本缓存"""
+    
+    filter_region: bpy.props.EnumProperty(
+        name="区域",
+        description="只显示该区域的骨骼",
+        items=get_region_items
+    )
+    
+    filter_side: bpy.props.EnumProperty(
+        name="侧别",
+        description="只显示该侧别的骨骼",
+        items=[
+            ('ALL', "全部侧别", ""),
+            ('LEFT', "左", ""),
+            ('RIGHT', "右", ""),
+            ('NONE', "无侧别", ""),
+        ],
+        default='ALL'
+    )
+    
+    min_similarity: bpy.props.FloatProperty(
+        name="最低相似度",
+        description="只显示相似度不低于该值的骨骼",
+        default=0.0,
+        min=0.0,
+        max=1.0
+    )
+    
+    sort_by: bpy.props.EnumProperty(
+        name="排序",
+        items=[
+            ('ORDER', "骨骼顺序", "按目标骨架中的骨骼顺序"),
+            ('NAME', "名称", "按原始名称"),
+            ('SIMILARITY', "相似度", "相似度高的在前"),
+            ('REGION', "区域", "按区域和侧别"),
+        ],
+        default='ORDER'
+    )
+    
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        text, status_icon = get_result_label(item)
+        row = layout.row(align=True)
+        row.label(text="", icon=get_region_icon(item.region))
+        row.label(text=text, icon=status_icon)
+        info = row.row()
+        info.alignment = 'RIGHT'
+        side_text = {"LEFT": "左", "RIGHT": "右"}.get(item.side, "")
+        info.label(text=f"{side_text} {item.similarity:.2f}".strip())
+    
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_invert", text="", icon='ARROW_LEFTRIGHT')
+        row = layout.row(align=True)
+        row.prop(self, "filter_region", text="")
+        row.prop(self, "filter_side", text="")
+        layout.prop(self, "min_similarity", slider=True)
+        row = layout.row(align=True)
+        row.prop(self, "sort_by", text="排序")
+        row.prop(self, "use_filter_sort_reverse", text="", icon='SORT_DESC' if self.use_filter_sort_reverse else 'SORT_ASC')
+    
+    def filter_items(self, context, data, propname):
+        return get_result_filter(data, self.bitflag_filter_item, self.filter_name, self.use_filter_invert,
+                                 self.filter_region, self.filter_side, self.min_similarity,
+                                 self.sort_by, self.use_filter_sort_reverse)
+
+class BONE_RENAME_OT_download_mapping(bpy.types.Operator):
+    """下载骨骼名称映射库"""
+    bl_idname = "bone_rename.download_mapping"
+    bl_label = "下载映射库"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        scene = context.scene
+        tool = scene.bone_rename_tool
+        
+        # 在后台线程中下载，完成后由定时器在主线程应用结果
+        if not start_mapping_download(get_mirror_urls(tool), tool.download_timeout):
+            self.report({'WARNING'}, "映射库正在下载中")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, "开始在后台下载映射库")
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_reload_mapping(bpy.types.Operator):
+    """重新加载本地映射库"""
+    bl_idname = "bone_rename.reload_mapping"
+    bl_label = "重新加载"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        scene = context.scene
+        tool = scene.bone_rename_tool
+        
+        success, message = reload_local_mapping()
+        if success:
+            self.report({'INFO'}, f"{message} 版本: {version_info}")
+        else:
+            self.report({'ERROR'}, message)
+        
+        # 更新UI显示
+        tool.mapping_version = version_info
+        tool.mapping_last_updated = last_updated_info
+        
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_load_local_mapping(bpy.types.Operator):
+    """从本地文件加载骨骼名称映射库"""
+    bl_idname = "bone_rename.load_local_mapping"
+    bl_label = "加载本地映射库"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    filepath: bpy.props.StringProperty(
+        subtype="FILE_PATH",
+        description="选择骨骼映射库JSON文件"
+    )
+    
+    filter_glob: bpy.props.StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+    )
+    
+    def execute(self, context):
+        global bone_mapping_data, version_info, last_updated_info
+        
+        scene = context.scene
+        tool = scene.bone_rename_tool
+        
+        try:
+            # 从本地文件读取JSON
+            with open(self.filepath, 'r', encoding='utf-8') as file:
+                data = file.read()
+            
+            # 解析并验证JSON结构，无效的文件不替换当前映射库
+            mapping_data = parse_mapping_text(data)
+            try:
+                check_mapping_data(mapping_data)
+            except ValueError as e:
+                self.report({'ERROR'}, str(e))
+                return {'CANCELLED'}
+            
+            bone_mapping_data = mapping_data
+            compile_bone_mapping()
+            
+            # 更新全局状态
+            version_info = bone_mapping_data.get("version", "未知版本")
+            last_updated_info = bone_mapping_data.get("last_updated", "")
+            
+            # 保存到缓存文件
+            save_mapping_cache()
+            clear_download_meta()
+            
+            # 更新UI显示
+            tool.mapping_version = version_info
+            tool.mapping_last_updated = last_updated_info
+            
+            self.report({'INFO'}, f"骨骼映射库加载成功: 版本 {version_info}")
+        except Exception as e:
+            self.report({'ERROR'}, f"加载骨骼映射库失败: {str(e)}")
+            return {'CANCELLED'}
+        
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+class BONE_RENAME_OT_add_mapping_layer(bpy.types.Operator):
+    """添加映射库叠加层（工作室或项目专用的映射库），叠加在基础库之上且优先"""
+    bl_idname = "bone_rename.add_mapping_layer"
+    bl_label = "添加叠加层"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    filepath: bpy.props.StringProperty(
+        subtype="FILE_PATH",
+        description="选择骨骼映射库JSON文件"
+    )
+    
+    filter_glob: bpy.props.StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+    )
+    
+    def execute(self, context):
+        tool = context.scene.bone_rename_tool
+        
+        try:
+            load_mapping_layer(bpy.path.abspath(self.filepath))
+        except Exception as e:
+            self.report({'ERROR'}, f"加载叠加层失败: {str(e)}")
+            return {'CANCELLED'}
+        
+        layer = tool.mapping_layers.add()
+        layer.filepath = self.filepath
+        layer.name = os.path.splitext(os.path.basename(self.filepath))[0]
+        sync_mapping_layers(tool)
+        
+        self.report({'INFO'}, f"已添加叠加层: {layer.name}")
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+class BONE_RENAME_OT_remove_mapping_layer(bpy.types.Operator):
+    """移除映射库叠加层"""
+    bl_idname = "bone_rename.remove_mapping_layer"
+    bl_label = "移除叠加层"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    index: bpy.props.IntProperty()
+    
+    def execute(self, context):
+        tool = context.scene.bone_rename_tool
+        if not 0 <= self.index < len(tool.mapping_layers):
+            return {'CANCELLED'}
+        
+        tool.mapping_layers.remove(self.index)
+        sync_mapping_layers(tool)
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_move_mapping_layer(bpy.types.Operator):
+    """调整映射库叠加层的优先级（靠后的优先）"""
+    bl_idname = "bone_rename.move_mapping_layer"
+    bl_label = "移动叠加层"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    index: bpy.props.IntProperty()
+    direction: bpy.props.EnumProperty(
+        items=[
+            ('UP', "上移", "降低优先级"),
+            ('DOWN', "下移", "提高优先级"),
+        ]
+    )
+    
+    def execute(self, context):
+        tool = context.scene.bone_rename_tool
+        target = self.index - 1 if self.direction == 'UP' else self.index + 1
+        if not 0 <= self.index < len(tool.mapping_layers) or not 0 <= target < len(tool.mapping_layers):
+            return {'CANCELLED'}
+        
+        tool.mapping_layers.move(self.index, target)
+        sync_mapping_layers(tool)
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_preview_rename(bpy.types.Operator):
+    """预览骨骼重命名结果"""
+    bl_idname = "bone_rename.preview_rename"
+    bl_label = "预览重命名"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        scene = context.scene
+        tool = scene.bone_rename_tool
+        
+        if not tool.character1 or not tool.character2:
+            self.report({'ERROR'}, "请先选择两个角色骨架")
+            return {'CANCELLED'}
+        
+        # 映射库可能仍在等待延迟加载；叠加层文件可能在上次预览后被修改
+        ensure_mapping_loaded()
+        sync_mapping_layers(tool)
+        
+        if tool.character1.type != 'ARMATURE' or tool.character2.type != 'ARMATURE':
+            self.report({'ERROR'}, "选择的对象必须是骨架")
+            return {'CANCELLED'}
+        
+        # 检查是否有骨骼映射库
+        if bone_mapping_data is None or bone_library is None:
+            self.report({'ERROR'}, "请先加载骨骼映射库")
+            return {'CANCELLED'}
+        
+        # 匹配过程中出错时也要结束性能记录，否则 cProfile 会一直保持启用
+        profiler = start_profile(tool, "preview")
+        try:
+            return self.preview(tool, profiler)
+        finally:
+            finish_profile(profiler)
+    
+    def preview(self, tool, profiler):
+        """计算并写入预览结果，性能记录由 execute 结束"""
+        cache_hits, cache_misses = bone_library.cache.hits, bone_library.cache.misses
+        
+        # 获取骨骼名称列表
+        with profiler.stage("collect"):
+            char1_bones = [bone.name for bone in tool.character1.data.bones]
+            char2_bones = [bone.name for bone in tool.character2.data.bones]
+        profiler.set_value("reference_bones", len(char1_bones))
+        profiler.set_value("target_bones", len(char2_bones))
+        
+        reference_fingerprint = get_bone_fingerprint(char1_bones)
+        pointer = tool.as_pointer()
+        state_key = (bone_library.signature, reference_fingerprint, tool.rename_fingers)
+        
+        # 持久匹配缓存：映射库、两个骨架和匹配选项都与缓存的某次预览相同时直接使用其结果
+        cache_entry = None
+        if tool.use_match_cache:
+            with profiler.stage("match_cache"):
+                cache_key = get_match_cache_key(reference_fingerprint, tool.rename_fingers)
+                result_key = get_match_result_key(tool, get_bone_fingerprint(char2_bones))
+                cache_entry = lookup_match_cache(cache_key)
+            cached_result = cache_entry["results"].get(result_key) if cache_entry else None
+            if cached_result is not None:
+                return self.apply_cached_result(tool, profiler, state_key, char2_bones, cache_entry, cached_result)
+        
+        # 参考骨架只标准化一次，并按 (标准名称, 侧别) 建立查找表；骨骼名称未变化时复用
+        with profiler.stage("reference_index"):
+            reference_index, reference_reused = get_reference_index(char1_bones, reference_fingerprint)
+        profiler.set_value("reference_index_reused", reference_reused)
+        counters_before = dict(reference_index.counters)
+        similar_seconds_before = reference_index.similar_seconds
+        
+        # 每个目标骨骼的贪心匹配结果只取决于它的名称，参考骨架、映射库和手指选项不变时
+        # 只需重新计算新增或改名的骨骼，并删除已不存在的骨骼的结果
+        state = preview_states.get(pointer)
+        incremental = (state is not None and state["key"] == state_key
+                       and state["revision"] == tool.results_revision
+                       and state["count"] == len(tool.match_results))
+        if incremental:
+            raw_matches = state["matches"]
+            current_names = set(char2_bones)
+            removed_names = state["targets"] - current_names
+            added_names = [bone_name for bone_name in char2_bones if bone_name not in state["targets"]]
+            for bone_name in removed_names:
+                raw_matches.pop(bone_name, None)
+        elif cache_entry is not None:
+            # 持久缓存中有相同参考骨架的逐骨骼结果（如同一基础骨架的其他变体），只计算缓存中没有的骨骼
+            cached_raw = cache_entry["raw"]
+            raw_matches = {bone_name: cached_raw[bone_name] for bone_name in char2_bones
+                           if cached_raw.get(bone_name) is not None}
+            removed_names = set()
+            added_names = [bone_name for bone_name in char2_bones if bone_name not in cached_raw]
+            profiler.set_value("match_cache_reused", len(char2_bones) - len(added_names))
+        else:
+            raw_matches = {}
+            removed_names = set()
+            added_names = char2_bones
+        profiler.set_value("incremental", incremental)
+        profiler.set_value("recomputed", len(added_names))
+        profiler.set_value("removed", len(removed_names))
+        
+        # 记录性能时先单独完成标准化（结果进入缓存），以便与匹配阶段分开计时
+        if profiler.enabled:
+            with profiler.stage("normalization"):
+                for bone_name in added_names:
+                    bone_library.map_to_standard_name(bone_name)
+        
+        start = time.perf_counter()
+        for match in bone_library.match_names(reference_index, added_names, tool.rename_fingers):
+            raw_matches[match[0]] = match
+        match_seconds = time.perf_counter() - start
+        similar_seconds = reference_index.similar_seconds - similar_seconds_before
+        profiler.add_time("exact", match_seconds - similar_seconds)
+        profiler.add_time("fuzzy", similar_seconds)
+        
+        # 多个骨骼匹配到同一个参考骨骼时，在 (区域, 侧别) 分组内求一一对应的分配
+        matches = [raw_matches[bone_name] for bone_name in char2_bones if bone_name in raw_matches]
+        lost = {}
+        if tool.unique_assignment:
+            with profiler.stage("assignment"):
+                matches, lost = reference_index.assign_unique(matches)
+        
+        # 仍未匹配的骨骼沿骨骼层级在对应的参考子树中查找
+        methods = {}
+        if tool.hierarchy_matching:
+            with profiler.stage("hierarchy"):
+                matches, methods = match_unresolved_by_hierarchy(reference_index, tool.character1, tool.character2,
+                                                                 matches, char2_bones, lost, tool.rename_fingers)
+            profiler.set_value("hierarchy_matched", len(methods))
+        
+        # 映射库无法识别的骨骼按位置匹配
+        if tool.spatial_fallback:
+            with profiler.stage("spatial"):
+                matches, spatial_methods = match_unresolved_by_position(tool.character1, tool.character2, matches, char2_bones)
+            methods.update(spatial_methods)
+            profiler.set_value("spatial_matched", len(spatial_methods))
+        
+        with profiler.stage("fill_results"):
+            if incremental:
+                changed = sync_match_results(tool.match_results, matches, lost, methods)
+            else:
+                # 完整预览：重建全部匹配结果
+                tool.match_results.clear()
+                for match in matches:
+                    fill_match_result(tool.match_results.add(), match, lost.get(match[0], ""), methods.get(match[0], ""))
+                changed = True
+        matched_count = sum(1 for match in matches if match[2] > 0)
+        
+        # 更新统计信息
+        tool.matched_count = matched_count
+        tool.conflict_count = len(lost)
+        tool.has_preview = True
+        if changed:
+            tool.results_revision += 1
+        preview_states[pointer] = {
+            "key": state_key,
+            "targets": set(char2_bones),
+            "matches": raw_matches,
+            "revision": tool.results_revision,
+            "count": len(tool.match_results),
+        }
+        
+        if tool.use_match_cache:
+            with profiler.stage("match_cache"):
+                store_match_cache(cache_key, {bone_name: raw_matches.get(bone_name) for bone_name in char2_bones},
+                                  result_key, {"matches": matches, "lost": lost, "methods": methods})
+        
+        for name, count in reference_index.counters.items():
+            profiler.count(name, count - counters_before.get(name, 0))
+        profiler.count("cache_hits", bone_library.cache.hits - cache_hits)
+        profiler.count("cache_misses", bone_library.cache.misses - cache_misses)
+        profiler.set_value("results", len(tool.match_results))
+        profiler.set_value("matched", matched_count)
+        profiler.set_value("conflicts_lost", len(lost))
+        
+        cache_stats = bone_library.cache.stats()
+        print(f"名称标准化缓存: 命中 {cache_stats['hits']}, 未命中 {cache_stats['misses']}, "
+              f"条目 {cache_stats['size']}/{cache_stats['maxsize']}, 命中率 {cache_stats['hit_rate']:.1%}")
+        
+        message = f"预览完成: {matched_count} 个骨骼将重命名"
+        if lost:
+            message += f"，{len(lost)} 个因争用同一参考骨骼落选"
+        if incremental:
+            message += f" (更新 {len(added_names)} 个, 移除 {len(removed_names)} 个)"
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+    
+    def apply_cached_result(self, tool, profiler, state_key, char2_bones, cache_entry, cached_result):
+        """使用持久匹配缓存中的完整预览结果，并记录为上次预览的输入以便之后增量更新"""
+        matches, lost, methods = cached_result["matches"], cached_result["lost"], cached_result["methods"]
+        with profiler.stage("fill_results"):
+            changed = sync_match_results(tool.match_results, matches, lost, methods)
+        matched_count = sum(1 for match in matches if match[2] > 0)
+        
+        tool.matched_count = matched_count
+        tool.conflict_count = len(lost)
+        tool.has_preview = True
+        if changed:
+            tool.results_revision += 1
+        cached_raw = cache_entry["raw"]
+        preview_states[tool.as_pointer()] = {
+            "key": state_key,
+            "targets": set(char2_bones),
+            "matches": {bone_name: cached_raw[bone_name] for bone_name in char2_bones
+                        if cached_raw.get(bone_name) is not None},
+            "revision": tool.results_revision,
+            "count": len(tool.match_results),
+        }
+        
+        profiler.set_value("match_cache_hit", True)
+        profiler.set_value("results", len(tool.match_results))
+        profiler.set_value("matched", matched_count)
+        profiler.set_value("conflicts_lost", len(lost))
+        
+        message = f"预览完成: {matched_count} 个骨骼将重命名"
+        if lost:
+            message += f"，{len(lost)} 个因争用同一参考骨骼落选"
+        self.report({'INFO'}, message + " (使用匹配缓存)")
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_execute_rename(bpy.types.Operator):
+    """执行骨骼重命名操作"""
+    bl_idname = "bone_rename.execute_rename"
+    bl_label = "执行重命名"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        scene = context.scene
+        tool = scene.bone_rename_tool
+        
+        if not tool.has_preview:
+            self.report({'ERROR'}, "请先预览重命名结果")
+            return {'CANCELLED'}
+        
+        if not tool.character2:
+            self.report({'ERROR'}, "目标角色不存在")
+            return {'CANCELLED'}
+        
+        profiler = start_profile(tool, "execute")
+        try:
+            return self.rename(tool, profiler)
+        finally:
+            finish_profile(profiler)
+    
+    def rename(self, tool, profiler):
+        """按预览结果重命名目标骨架，性能记录由 execute 结束"""
+        profiler.set_value("results", len(tool.match_results))
+        profiler.set_value("target_bones", len(tool.character2.data.bones))
+        
+        if tool.bulk_rename:
+            # 批量重命名：一次性规划整个重命名映射，避免链式重命名产生 .001 后缀
+            rename_map = {result.original_name: result.matched_name for result in tool.match_results}
+            renamed_count, conflicts, elapsed = apply_bone_renames(tool.character2, rename_map, profiler)
+            for original_name, matched_name in conflicts:
+                print(f"跳过重命名 {original_name} → {matched_name}: 目标名称已被占用")
+        else:
+            # 逐个重命名
+            start = time.perf_counter()
+            renamed_count = 0
+            conflicts = []
+            for result in tool.match_results:
+                bone = tool.character2.data.bones.get(result.original_name)
+                if bone and result.original_name != result.matched_name:  # 只有当名称不同时才重命名
+                    bone.name = result.matched_name
+                    renamed_count += 1
+            elapsed = time.perf_counter() - start
+            profiler.add_time("rename", elapsed)
+        
+        profiler.set_value("renamed", renamed_count)
+        profiler.set_value("conflicts", len(conflicts))
+        
+        print(f"骨骼重命名({'批量' if tool.bulk_rename else '逐个'}): {renamed_count} 个骨骼，用时 {elapsed * 1000:.1f} ms")
+        
+        # 重置预览状态
+        tool.has_preview = False
+        
+        message = f"重命名完成: {renamed_count} 个骨骼已重命名，用时 {elapsed * 1000:.0f} ms"
+        if conflicts:
+            message += f"，{len(conflicts)} 个因名称冲突跳过"
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_batch_rename(bpy.types.Operator):
+    """按角色1的命名规范批量重命名多个目标骨架"""
+    bl_idname = "bone_rename.batch_rename"
+    bl_label = "批量重命名"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def get_targets(self, context, tool):
+        """获取目标骨架（共享同一骨架数据的对象只处理一次）"""
+        if tool.batch_source == 'COLLECTION':
+            objects = tool.batch_collection.all_objects if tool.batch_collection else []
+        else:
+            objects = context.selected_objects
+        
+        targets = []
+        seen_data = {tool.character1.data}
+        for obj in objects:
+            if obj.type == 'ARMATURE' and obj.data not in seen_data:
+                seen_data.add(obj.data)
+                targets.append(obj)
+        return targets
+    
+    def execute(self, context):
+        scene = context.scene
+        tool = scene.bone_rename_tool
+        
+        if not tool.character1 or tool.character1.type != 'ARMATURE':
+            self.report({'ERROR'}, "请先选择参考骨架 (角色1)")
+            return {'CANCELLED'}
+        
+        # 映射库可能仍在等待延迟加载；叠加层文件可能在上次预览后被修改
+        ensure_mapping_loaded()
+        sync_mapping_layers(tool)
+        
+        # 检查是否有骨骼映射库
+        if bone_mapping_data is None or bone_library is None:
+            self.report({'ERROR'}, "请先加载骨骼映射库")
+            return {'CANCELLED'}
+        
+        targets = self.get_targets(context, tool)
+        if not targets:
+            self.report({'ERROR'}, "没有找到要处理的目标骨架")
+            return {'CANCELLED'}
+        
+        start = time.perf_counter()
+        
+        # 参考骨架只建立一次索引，所有目标共用
+        reference_index, _ = get_reference_index([bone.name for bone in tool.character1.data.bones])
+        
+        total_bones = 0
+        total_renamed = 0
+        for target in targets:
+            target_start = time.perf_counter()
+            target_names = [bone.name for bone in target.data.bones]
+            results = bone_library.match_names(reference_index, target_names, tool.rename_fingers)
+            if tool.unique_assignment:
+                results, _ = reference_index.assign_unique(results)
+            
+            rename_map = {original_name: matched_name for original_name, matched_name, score, _, _ in results if score > 0}
+            renamed_count, conflicts, _ = apply_bone_renames(target, rename_map)
+            
+            total_bones += len(target_names)
+            total_renamed += renamed_count
+            print(f"批量重命名 {target.name}: {len(target_names)} 个骨骼, 匹配 {len(rename_map)}, "
+                  f"重命名 {renamed_count}, 冲突跳过 {len(conflicts)}, "
+                  f"用时 {(time.perf_counter() - target_start) * 1000:.1f} ms")
+        
+        elapsed = time.perf_counter() - start
+        throughput = total_bones / elapsed if elapsed > 0 else 0
+        print(f"批量重命名完成: {len(targets)} 个骨架, {total_bones} 个骨骼, 重命名 {total_renamed}, "
+              f"用时 {elapsed:.3f} s ({throughput:.0f} 骨骼/秒)")
+        
+        # 目标骨骼名称已变化，之前的预览不再有效
+        tool.has_preview = False
+        
+        self.report({'INFO'}, f"批量重命名完成: {len(targets)} 个骨架, {total_renamed} 个骨骼已重命名 ({throughput:.0f} 骨骼/秒)")
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_clear_results(bpy.types.Operator):
+    """清空匹配结果"""
+    bl_idname = "bone_rename.clear_results"
+    bl_label = "清空结果"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        scene = context.scene
+        tool = scene.bone_rename_tool
+        
+        tool.match_results.clear()
+        tool.matched_count = 0
+        tool.conflict_count = 0
+        tool.has_preview = False
+        tool.results_revision += 1
+        
+        self.report({'INFO'}, "已清空匹配结果")
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_clear_match_cache(bpy.types.Operator):
+    """清空保存在配置目录中的持久匹配缓存"""
+    bl_idname = "bone_rename.clear_match_cache"
+    bl_label = "清空匹配缓存"
+    
+    def execute(self, context):
+        try:
+            count = clear_match_cache()
+        except OSError as e:
+            self.report({'ERROR'}, f"删除匹配缓存文件失败: {str(e)}")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"已清空匹配缓存 ({count} 组)")
+        return {'FINISHED'}
+
+class BONE_RENAME_OT_dump_profile(bpy.types.Operator):
+    """把最近一次预览/执行的性能记录写入文件，便于附在问题报告中"""
+    bl_idname = "bone_rename.dump_profile"
+    bl_label = "导出性能记录"
+    
+    filepath: bpy.props.StringProperty(
+        subtype="FILE_PATH",
+        description="性能记录JSON文件"
+    )
+    
+    filter_glob: bpy.props.StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+    )
+    
+    def execute(self, context):
+        if not last_profiles:
+            self.report({'ERROR'}, "没有性能记录，请先启用记录并预览或执行重命名")
+            return {'CANCELLED'}
+        
+        file_path = bpy.path.ensure_ext(self.filepath, ".json")
+        report = {
+            "blender_version": bpy.app.version_string,
+            "library_version": version_info,
+            "library_signature": list(bone_library.signature) if bone_library and bone_library.signature else None,
+            "cache": bone_library.cache.stats() if bone_library else None,
+            "profiles": {},
+        }
+        
+        try:
+            base_path = os.path.splitext(file_path)[0]
+            for name, profiler in last_profiles.items():
+                report["profiles"][name] = profiler.to_dict()
+                # cProfile 数据另存为 .prof 文件
+                cprofile_path = f"{base_path}.{name}.prof"
+                if profiler.dump_cprofile(cprofile_path):
+                    report["profiles"][name]["cprofile_file"] = os.path.basename(cprofile_path)
+            
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            self.report({'ERROR'}, f"导出性能记录失败: {str(e)}")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"性能记录已导出: {file_path}")
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "bone_rename_profile.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+class BoneMatchResult(bpy.types.PropertyGroup):
+    """单个骨骼匹配结果"""
+    original_name: bpy.props.StringProperty(name="原始名称")
+    matched_name: bpy.props.StringProperty(name="匹配名称")
+    similarity: bpy.props.FloatProperty(name="相似度", precision=3)
+    region: bpy.props.StringProperty(name="区域")
+    side: bpy.props.StringProperty(name="侧别")
+    conflict_with: bpy.props.StringProperty(name="落选的参考骨骼")
+    match_method: bpy.props.StringProperty(name="匹配方式")
+    layer: bpy.props.StringProperty(name="映射库层")
+
+def update_mapping_layers(self, context):
+    """叠加层设置变化时重新合并映射库"""
+    sync_mapping_layers(context.scene.bone_rename_tool)
+
+class MappingLayer(bpy.types.PropertyGroup):
+    """映射库叠加层"""
+    name: bpy.props.StringProperty(name="名称", update=update_mapping_layers)
+    filepath: bpy.props.StringProperty(name="文件", subtype="FILE_PATH", update=update_mapping_layers)
+    enabled: bpy.props.BoolProperty(name="启用", default=True, update=update_mapping_layers)
+
+class BONE_RENAME_PT_main_panel(bpy.types.Panel):
+    """创建主面板"""
+    bl_label = "骨骼重命名工具"
+    bl_idname = "BONE_RENAME_PT_main_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = '工具'
+    
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        tool = scene.bone_rename_tool
+        
+        # 角色选择部分
+        box = layout.box()
+        box.label(text="角色选择:")
+        box.prop(tool, "character1", text="角色1 (参考)")
+        box.prop(tool, "character2", text="角色2 (目标)")
+        
+        # 骨骼映射库设置 - 可折叠区域
+        mapping_box = layout.box()
+        
+        # 映射库标题行
+        row = mapping_box.row()
+        row.prop(tool, "show_mapping_details", 
+                icon="TRIA_DOWN" if tool.show_mapping_details else "TRIA_RIGHT",
+                emboss=False,
+                text="骨骼名称映射库" + ("" if tool.show_mapping_details else f" ({version_info})"))
+        
+        # 映射库尚未完成延迟加载
+        if mapping_load_pending:
+            mapping_box.label(text="正在加载映射库...", icon='SORTTIME')
+        # 如果用户选择展开或者没有缓存文件，显示详细内容
+        elif tool.show_mapping_details or not file_exists:
+            # 映射库状态
+            row = mapping_box.row()
+            row.label(text="状态:", icon='FILE')
+            row.label(text="已缓存" if file_exists else "未缓存", 
+                     icon='CHECKMARK' if file_exists else 'ERROR')
+            
+            # 版本信息
+            row = mapping_box.row()
+            row.label(text="版本:", icon='SORTALPHA')
+            row.label(text=version_info)
+            
+            # 更新日期信息
+            if last_updated_info:
+                row = mapping_box.row()
+                row.label(text="更新日期:", icon='TIME')
+                row.label(text=last_updated_info)
+            
+            # 变体冲突提示
+            if bone_library and bone_library.index.conflicts:
+                row = mapping_box.row()
+                row.label(text=f"变体冲突: {len(bone_library.index.conflicts)} 个 (详见控制台)", icon='ERROR')
+            
+            # 名称标准化缓存统计
+            if bone_library:
+                cache_stats = bone_library.cache.stats()
+                row = mapping_box.row()
+                row.label(text="标准化缓存:", icon='MEMORY')
+                row.label(text=f"命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']}")
+            
+            # 后台下载状态
+            if download_task is not None:
+                mapping_box.label(text=download_task.progress_text(), icon='SORTTIME')
+            elif download_status:
+                mapping_box.label(text=download_status, icon='INFO')
+            
+            # 操作按钮
+            row = mapping_box.row(align=True)
+            download_column = row.row(align=True)
+            download_column.enabled = download_task is None
+            download_column.operator("bone_rename.download_mapping", text="下载映射库", icon='IMPORT')
+            row.operator("bone_rename.reload_mapping", text="重新加载", icon='FILE_REFRESH')
+            mapping_box.prop(tool, "download_timeout")
+            mapping_box.prop(tool, "mirror_urls")
+            
+            # 加载本地文件按钮
+            mapping_box.operator("bone_rename.load_local_mapping", text="加载本地映射库", icon='FILE_FOLDER')
+            
+            # 叠加层：从上到下优先级递增
+            self.draw_mapping_layers(mapping_box, tool)
+            
+            # 文件路径
+            if file_exists:
+                cache_path = get_cache_path()
+                mapping_box.label(text="本地文件路径:", icon='FILE_TICK')
+                mapping_box.label(text=cache_path)
+        else:
+            # 简略显示 - 只显示版本和更新日期
+            if last_updated_info:
+                row = mapping_box.row()
+                row.label(text=f"版本: {version_info} | 更新: {last_updated_info}", icon='INFO')
+            else:
+                row = mapping_box.row()
+                row.label(text=f"版本: {version_info}", icon='INFO')
+        
+        # 选项设置
+        options_box = layout.box()
+        options_box.label(text="选项:")
+        options_box.prop(tool, "rename_fingers", text="处理手指骨骼")
+        options_box.prop(tool, "bulk_rename", text="批量重命名")
+        options_box.prop(tool, "unique_assignment", text="一一对应")
+        options_box.prop(tool, "hierarchy_matching", text="沿骨骼层级匹配")
+        options_box.prop(tool, "spatial_fallback", text="按位置匹配未识别的骨骼")
+        row = options_box.row()
+        row.prop(tool, "use_match_cache", text="匹配缓存")
+        row.operator("bone_rename.clear_match_cache", text="清空缓存", icon='TRASH')
+        
+        # 性能记录
+        profile_box = layout.box()
+        row = profile_box.row()
+        row.prop(tool, "profile_enabled", text="记录性能数据")
+        if tool.profile_enabled:
+            row.prop(tool, "profile_cprofile", text="cProfile")
+        for name, title in (("preview", "预览"), ("execute", "执行")):
+            profiler = last_profiles.get(name)
+            if profiler is not None:
+                profile_box.label(text=f"{title}: {format_profile(profiler)}", icon='TIME')
+        if last_profiles:
+            profile_box.operator("bone_rename.dump_profile", text="导出性能记录", icon='EXPORT')
+        
+        # 操作按钮
+        row = layout.row()
+        row.operator("bone_rename.preview_rename", text="预览重命名")
+        row.operator("bone_rename.clear_results", text="清空", icon='X')
+        
+        # 执行按钮（仅在预览后显示）
+        if tool.has_preview:
+            layout.operator("bone_rename.execute_rename", text="执行重命名", icon='CHECKMARK')
+        
+        # 批量处理
+        batch_box = layout.box()
+        batch_box.label(text="批量处理 (以角色1为参考):")
+        batch_box.prop(tool, "batch_source", text="目标")
+        if tool.batch_source == 'COLLECTION':
+            batch_box.prop(tool, "batch_collection", text="集合")
+        batch_box.operator("bone_rename.batch_rename", text="批量重命名", icon='GROUP_BONE')
+        
+        # 结果显示部分
+        if tool.match_results:
+            result_box = layout.box()
+            result_box.label(text=f"匹配结果: {tool.matched_count} 个骨骼将重命名")
+            if tool.conflict_count:
+                result_box.label(text=f"{tool.conflict_count} 个骨骼争用同一参考骨骼而落选", icon='ERROR')
+            
+            # 列表只绘制可见的行，过滤和排序在列表下方的过滤选项中设置
+            result_box.template_list("BONE_RENAME_UL_match_results", "", tool, "match_results",
+                                     tool, "active_result_index", rows=tool.result_rows)
+    
+    def draw_mapping_layers(self, layout, tool):
+        """显示映射库叠加层列表"""
+        layout.label(text="叠加层 (靠下的优先):", icon='RENDERLAYERS')
+        for index, layer in enumerate(tool.mapping_layers):
+            layer_name = get_layer_display_name(layer)
+            row = layout.row(align=True)
+            row.prop(layer, "enabled", text="")
+            row.prop(layer, "name", text="")
+            
+            error = mapping_layer_errors.get(layer_name)
+            cached = mapping_layer_files.get(bpy.path.abspath(layer.filepath))
+            if error:
+                row.label(text="加载失败", icon='ERROR')
+            elif cached is not None:
+                row.label(text=cached[1].get("version", "未知版本"))
+            
+            operator = row.operator("bone_rename.move_mapping_layer", text="", icon='TRIA_UP')
+            operator.index = index
+            operator.direction = 'UP'
+            operator = row.operator("bone_rename.move_mapping_layer", text="", icon='TRIA_DOWN')
+            operator.index = index
+            operator.direction = 'DOWN'
+            row.operator("bone_rename.remove_mapping_layer", text="", icon='X').index = index
+        layout.operator("bone_rename.add_mapping_layer", text="添加叠加层", icon='ADD')
+
+class BoneRenameProperties(bpy.types.PropertyGroup):
+    """工具属性"""
+    character1: bpy.props.PointerProperty(
+        name="角色1",
+        description="参考骨骼的角色",
+        type=bpy.types.Object,
+        poll=lambda self, obj: obj.type == 'ARMATURE'
+    )
+    
+    character2: bpy.props.PointerProperty(
+        name="角色2",
+        description="要重命名的角色",
+        type=bpy.types.Object,
+        poll=lambda self, obj: obj.type == 'ARMATURE'
+    )
+    
+    rename_fingers: bpy.props.BoolProperty(
+        name="处理手指骨骼",
+        description="是否处理手指骨骼",
+        default=False
+    )
+    
+    batch_source: bpy.props.EnumProperty(
+        name="批量目标",
+        description="批量重命名时处理哪些骨架",
+        items=[
+            ('SELECTED', "选中的骨架", "处理当前选中的所有骨架"),
+            ('COLLECTION', "集合", "处理指定集合中的所有骨架"),
+        ],
+        default='SELECTED'
+    )
+    
+    batch_collection: bpy.props.PointerProperty(
+        name="目标集合",
+        description="批量重命名的目标骨架所在集合",
+        type=bpy.types.Collection
+    )
+    
+    bulk_rename: bpy.props.BoolProperty(
+        name="批量重命名",
+        description="一次性规划全部重命名，避免链式重命名的名称冲突；关闭则逐个重命名",
+        default=True
+    )
+    
+    unique_assignment: bpy.props.BoolProperty(
+        name="一一对应",
+        description="多个骨骼匹配到同一个参考骨骼时，按区域和侧别分组求最优的一一对应分配，落选的骨骼保持原名",
+        default=True
+    )
+    
+    hierarchy_matching: bpy.props.BoolProperty(
+        name="沿骨骼层级匹配",
+        description="名称未能匹配的骨骼从已匹配的父骨骼出发，只在对应参考骨骼的子骨骼中查找，"
+                    "可补全命名不规范的骨骼链（如手指各节）",
+        default=False
+    )
+    
+    spatial_fallback: bpy.props.BoolProperty(
+        name="按位置匹配未识别的骨骼",
+        description="映射库无法识别的骨骼（头发、裙摆、饰品等）按骨骼位置和父级关系匹配参考骨架中的骨骼，"
+                    "以名称匹配的骨骼对齐两个骨架的尺寸和朝向",
+        default=False
+    )
+    
+    use_match_cache: bpy.props.BoolProperty(
+        name="匹配缓存",
+        description="在配置目录中保存预览结果，映射库、两个骨架和选项相同时直接使用，"
+                    "参考骨架相同时复用逐骨骼的匹配结果",
+        default=True
+    )
+    
+    profile_enabled: bpy.props.BoolProperty(
+        name="记录性能数据",
+        description="记录预览和执行重命名的分阶段耗时、调用计数和骨骼数量，并输出到控制台",
+        default=False
+    )
+    
+    profile_cprofile: bpy.props.BoolProperty(
+        name="cProfile",
+        description="记录性能数据时同时采集 cProfile（会明显变慢），导出时另存为 .prof 文件",
+        default=False
+    )
+    
+    show_mapping_details: bpy.props.BoolProperty(
+        name="显示映射库详情",
+        description="显示或隐藏映射库详细设置",
+        default=False
+    )
+    
+    mapping_version: bpy.props.StringProperty(
+        name="映射库版本",
+        description="骨骼名称映射库版本",
+        default=""
+    )
+    
+    mapping_last_updated: bpy.props.StringProperty(
+        name="映射库更新日期",
+        description="骨骼名称映射库最后更新日期",
+        default=""
+    )
+    
+    mapping_layers: bpy.props.CollectionProperty(
+        type=MappingLayer,
+        name="映射库叠加层",
+        description="叠加在基础库之上的映射库，靠后的优先"
+    )
+    
+    mirror_urls: bpy.props.StringProperty(
+        name="镜像地址",
+        description="映射库镜像地址，逗号分隔；同时请求，最先返回有效映射库的获胜。留空使用默认镜像（GitHub、jsDelivr）",
+        default=""
+    )
+    
+    download_timeout: bpy.props.FloatProperty(
+        name="下载超时(秒)",
+        description="同时请求各镜像时等待有效响应的最长时间",
+        default=DOWNLOAD_TIMEOUT,
+        min=1.0,
+        max=300.0
+    )
+    
+    match_results: bpy.props.CollectionProperty(
+        type=BoneMatchResult
+    )
+    
+    matched_count: bpy.props.IntProperty(
+        name="匹配数量",
+        default=0
+    )
+    
+    conflict_count: bpy.props.IntProperty(
+        name="冲突落选数量",
+        default=0
+    )
+    
+    has_preview: bpy.props.BoolProperty(
+        name="有预览",
+        default=False
+    )
+    
+    active_result_index: bpy.props.IntProperty(
+        name="当前结果",
+        default=0
+    )
+    
+    result_rows: bpy.props.IntProperty(
+        name="结果列表行数",
+        description="匹配结果列表默认显示的行数",
+        default=12,
+        min=3,
+        max=100
+    )
+    
+    results_revision: bpy.props.IntProperty(
+        name="结果版本",
+        description="匹配结果每次变化时递增，用于判断结果列表的过滤和排序缓存是否失效",
+        default=0
+    )
+
+def register():
+    register_start = time.perf_counter()
+    bpy.utils.register_class(BoneMatchResult)
+    bpy.utils.register_class(MappingLayer)
+    bpy.utils.register_class(BoneRenameProperties)
+    bpy.utils.register_class(BONE_RENAME_OT_download_mapping)
+    bpy.utils.register_class(BONE_RENAME_OT_reload_mapping)
+    bpy.utils.register_class(BONE_RENAME_OT_load_local_mapping)
+    bpy.utils.register_class(BONE_RENAME_OT_add_mapping_layer)
+    bpy.utils.register_class(BONE_RENAME_OT_remove_mapping_layer)
+    bpy.utils.register_class(BONE_RENAME_OT_move_mapping_layer)
+    bpy.utils.register_class(BONE_RENAME_OT_preview_rename)
+    bpy.utils.register_class(BONE_RENAME_OT_execute_rename)
+    bpy.utils.register_class(BONE_RENAME_OT_batch_rename)
+    bpy.utils.register_class(BONE_RENAME_OT_clear_results)
+    bpy.utils.register_class(BONE_RENAME_OT_clear_match_cache)
+    bpy.utils.register_class(BONE_RENAME_OT_dump_profile)
+    bpy.utils.register_class(BONE_RENAME_UL_match_results)
+    bpy.utils.register_class(BONE_RENAME_PT_main_panel)
+    
+    bpy.types.Scene.bone_rename_tool = bpy.props.PointerProperty(type=BoneRenameProperties)
+    
+    # 注册启动处理函数
+    bpy.app.handlers.load_post.append(load_handler)
+    
+    # 映射库在Blender启动完成后由定时器加载，首次使用时也会立即加载
+    global mapping_load_pending
+    mapping_load_pending = True
+    bpy.app.timers.register(deferred_load_mapping, first_interval=DEFERRED_LOAD_DELAY)
+    
+    print(f"骨骼重命名工具已启用，用时 {(time.perf_counter() - register_start) * 1000:.1f} ms")
+
+def unregister():
+    bpy.utils.unregister_class(BoneMatchResult)
+    bpy.utils.unregister_class(MappingLayer)
+    bpy.utils.unregister_class(BoneRenameProperties)
+    bpy.utils.unregister_class(BONE_RENAME_OT_download_mapping)
+    bpy.utils.unregister_class(BONE_RENAME_OT_reload_mapping)
+    bpy.utils.unregister_class(BONE_RENAME_OT_load_local_mapping)
+    bpy.utils.unregister_class(BONE_RENAME_OT_add_mapping_layer)
+    bpy.utils.unregister_class(BONE_RENAME_OT_remove_mapping_layer)
+    bpy.utils.unregister_class(BONE_RENAME_OT_move_mapping_layer)
+    bpy.utils.unregister_class(BONE_RENAME_OT_preview_rename)
+    bpy.utils.unregister_class(BONE_RENAME_OT_execute_rename)
+    bpy.utils.unregister_class(BONE_RENAME_OT_batch_rename)
+    bpy.utils.unregister_class(BONE_RENAME_OT_clear_results)
+    bpy.utils.unregister_class(BONE_RENAME_OT_clear_match_cache)
+    bpy.utils.unregister_class(BONE_RENAME_OT_dump_profile)
+    bpy.utils.unregister_class(BONE_RENAME_UL_match_results)
+    bpy.utils.unregister_class(BONE_RENAME_PT_main_panel)
+    
+    del bpy.types.Scene.bone_rename_tool
+    
+    # 移除启动处理函数
+    bpy.app.handlers.load_post.remove(load_handler)
+    
+    result_filter_cache.clear()
+    reference_index_cache.clear()
+    preview_states.clear()
+    last_profiles.clear()
+    mapping_layer_files.clear()
+    mapping_layer_errors.clear()
+    
+    # 停止延迟加载和后台下载的定时器
+    if bpy.app.timers.is_registered(deferred_load_mapping):
+        bpy.app.timers.unregister(deferred_load_mapping)
+    if bpy.app.timers.is_registered(poll_download_task):
+        bpy.app.timers.unregister(poll_download_task)
+
+# ---------------------------------------------------------------------------
+# 命令行批量处理: blender -b --python BoneRename/cli.py -- --reference 参考.blend --input 目录
+# 主进程读取参考骨架后，把目录中的 .blend/.fbx 文件分配给多个后台 Blender 子进程处理
+# ---------------------------------------------------------------------------
+
+BATCH_FILE_EXTENSIONS = (".blend", ".fbx")
+# 命令行入口脚本，子进程也通过它启动
+CLI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+
+def parse_cli_args(argv):
+    """解析 "--" 之后的命令行参数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog="blender -b --python BoneRename/cli.py --",
+        description="按参考骨架的命名规范批量重命名目录中 .blend/.fbx 文件的骨骼"
+    )
+    parser.add_argument("--reference", help="参考骨架所在的 .blend/.fbx 文件")
+    parser.add_argument("--input", help="待处理文件所在目录")
+    parser.add_argument("--output", help="输出目录（默认: 输入目录下的 renamed 子目录）")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="并行的 Blender 子进程数量")
+    parser.add_argument("--report", help="JSON 报告路径（默认: 输出目录下的 report.json）")
+    parser.add_argument("--mapping", help="骨骼映射库 JSON（默认: 本地缓存的映射库）")
+    parser.add_argument("--layer", action="append", default=[], help="叠加在映射库之上的映射库 JSON，可重复指定，靠后的优先")
+    parser.add_argument("--fingers", action="store_true", help="同时处理手指骨骼")
+    parser.add_argument("--allow-shared", action="store_true", help="不做一一对应分配，允许多个骨骼匹配到同一个参考骨骼")
+    parser.add_argument("--timeout", type=float, default=600.0, help="单个文件的处理超时（秒）")
+    # 以下参数由主进程传给子进程
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--reference-names", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    
+    args = parser.parse_args(argv)
+    if not args.worker and (not args.reference or not args.input):
+        parser.error("需要同时指定 --reference 和 --input")
+    # 输出到输入目录会用重命名后的文件覆盖原始文件
+    if not args.worker and args.output and is_same_directory(args.output, args.input):
+        parser.error("--output 不能是输入目录，否则会覆盖原始文件")
+    return args
+
+def is_same_directory(path, other):
+    """两个路径是否指向同一目录（解析符号链接，忽略大小写不敏感文件系统上的大小写差异）"""
+    return (os.path.normcase(os.path.realpath(os.path.abspath(path)))
+            == os.path.normcase(os.path.realpath(os.path.abspath(other))))
+
+def load_mapping_file(file_path, layer_paths=()):
+    """从指定文件加载映射库并叠加 layer_paths 中的映射库（命令行模式使用）"""
+    global bone_mapping_data, version_info, last_updated_info, mapping_load_pending, active_mapping_layers
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = parse_mapping_text(f.read())
+    check_mapping_data(data)
+    
+    bone_mapping_data = data
+    mapping_load_pending = False
+    active_mapping_layers = [(os.path.splitext(os.path.basename(path))[0], path) for path in layer_paths]
+    compile_bone_mapping()
+    if mapping_layer_errors:
+        raise ValueError("; ".join(f"{name}: {message}" for name, message in mapping_layer_errors.items()))
+    version_info = bone_mapping_data.get("version", "未知版本")
+    last_updated_info = bone_mapping_data.get("last_updated", "")
+
+def open_scene_file(file_path):
+    """在后台 Blender 中打开 .blend 或导入 .fbx"""
+    if file_path.lower().endswith(".fbx"):
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+        bpy.ops.import_scene.fbx(filepath=file_path)
+    else:
+        bpy.ops.wm.open_mainfile(filepath=file_path)
+
+def save_scene_file(file_path):
+    """保存处理后的文件，格式与输入相同"""
+    if file_path.lower().endswith(".fbx"):
+        bpy.ops.export_scene.fbx(filepath=file_path, add_leaf_bones=False)
+    else:
+        bpy.ops.wm.save_as_mainfile(filepath=file_path, copy=True)
+
+def get_scene_armatures():
+    """获取当前文件中的骨架（共享同一骨架数据的对象只返回一个）"""
+    armatures = []
+    seen_data = set()
+    for obj in bpy.data.objects:
+        if obj.type == 'ARMATURE' and obj.data not in seen_data:
+            seen_data.add(obj.data)
+            armatures.append(obj)
+    return armatures
+
+def run_batch_worker(args):
+    """子进程：处理单个文件并写入JSON结果"""
+    start = time.perf_counter()
+    result = {"file": args.worker, "status": "ok", "armatures": []}
+    
+    try:
+        load_mapping_file(args.mapping, args.layer)
+        with open(args.reference_names, 'r', encoding='utf-8') as f:
+            reference_index = bone_library.reference_index(json.load(f))
+        
+        open_scene_file(args.worker)
+        for armature in get_scene_armatures():
+            target_names = [bone.name for bone in armature.data.bones]
+            
+            # 与预览和执行重命名相同的匹配和批量重命名逻辑
+            matches = bone_library.match_names(reference_index, target_names, args.fingers)
+            lost = {}
+            if not args.allow_shared:
+                matches, lost = reference_index.assign_unique(matches)
+            rename_map = {original_name: matched_name for original_name, matched_name, score, _, _ in matches if score > 0}
+            renamed_count, conflicts, _ = apply_bone_renames(armature, rename_map)
+            
+            result["armatures"].append({
+                "name": armature.name,
+                "bones": len(target_names),
+                "matched": len(rename_map),
+                "renamed": renamed_count,
+                "renames": rename_map,
+                "conflicts": [list(conflict) for conflict in conflicts],
+                "assignment_lost": lost,
+            })
+        
+        output_path = os.path.join(args.output, os.path.basename(args.worker))
+        save_scene_file(output_path)
+        result["output"] = output_path
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {str(e)}"
+    
+    result["elapsed"] = time.perf_counter() - start
+    with open(args.result, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False)
+    
+    return 0 if result["status"] == "ok" else 1
+
+def run_worker_process(file_path, args, mapping_path, reference_names_path, result_path):
+    """启动一个后台 Blender 子进程处理单个文件，失败时返回错误记录而不抛出异常"""
+    import subprocess
+    
+    command = [
+        bpy.app.binary_path, "-b", "--factory-startup", "--python-exit-code", "1",
+        "--python", CLI_SCRIPT, "--",
+        "--worker", file_path,
+        "--reference-names", reference_names_path,
+        "--mapping", mapping_path,
+        "--output", args.output,
+        "--result", result_path,
+    ]
+    if args.fingers:
+        command.append("--fingers")
+    if args.allow_shared:
+        command.append("--allow-shared")
+    for layer_path in args.layer:
+        command.extend(["--layer", layer_path])
+    
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, errors='replace', timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return {"file": file_path, "status": "error", "error": f"处理超时 ({args.timeout:.0f} 秒)",
+                "elapsed": time.perf_counter() - start}
+    except OSError as e:
+        return {"file": file_path, "status": "error", "error": f"无法启动 Blender: {str(e)}",
+                "elapsed": time.perf_counter() - start}
+    
+    try:
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # 子进程在写入结果前崩溃，保留输出的末尾便于排查
+        output = (process.stdout or "") + (process.stderr or "")
+        return {"file": file_path, "status": "error", "returncode": process.returncode,
+                "error": "子进程未生成结果", "log": output[-2000:],
+                "elapsed": time.perf_counter() - start}
+
+def run_batch_cli(args):
+    """主进程：读取参考骨架，用子进程池处理目录中的所有文件，写入汇总报告"""
+    import tempfile
+    import shutil
+    from concurrent.futures import ThreadPoolExecutor
+    
+    start = time.perf_counter()
+    args.output = os.path.abspath(args.output or os.path.join(args.input, "renamed"))
+    report_path = args.report or os.path.join(args.output, "report.json")
+    os.makedirs(args.output, exist_ok=True)
+    
+    mapping_path = os.path.abspath(args.mapping or get_cache_path())
+    args.layer = [os.path.abspath(path) for path in args.layer]
+    load_mapping_file(mapping_path, args.layer)
+    
+    # 参考骨架只在主进程读取一次，骨骼名称通过临时文件传给子进程
+    open_scene_file(os.path.abspath(args.reference))
+    armatures = get_scene_armatures()
+    if not armatures:
+        print(f"参考文件中没有骨架: {args.reference}")
+        return 1
+    reference = max(armatures, key=lambda obj: len(obj.data.bones))
+    
+    files = sorted(
+        os.path.join(os.path.abspath(args.input), name)
+        for name in os.listdir(args.input)
+        if name.lower().endswith(BATCH_FILE_EXTENSIONS)
+    )
+    
+    work_dir = tempfile.mkdtemp(prefix="bone_rename_")
+    try:
+        reference_names_path = os.path.join(work_dir, "reference.json")
+        with open(reference_names_path, 'w', encoding='utf-8') as f:
+            json.dump([bone.name for bone in reference.data.bones], f, ensure_ascii=False)
+        
+        jobs = max(1, args.jobs)
+        print(f"批量处理 {len(files)} 个文件，参考骨架 {reference.name}，{jobs} 个子进程")
+        
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(run_worker_process, file_path, args, mapping_path, reference_names_path,
+                                os.path.join(work_dir, f"result_{index}.json"))
+                for index, file_path in enumerate(files)
+            ]
+            results = []
+            for future in futures:
+                result = future.result()
+                results.append(result)
+                status = "完成" if result["status"] == "ok" else f"失败: {result.get('error', '')}"
+                print(f"[{len(results)}/{len(files)}] {os.path.basename(result['file'])} {status}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    failed = [result for result in results if result["status"] != "ok"]
+    report = {
+        "reference": os.path.abspath(args.reference),
+        "reference_armature": reference.name,
+        "library_version": version_info,
+        "jobs": jobs,
+        "files": results,
+        "summary": {
+            "total": len(results),
+            "succeeded": len(results) - len(failed),
+            "failed": len(failed),
+            "renamed_bones": sum(armature["renamed"] for result in results for armature in result.get("armatures", [])),
+            "elapsed": time.perf_counter() - start,
+        },
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    print(f"批量处理完成: 成功 {len(results) - len(failed)}，失败 {len(failed)}，报告: {report_path}")
+    return 1 if failed else 0
+
+def run_cli(argv):
+    """命令行入口"""
+    args = parse_cli_args(argv)
+    if args.worker:
+        return run_batch_worker(args)
+    return run_batch_cli(args)
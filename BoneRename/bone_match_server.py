@@ -0,0 +1,329 @@
+"""常驻骨骼匹配服务（不依赖 bpy）
+
+启动时加载并编译一次映射库，之后按行读取 JSON 请求（NDJSON），每个请求处理完立即写回一行结果，
+适合资产流水线批量处理大量骨架时调用：
+    
+    python -m BoneRename.bone_match_server --mapping 骨骼.json             # 标准输入/输出
+    python -m BoneRename.bone_match_server --socket /tmp/bone_match.sock   # 本地 Unix 套接字
+    python -m BoneRename.bone_match_server --port 8765                     # 本机 TCP 端口
+
+（在仓库根目录，或插件包所在目录中运行；包的 __init__ 在没有 bpy 时不会加载插件界面）
+
+请求: {"id": 1, "reference": ["Hips", ...], "target": ["pelvis", ...], "options": {"include_fingers": true, "unique": true}}
+结果: {"id": 1, "mapping": {"pelvis": "Hips", ...}, "library_version": "...", "elapsed_ms": 0.8}
+      unique 为 true 时每个参考骨骼最多分配给一个目标骨骼，落选的骨骼列在 "lost" 中
+控制命令: {"command": "stats"} 返回吞吐量和延迟分位数，{"command": "reload"} 立即重新加载映射库
+
+映射库文件发生变化时自动重新加载并原子替换，加载失败时继续使用旧的映射库。
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+
+from .bone_matcher import load_library
+
+# 默认映射库路径（仓库根目录的 骨骼.json）
+DEFAULT_MAPPING_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "骨骼.json")
+
+# 单个请求行的最大长度（字节），超过时返回错误并丢弃该行，避免占用无限内存
+MAX_REQUEST_SIZE = 4 * 1024 * 1024
+
+# 参考骨架索引缓存容量：流水线通常反复使用少数几个参考骨架
+REFERENCE_CACHE_SIZE = 16
+
+# 延迟统计窗口：只保留最近的若干个请求的延迟
+LATENCY_WINDOW = 10000
+
+# 检查映射库文件是否变化的最小间隔（秒）
+WATCH_INTERVAL = 1.0
+
+class RequestStats:
+    """请求计数、吞吐量和最近请求的延迟分位数"""
+    
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+    
+    def record(self, elapsed, ok=True):
+        with self.lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self.latencies.append(elapsed)
+    
+    @staticmethod
+    def _percentile(ordered, fraction):
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return ordered[index]
+    
+    def summary(self):
+        """返回统计信息（延迟单位为毫秒）"""
+        with self.lock:
+            ordered = sorted(self.latencies)
+            requests = self.requests
+            errors = self.errors
+        uptime = time.perf_counter() - self.started
+        return {
+            "requests": requests,
+            "errors": errors,
+            "uptime_s": round(uptime, 3),
+            "requests_per_second": round(requests / uptime, 2) if uptime > 0 else 0.0,
+            "latency_ms": {
+                "p50": round(self._percentile(ordered, 0.50) * 1000, 3),
+                "p90": round(self._percentile(ordered, 0.90) * 1000, 3),
+                "p99": round(self._percentile(ordered, 0.99) * 1000, 3),
+                "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+                "window": len(ordered),
+            },
+        }
+
+class MatchService:
+    """持有已编译的映射库，处理请求并在映射库文件变化时热替换"""
+    
+    def __init__(self, mapping_path, watch_interval=WATCH_INTERVAL):
+        self.mapping_path = mapping_path
+        self.watch_interval = watch_interval
+        self.stats = RequestStats()
+        # 匹配过程会修改名称标准化缓存和参考索引缓存，多个连接同时请求时串行执行
+        self.lock = threading.Lock()
+        # 检查文件和重新加载只允许一个线程进行，加载期间其他请求继续使用旧的映射库
+        self.reload_lock = threading.Lock()
+        self.library = None
+        self.file_state = None
+        self.last_check = 0.0
+        self.reference_cache = OrderedDict()
+        self.reload()
+    
+    def get_file_state(self):
+        try:
+            stat = os.stat(self.mapping_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def reload(self):
+        """重新加载映射库，成功后原子替换；失败时抛出异常并保留旧的映射库"""
+        with self.reload_lock:
+            return self._load()
+    
+    def _load(self):
+        """加载映射库并替换当前的映射库，调用方持有 reload_lock"""
+        file_state = self.get_file_state()
+        library = load_library(self.mapping_path)
+        with self.lock:
+            # 复用旧的名称标准化缓存（内容相同时结果不变）
+            if self.library is not None and self.library.signature == library.signature:
+                library.cache = self.library.cache
+            else:
+                self.reference_cache.clear()
+            self.library = library
+            self.file_state = file_state
+        log(f"已加载映射库 {self.mapping_path} 版本: {library.version}")
+        return library
+    
+    def check_for_update(self):
+        """映射库文件变化时热替换（最多每 watch_interval 秒检查一次）
+        
+        另一个线程正在检查或重新加载时直接返回，不排队等待，同一次文件变化只加载一次
+        """
+        if not self.reload_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now - self.last_check < self.watch_interval:
+                return
+            self.last_check = now
+            
+            file_state = self.get_file_state()
+            if file_state is None or file_state == self.file_state:
+                return
+            try:
+                self._load()
+            except Exception as e:
+                # 文件可能正在写入，记下状态避免反复报错，等下一次变化再加载
+                self.file_state = file_state
+                log(f"重新加载映射库失败，继续使用旧的映射库: {e}")
+        finally:
+            self.reload_lock.release()
+    
+    def get_reference_index(self, reference_names):
+        key = tuple(reference_names)
+        reference_index = self.reference_cache.get(key)
+        if reference_index is None:
+            reference_index = self.library.reference_index(reference_names)
+            self.reference_cache[key] = reference_index
+            if len(self.reference_cache) > REFERENCE_CACHE_SIZE:
+                self.reference_cache.popitem(last=False)
+        else:
+            self.reference_cache.move_to_end(key)
+        return reference_index
+    
+    def match(self, request):
+        reference_names = request.get("reference")
+        target_names = request.get("target")
+        if not isinstance(reference_names, list) or not isinstance(target_names, list):
+            raise ValueError("请求需要包含 reference 和 target 列表")
+        options = request.get("options") or {}
+        
+        with self.lock:
+            library = self.library
+            reference_index = self.get_reference_index(reference_names)
+            results = library.match_names(reference_index, target_names, options.get("include_fingers", False))
+            lost = {}
+            if options.get("unique"):
+                results, lost = reference_index.assign_unique(results)
+        
+        response = {
+            "mapping": {original_name: matched_name for original_name, matched_name, score, _, _ in results if score > 0},
+            "library_version": library.version,
+        }
+        if lost:
+            response["lost"] = lost
+        return response
+    
+    def handle_line(self, line):
+        """处理一行请求，返回一行结果（不含换行）"""
+        start = time.perf_counter()
+        self.check_for_update()
+        
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是 JSON 对象")
+            request_id = request.get("id")
+            
+            command = request.get("command")
+            if command == "stats":
+                response = {"stats": self.stats.summary()}
+            elif command == "reload":
+                library = self.reload()
+                response = {"library_version": library.version}
+            elif command is not None:
+                raise ValueError(f"未知命令: {command}")
+            else:
+                response = self.match(request)
+            ok = True
+        except Exception as e:
+            response = {"error": str(e)}
+            ok = False
+        
+        elapsed = time.perf_counter() - start
+        self.stats.record(elapsed, ok)
+        response["id"] = request_id
+        response["elapsed_ms"] = round(elapsed * 1000, 3)
+        return json.dumps(response, ensure_ascii=False)
+    
+    def serve_stream(self, reader, writer):
+        """逐行处理请求流，每个结果立即写回；reader/writer 为二进制流"""
+        while True:
+            line = reader.readline(MAX_REQUEST_SIZE + 1)
+            if not line:
+                break
+            if len(line) > MAX_REQUEST_SIZE and not line.endswith(b"\n"):
+                # 丢弃超长请求的剩余部分
+                while line and not line.endswith(b"\n"):
+                    line = reader.readline(MAX_REQUEST_SIZE)
+                response = json.dumps({"id": None, "error": f"请求超过 {MAX_REQUEST_SIZE} 字节"}, ensure_ascii=False)
+                self.stats.record(0.0, False)
+            else:
+                line = line.strip()
+                if not line:
+                    continue
+                response = self.handle_line(line.decode("utf-8", errors="replace"))
+            writer.write(response.encode("utf-8") + b"\n")
+            writer.flush()
+
+def log(message):
+    """日志写到标准错误，标准输出只用于结果"""
+    print(f"[bone_match_server] {message}", file=sys.stderr, flush=True)
+
+def start_stats_reporter(service, interval):
+    """定期把统计信息写到标准错误"""
+    def report():
+        while True:
+            time.sleep(interval)
+            log(json.dumps(service.stats.summary(), ensure_ascii=False))
+    
+    thread = threading.Thread(target=report, name="bone-match-stats", daemon=True)
+    thread.start()
+    return thread
+
+def serve_socket(service, socket_path=None, host="127.0.0.1", port=None):
+    """在本地 Unix 套接字或本机 TCP 端口上提供服务，每个连接一个线程"""
+    import socketserver
+    
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                service.serve_stream(self.rfile, self.wfile)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+    
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = socketserver.ThreadingUnixStreamServer(socket_path, RequestHandler)
+        log(f"监听 {socket_path}")
+    else:
+        server = socketserver.ThreadingTCPServer((host, port), RequestHandler)
+        log(f"监听 {host}:{server.server_address[1]}")
+    server.daemon_threads = True
+    
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def parse_args(argv):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="常驻骨骼匹配服务（NDJSON 请求/结果流）")
+    parser.add_argument("--mapping", default=DEFAULT_MAPPING_FILE, help="骨骼映射库 JSON（默认: 同目录下的 骨骼.json）")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--socket", help="监听的本地 Unix 套接字路径（默认使用标准输入/输出）")
+    group.add_argument("--port", type=int, help="监听的本机 TCP 端口")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP 监听地址（默认: 127.0.0.1）")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL, help="检查映射库变化的间隔（秒）")
+    parser.add_argument("--stats-interval", type=float, default=0, help="定期输出统计信息的间隔（秒，0 为不输出）")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        service = MatchService(args.mapping, args.watch_interval)
+    except Exception as e:
+        log(f"加载映射库失败: {e}")
+        return 1
+    
+    # 被终止时也要清理套接字文件并输出统计信息
+    import signal
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    if args.stats_interval > 0:
+        start_stats_reporter(service, args.stats_interval)
+    
+    try:
+        if args.socket or args.port is not None:
+            serve_socket(service, args.socket, args.host, args.port)
+        else:
+            service.serve_stream(sys.stdin.buffer, sys.stdout.buffer)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log(json.dumps(service.stats.summary(), ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
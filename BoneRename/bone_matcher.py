@@ -0,0 +1,1776 @@
+"""骨骼名称匹配核心（不依赖 bpy）
+
+包含骨骼名称解析、映射库索引、参考骨架匹配、批量重命名规划和映射库的下载与增量更新，
+可以在普通 CPython 中导入、测试、性能分析，或在其他进程中使用：
+    
+    from BoneRename.bone_matcher import BoneLibrary
+    library = BoneLibrary(json.load(open("骨骼.json", encoding="utf-8")))
+    mapping = library.match(reference_names, target_names, {"include_fingers": True})
+
+Blender 插件（BoneRename/addon.py）中的操作只是对这里的接口的简单封装。
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+import hashlib
+import itertools
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# 名称标准化缓存容量
+NORMALIZATION_CACHE_SIZE = 8192
+
+# 一一分配时原始名称相似度的权重，只用于区分得分相同的候选
+ASSIGNMENT_TIE_WEIGHT = 0.001
+
+# 位置匹配：每次查找的最近邻数量，以及可接受的最大距离（相对参考骨架尺寸）
+SPATIAL_NEIGHBOURS = 8
+SPATIAL_MAX_DISTANCE = 0.05
+# 锚点不足、按主轴对齐朝向时，用于评估每种候选朝向的目标骨骼数量上限
+SPATIAL_ORIENTATION_SAMPLES = 64
+
+# 层级匹配：名称相似度（字符或词元）至少达到该值才作为候选；
+# 同一组子骨骼分配后双方都只剩一个时按骨骼链延续匹配的得分
+HIERARCHY_MIN_NAME_SCORE = 0.5
+HIERARCHY_CHAIN_SCORE = 0.5
+
+# 拆分名称词元：驼峰单词、全大写缩写、非 ASCII 连续字符
+NAME_WORD_PATTERN = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|[^\x00-\x7f]+')
+
+# 骨骼名称中的分隔符，以及按 (前导分隔符, 词元) 拆分名称的模式
+NAME_DELIMITERS = "._- "
+NAME_TOKEN_PATTERN = re.compile(r'([\._\- ]*)([^\._\- ]+)')
+
+class BoneNameParser:
+    """骨骼名称解析器：加载映射库时按侧别标识建好查找表，之后单次扫描即可拆出基础名称、侧别和数字后缀"""
+    
+    def __init__(self, side_identifiers):
+        # 小写词元 -> [(优先级, 侧别, 前导分隔符, 小写词元)]，优先级即原先逐个尝试的顺序（先右后左）
+        self.word_index = {}
+        # 无法表示为“分隔符前缀 + 单个词元”的标识符，按原逻辑使用预编译的正则
+        self.regex_identifiers = []
+        
+        order = 0
+        for side, key in (('RIGHT', 'right'), ('LEFT', 'left')):
+            for identifier in side_identifiers.get(key, []):
+                word = identifier.lstrip(NAME_DELIMITERS)
+                prefix = identifier[:len(identifier) - len(word)]
+                if word and not any(c in NAME_DELIMITERS for c in word):
+                    entry = (order, side, prefix, word.lower())
+                    self.word_index.setdefault(word.lower(), []).append(entry)
+                else:
+                    pattern = re.compile(r'(^|[\._\- ])' + re.escape(identifier) + r'([\._\- ]|$)', re.IGNORECASE)
+                    self.regex_identifiers.append((order, side, pattern))
+                order += 1
+    
+    def snapshot(self):
+        """导出为只含内置类型的数据，用于写入预编译快照"""
+        return {
+            "word_index": self.word_index,
+            "regex_identifiers": [(order, side, pattern.pattern) for order, side, pattern in self.regex_identifiers],
+        }
+    
+    @classmethod
+    def from_snapshot(cls, state):
+        """从预编译快照恢复"""
+        parser = cls.__new__(cls)
+        parser.word_index = state["word_index"]
+        parser.regex_identifiers = [(order, side, re.compile(pattern, re.IGNORECASE))
+                                    for order, side, pattern in state["regex_identifiers"]]
+        return parser
+    
+    @staticmethod
+    def tokenize(name):
+        """将名称拆分为 [(前导分隔符, 词元)] 列表和末尾的分隔符"""
+        tokens = NAME_TOKEN_PATTERN.findall(name)
+        tail = name[len(name.rstrip(NAME_DELIMITERS)):] if tokens else name
+        return tokens, tail
+    
+    @staticmethod
+    def _identifier_matches(delims, prefix, is_first, consumed):
+        """判断词元前的分隔符能否构成 (^|分隔符) + 前缀 的边界
+        
+        consumed 表示上一个词元刚被移除，其后的第一个分隔符已被正则匹配占用
+        """
+        if prefix and not delims.endswith(prefix):
+            return False
+        available = len(delims) - len(prefix) - (1 if consumed else 0)
+        return available >= 1 or (is_first and delims == prefix)
+    
+    def parse(self, name):
+        """返回 (基础名称, 侧别, 数字后缀)"""
+        tokens, tail = self.tokenize(name)
+        
+        # 找出优先级最高的侧别标识
+        best = None
+        for i, (delims, word) in enumerate(tokens):
+            for entry in self.word_index.get(word.lower(), ()):
+                if (best is None or entry[0] < best[0]) and self._identifier_matches(delims, entry[2], i == 0, False):
+                    best = entry
+        
+        best_pattern = None
+        for order, side, pattern in self.regex_identifiers:
+            if best is not None and order > best[0]:
+                break
+            if pattern.search(name):
+                best, best_pattern = (order, side, None, None), pattern
+                break
+        
+        side = None
+        base_name = name
+        if best_pattern is not None:
+            base_name = best_pattern.sub(r'\1\2', name).strip(NAME_DELIMITERS)
+            side = best[1]
+        elif best is not None:
+            # 与 re.sub 相同：从左到右移除所有不重叠的匹配，保留两侧的分隔符
+            _, side, prefix, key = best
+            parts = []
+            consumed = False
+            for i, (delims, word) in enumerate(tokens):
+                if word.lower() == key and self._identifier_matches(delims, prefix, i == 0, consumed):
+                    parts.append(delims[:len(delims) - len(prefix)])
+                    consumed = True
+                else:
+                    parts.append(delims)
+                    parts.append(word)
+                    consumed = False
+            parts.append(tail)
+            base_name = ''.join(parts).strip(NAME_DELIMITERS)
+        elif tokens and not tail and tokens[-1][0] and tokens[-1][1].lower() in ('l', 'r'):
+            # 未检测到侧别标识时，检查名称末尾的单字母侧别
+            side = 'LEFT' if tokens[-1][1].lower() == 'l' else 'RIGHT'
+            base_name = name[:-2].strip(NAME_DELIMITERS)
+        
+        # 移除数字后缀
+        end = len(base_name)
+        while end and (base_name[end - 1] in '_.-' or base_name[end - 1].isdecimal()):
+            end -= 1
+        suffix = base_name[end:].strip(NAME_DELIMITERS)
+        base_name = base_name[:end].strip(NAME_DELIMITERS)
+        
+        return base_name, side, suffix
+
+class MultiPatternMatcher:
+    """Aho-Corasick 多模式子串匹配：一次扫描找出文本中包含的所有模式，返回其中优先级最高的一个"""
+    
+    def __init__(self, patterns):
+        # patterns: {模式: 负载}，负载按元组比较大小，越小优先级越高
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+        
+        for pattern, payload in patterns.items():
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                state = next_state
+            self.output[state] = self._better(self.output[state], payload)
+        
+        # 广度优先建立失配链接，并把失配链上的输出合并到当前状态
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self._better(self.output[next_state], self.output[self.fail[next_state]])
+                queue.append(next_state)
+    
+    def snapshot(self):
+        """导出为只含内置类型的数据，用于写入预编译快照"""
+        return {"goto": self.goto, "fail": self.fail, "output": self.output}
+    
+    @classmethod
+    def from_snapshot(cls, state):
+        """从预编译快照恢复"""
+        matcher = cls.__new__(cls)
+        matcher.goto = state["goto"]
+        matcher.fail = state["fail"]
+        matcher.output = state["output"]
+        return matcher
+    
+    @staticmethod
+    def _better(a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return min(a, b)
+    
+    def search(self, text):
+        """返回文本中出现的优先级最高的模式负载，没有则返回 None"""
+        goto, fail, output = self.goto, self.fail, self.output
+        best = output[0]
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                best = self._better(best, output[state])
+        return best
+
+class BoneMappingIndex:
+    """映射库的预编译索引：变体名称哈希查找，手指区域的“包含标准名称”规则使用多模式自动机
+    
+    查找结果与按区域、标准名称顺序逐个比较完全一致：同时命中多条规则时，库中位置靠前的获胜
+    """
+    
+    def __init__(self, bone_regions):
+        # 小写变体 -> (库中位置, 标准名称, 区域)
+        self.variants = {}
+        # 标准名称 -> 区域
+        self.standard_regions = {}
+        # 被多个标准名称声明的变体: 小写变体 -> [(区域, 标准名称)]
+        self.conflicts = {}
+        
+        finger_patterns = {}
+        position = 0
+        for region_name, region_data in bone_regions.items():
+            for standard_name, variants in region_data.get("bones", {}).items():
+                self.standard_regions.setdefault(standard_name, region_name)
+                entry = (position, standard_name, region_name)
+                
+                for variant in variants:
+                    key = sys.intern(variant.lower())
+                    existing = self.variants.get(key)
+                    if existing is None:
+                        self.variants[key] = entry
+                    elif existing[1:] != entry[1:]:
+                        owners = self.conflicts.setdefault(key, [(existing[2], existing[1])])
+                        if (region_name, standard_name) not in owners:
+                            owners.append((region_name, standard_name))
+                
+                # 对于手指骨骼，名称中包含标准名称即视为匹配
+                if region_name == "fingers":
+                    finger_patterns.setdefault(standard_name.lower(), entry)
+                
+                position += 1
+        
+        self.first_finger_position = min((entry[0] for entry in finger_patterns.values()), default=None)
+        self.finger_matcher = MultiPatternMatcher(finger_patterns) if finger_patterns else None
+    
+    def snapshot(self):
+        """导出为只含内置类型的数据，用于写入预编译快照"""
+        return {
+            "variants": self.variants,
+            "standard_regions": self.standard_regions,
+            "conflicts": self.conflicts,
+            "first_finger_position": self.first_finger_position,
+            "finger_matcher": self.finger_matcher.snapshot() if self.finger_matcher else None,
+        }
+    
+    @classmethod
+    def from_snapshot(cls, state):
+        """从预编译快照恢复"""
+        index = cls.__new__(cls)
+        index.variants = state["variants"]
+        index.standard_regions = state["standard_regions"]
+        index.conflicts = state["conflicts"]
+        index.first_finger_position = state["first_finger_position"]
+        finger_state = state["finger_matcher"]
+        index.finger_matcher = MultiPatternMatcher.from_snapshot(finger_state) if finger_state else None
+        return index
+    
+    def lookup(self, base_name):
+        """返回 (标准名称, 区域)，未找到返回 None"""
+        lower_name = base_name.lower()
+        best = self.variants.get(lower_name)
+        
+        # 只有手指规则可能比变体命中更靠前时才需要扫描
+        if self.finger_matcher is not None and (best is None or self.first_finger_position < best[0]):
+            finger_match = self.finger_matcher.search(lower_name)
+            if finger_match is not None and (best is None or finger_match[0] < best[0]):
+                best = finger_match
+        
+        if best is None:
+            return None
+        return best[1], best[2]
+    
+    def region_of(self, standard_name):
+        """获取标准名称所在区域，不在库中返回 None"""
+        return self.standard_regions.get(standard_name)
+
+class NormalizationCache:
+    """有容量上限的名称标准化结果缓存（LRU淘汰），记录命中与未命中次数"""
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+    
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self):
+        """返回缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+def get_mapping_signature(data):
+    """计算映射库的版本和内容哈希，用于判断缓存是否失效
+    
+    哈希区分键的顺序：区域和标准名称的顺序决定变体冲突和手指规则的归属，顺序不同的映射库结果也不同
+    """
+    if not data:
+        return None
+    content = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    version = data.get("version") if isinstance(data, dict) else None
+    return version, hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+class ReferenceBoneIndex:
+    """参考骨架的预处理结果：每个骨骼只标准化一次，精确匹配按 (标准名称, 侧别) 直接查表"""
+    
+    def __init__(self, library, source_names):
+        self.library = library
+        # [(骨骼名称, 标准名称, 侧别, 区域)]，保持原有顺序
+        self.entries = []
+        # (标准名称, 侧别) -> 第一个对应的参考骨骼名称
+        self.exact = {}
+        # 相似度匹配的候选 [(骨骼名称, 小写标准名称, 侧别)]：
+        # 小写标准名称和侧别都相同的骨骼得分相同，只有第一个可能胜出
+        self.similar_candidates = []
+        
+        seen = set()
+        for source_name in source_names:
+            source_standard, source_side, source_region = library.map_to_standard_name(source_name)
+            self.entries.append((source_name, source_standard, source_side, source_region))
+            self.exact.setdefault((source_standard, source_side), source_name)
+            
+            key = (source_standard.lower(), source_side)
+            if key not in seen:
+                seen.add(key)
+                self.similar_candidates.append((source_name, key[0], source_side))
+        
+        # 小写标准名称 -> 以其为 seq2 的 SequenceMatcher（seq2 的预处理结果可以复用）
+        self._matchers = {}
+        # (目标标准名称, 目标侧别) -> 相似度匹配结果
+        self._similar_results = {}
+        
+        # 调用计数和相似度匹配耗时，供性能分析使用
+        self.counters = {"find_match": 0, "exact_hits": 0, "find_similar": 0, "similar_cached": 0, "sequence_ratio": 0}
+        self.similar_seconds = 0.0
+    
+    def find_match(self, target_name, include_fingers=False):
+        """查找与目标骨骼最匹配的参考骨骼，返回 (名称, 相似度)"""
+        self.counters["find_match"] += 1
+        # 将目标名称映射到标准名称和侧别
+        target_standard, target_side, target_region = self.library.map_to_standard_name(target_name)
+        
+        # 如果不处理手指且目标骨骼是手指，直接返回
+        if not include_fingers and target_region == "fingers":
+            return None, 0
+        
+        # 首先尝试精确匹配：标准名称和侧别都相同
+        exact_match = self.exact.get((target_standard, target_side))
+        if exact_match is not None:
+            self.counters["exact_hits"] += 1
+            return exact_match, 1.0
+        
+        # 如果没有精确匹配，尝试相似度匹配
+        return self.find_similar(target_standard, target_side)
+    
+    def find_similar(self, target_standard, target_side):
+        """按标准名称相似度查找参考骨骼，结果只取决于目标的标准名称和侧别，因此按此缓存"""
+        self.counters["find_similar"] += 1
+        key = (target_standard, target_side)
+        result = self._similar_results.get(key)
+        if result is None:
+            start = time.perf_counter()
+            result = self._find_similar(target_standard.lower(), target_side)
+            self.similar_seconds += time.perf_counter() - start
+            self._similar_results[key] = result
+        else:
+            self.counters["similar_cached"] += 1
+        return result
+    
+    @staticmethod
+    def _side_weighted(score, same_side):
+        """如果侧别匹配，增加20%的相似度，但不超过1.0"""
+        return min(score * 1.2, 1.0) if same_side else score
+    
+    def _find_similar(self, target_lower, target_side):
+        from difflib import SequenceMatcher
+        
+        best_match = None
+        best_score = 0
+        target_length = len(target_lower)
+        
+        for source_name, source_lower, source_side in self.similar_candidates:
+            # 确保左右侧匹配
+            if target_side and source_side and target_side != source_side:
+                continue  # 侧别不匹配，跳过
+            
+            same_side = target_side == source_side
+            
+            # 最终只接受超过0.9的结果，且必须严格超过当前最佳才会替换，
+            # 所以上界达不到该阈值的候选可以跳过，不影响结果
+            threshold = max(best_score, 0.9)
+            
+            # 长度上界（与 real_quick_ratio 相同）
+            total_length = target_length + len(source_lower)
+            upper_bound = 2.0 * min(target_length, len(source_lower)) / total_length if total_length else 1.0
+            if self._side_weighted(upper_bound, same_side) <= threshold:
+                continue
+            
+            matcher = self._matchers.get(source_lower)
+            if matcher is None:
+                matcher = SequenceMatcher(None, "", source_lower)
+                self._matchers[source_lower] = matcher
+            matcher.set_seq1(target_lower)
+            
+            # 字符计数上界
+            if self._side_weighted(matcher.quick_ratio(), same_side) <= threshold:
+                continue
+            
+            # 计算标准名称的相似度
+            self.counters["sequence_ratio"] += 1
+            score = self._side_weighted(matcher.ratio(), same_side)
+            
+            if score > best_score and score > 0.8:  # 提高相似度阈值
+                best_score = score
+                best_match = source_name
+        
+        # 只有当相似度非常高时才返回匹配结果
+        if best_score > 0.9:  # 非常高的相似度阈值
+            return best_match, best_score
+        
+        return None, 0  # 没有找到合适的匹配
+    
+    def score_pair(self, target_standard, target_side, source_standard, source_side):
+        """按 find_match 的规则计算一对骨骼的得分：标准名称和侧别相同为1.0，
+        否则为加权相似度（侧别冲突或不超过0.9时为0）"""
+        if target_standard == source_standard and target_side == source_side:
+            return 1.0
+        if target_side and source_side and target_side != source_side:
+            return 0
+        from difflib import SequenceMatcher
+        
+        score = self._side_weighted(SequenceMatcher(None, target_standard.lower(), source_standard.lower()).ratio(),
+                                    target_side == source_side)
+        return score if score > 0.9 else 0
+    
+    def assign_unique(self, results):
+        """把贪心匹配结果调整为一一对应
+        
+        results 为 match_names 的结果。没有多个骨骼匹配到同一个参考骨骼时原样返回；
+        否则把涉及冲突的 (区域, 侧别) 分组（通过共同争夺的参考骨骼相连的分组合并）
+        作为一个整体，用匈牙利算法求得分总和最大的一一分配，得分相同时优先原始名称更相似的骨骼。
+        返回 (新结果, {落选的目标骨骼: 它原本匹配的参考骨骼})
+        """
+        claims = {}
+        for index, (bone_name, matched_name, score, region, side) in enumerate(results):
+            if score > 0:
+                claims.setdefault(matched_name, []).append(index)
+        contested = [indices for indices in claims.values() if len(indices) > 1]
+        if not contested:
+            return results, {}
+        
+        # 用并查集合并通过冲突相连的 (区域, 侧别) 分组
+        parent = {}
+        
+        def find(bucket):
+            parent.setdefault(bucket, bucket)
+            while parent[bucket] != bucket:
+                parent[bucket] = parent[parent[bucket]]
+                bucket = parent[bucket]
+            return bucket
+        
+        for indices in contested:
+            first = find(results[indices[0]][3:5])
+            for index in indices[1:]:
+                parent[find(results[index][3:5])] = first
+        
+        # 每个连通分组中所有已匹配的目标骨骼
+        groups = {}
+        for index, (bone_name, matched_name, score, region, side) in enumerate(results):
+            if score > 0 and (region, side) in parent:
+                groups.setdefault(find((region, side)), []).append(index)
+        
+        # 参考骨骼: 名称 -> (标准名称, 侧别, 区域)
+        references = {}
+        for source_name, source_standard, source_side, source_region in self.entries:
+            references.setdefault(source_name, (source_standard, source_side, source_region))
+        
+        from difflib import SequenceMatcher
+        
+        new_results = list(results)
+        lost = {}
+        for root, target_indices in groups.items():
+            members = set(target_indices)
+            buckets = {bucket for bucket in parent if find(bucket) == root}
+            # 候选参考骨骼：同组分组中的参考骨骼和组内目标骨骼原本匹配的参考骨骼，
+            # 排除组外目标骨骼已经匹配的参考骨骼（组外没有冲突，保持不变）
+            claimed_outside = {matched_name for matched_name, indices in claims.items()
+                               if any(index not in members for index in indices)}
+            candidates = [source_name for source_name, (_, source_side, source_region) in references.items()
+                          if (source_region, source_side) in buckets]
+            candidates += [results[index][1] for index in target_indices]
+            candidates = [source_name for source_name in dict.fromkeys(candidates) if source_name not in claimed_outside]
+            
+            weights = []
+            for index in target_indices:
+                bone_name = results[index][0]
+                target_standard, target_side, _ = self.library.map_to_standard_name(bone_name)
+                row = []
+                for source_name in candidates:
+                    source_standard, source_side, _ = references[source_name]
+                    score = self.score_pair(target_standard, target_side, source_standard, source_side)
+                    if score > 0:
+                        # 名称相似度只用于区分得分相同的候选
+                        score += ASSIGNMENT_TIE_WEIGHT * SequenceMatcher(None, bone_name.lower(), source_name.lower()).ratio()
+                    row.append(score)
+                weights.append(row)
+            
+            assignment = solve_assignment(weights)
+            for row_index, index in enumerate(target_indices):
+                bone_name, matched_name, score, region, side = results[index]
+                column = assignment[row_index]
+                if column < 0:
+                    new_results[index] = (bone_name, bone_name, 0, region, side)
+                    lost[bone_name] = matched_name
+                else:
+                    new_score = weights[row_index][column]
+                    new_score -= ASSIGNMENT_TIE_WEIGHT * SequenceMatcher(None, bone_name.lower(), candidates[column].lower()).ratio()
+                    new_results[index] = (bone_name, candidates[column], round(new_score, 6), region, side)
+        
+        return new_results, lost
+
+def token_overlap(a, b):
+    """两组词元的重合程度（共同词元数 / 较少一方的词元数）"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+def match_by_hierarchy(reference_index, reference_parents, target_parents, anchors, candidates):
+    """沿骨骼层级从锚点向下匹配
+    
+    已匹配的目标骨骼（锚点）的子骨骼只与对应参考骨骼的子骨骼比较：
+    先按映射库规则（标准名称和侧别）打分，其次按原始名称的字符或词元相似度，
+    一组子骨骼分配后双方都只剩一个时视为同一骨骼链的延续（如手指各节）；
+    每组子骨骼求一一对应分配后继续向下。
+    reference_parents / target_parents: {骨骼名称: 父骨骼名称或 None}
+    anchors: {目标骨骼: 参考骨骼}；candidates: 允许匹配的目标骨骼名称集合。
+    返回 {目标骨骼: (参考骨骼, 得分)}
+    """
+    from difflib import SequenceMatcher
+    
+    library = reference_index.library
+    side_words = set(library.parser.word_index)
+    token_cache = {}
+    
+    def get_tokens(name):
+        tokens = token_cache.get(name)
+        if tokens is None:
+            tokens = {word.lower() for word in NAME_WORD_PATTERN.findall(name)} - side_words
+            token_cache[name] = tokens
+        return tokens
+    
+    reference_children = {}
+    for name, parent in reference_parents.items():
+        if parent is not None:
+            reference_children.setdefault(parent, []).append(name)
+    target_children = {}
+    for name, parent in target_parents.items():
+        if parent is not None:
+            target_children.setdefault(parent, []).append(name)
+    
+    claimed = set(anchors.values())
+    results = {}
+    queue = deque(anchors.items())
+    while queue:
+        target_parent, reference_parent = queue.popleft()
+        # 已经是锚点的子骨骼从锚点队列继续，不参与这里的分配
+        targets = [name for name in target_children.get(target_parent, ()) if name in candidates and name not in results]
+        references = [name for name in reference_children.get(reference_parent, ()) if name not in claimed]
+        if not targets or not references:
+            continue
+        
+        weights = []
+        scores = []
+        for target_position, target_name in enumerate(targets):
+            target_standard, target_side, _ = library.map_to_standard_name(target_name)
+            weight_row = []
+            score_row = []
+            for reference_position, reference_name in enumerate(references):
+                reference_standard, reference_side, _ = library.map_to_standard_name(reference_name)
+                if target_side and reference_side and target_side != reference_side:
+                    weight_row.append(0)
+                    score_row.append(0)
+                    continue
+                score = reference_index.score_pair(target_standard, target_side, reference_standard, reference_side)
+                weight = 1.0 + score if score > 0 else 0
+                if not score:
+                    score = max(SequenceMatcher(None, target_name.lower(), reference_name.lower()).ratio(),
+                                token_overlap(get_tokens(target_name), get_tokens(reference_name)))
+                    weight = score = score if score >= HIERARCHY_MIN_NAME_SCORE else 0
+                if weight:
+                    # 兄弟骨骼顺序相同的候选略优先
+                    weight += ASSIGNMENT_TIE_WEIGHT * (1.0 - abs(target_position - reference_position) / len(references))
+                weight_row.append(weight)
+                score_row.append(score)
+            weights.append(weight_row)
+            scores.append(score_row)
+        
+        pairs = [(row, column, scores[row][column]) for row, column in enumerate(solve_assignment(weights)) if column >= 0]
+        
+        # 双方都只剩一个骨骼时视为同一骨骼链的延续
+        assigned_rows = {row for row, _, _ in pairs}
+        assigned_columns = {column for _, column, _ in pairs}
+        left_rows = [row for row in range(len(targets)) if row not in assigned_rows]
+        left_columns = [column for column in range(len(references)) if column not in assigned_columns]
+        if len(left_rows) == 1 and len(left_columns) == 1:
+            target_side = library.map_to_standard_name(targets[left_rows[0]])[1]
+            reference_side = library.map_to_standard_name(references[left_columns[0]])[1]
+            if not (target_side and reference_side and target_side != reference_side):
+                pairs.append((left_rows[0], left_columns[0], HIERARCHY_CHAIN_SCORE))
+        
+        for row, column, score in pairs:
+            target_name = targets[row]
+            reference_name = references[column]
+            claimed.add(reference_name)
+            results[target_name] = (reference_name, round(score, 6))
+            queue.append((target_name, reference_name))
+    
+    return results
+
+def solve_assignment(weights):
+    """最大权重二分匹配（匈牙利算法）
+    
+    weights[i][j] 为第 i 行与第 j 列配对的权重，不大于0表示不能配对。
+    返回每行分配到的列，没有分配时为 -1
+    """
+    rows = len(weights)
+    columns = len(weights[0]) if rows else 0
+    if not rows or not columns:
+        return [-1] * rows
+    
+    # 算法要求行数不多于列数
+    if rows > columns:
+        transposed = [[weights[i][j] for i in range(rows)] for j in range(columns)]
+        result = [-1] * rows
+        for column, row in enumerate(solve_assignment(transposed)):
+            if row >= 0:
+                result[row] = column
+        return result
+    
+    infinity = float("inf")
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (columns + 1)
+    owner = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+    for i in range(1, rows + 1):
+        owner[0] = i
+        j0 = 0
+        min_values = [infinity] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = weights[i0 - 1]
+            delta = infinity
+            j1 = 0
+            for j in range(1, columns + 1):
+                if not used[j]:
+                    # 最小化代价 = -权重，不能配对的代价为0（相当于不分配）
+                    cost = -max(row[j - 1], 0) - u[i0] - v[j]
+                    if cost < min_values[j]:
+                        min_values[j] = cost
+                        way[j] = j0
+                    if min_values[j] < delta:
+                        delta = min_values[j]
+                        j1 = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_values[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    
+    assignment = [-1] * rows
+    for j in range(1, columns + 1):
+        if owner[j] and weights[owner[j] - 1][j - 1] > 0:
+            assignment[owner[j] - 1] = j - 1
+    return assignment
+
+class LinearPointIndex:
+    """没有 mathutils 时使用的最近邻查找（逐个比较），接口与 mathutils.kdtree.KDTree 相同"""
+    
+    def __init__(self, points):
+        self.points = points
+    
+    def find_n(self, co, n):
+        nearest = sorted((point_distance(point, co), index) for index, point in enumerate(self.points))[:n]
+        return [(self.points[index], index, distance) for distance, index in nearest]
+
+def build_point_index(points):
+    """为点集建立最近邻索引，Blender 中使用 mathutils.kdtree（O(log n) 查找）"""
+    try:
+        from mathutils.kdtree import KDTree
+    except ImportError:
+        return LinearPointIndex(points)
+    
+    tree = KDTree(len(points))
+    for index, point in enumerate(points):
+        tree.insert(point, index)
+    tree.balance()
+    return tree
+
+def point_distance(a, b):
+    return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2) ** 0.5
+
+def bounding_box(points):
+    """返回 (中心, 对角线长度)"""
+    low = [min(point[axis] for point in points) for axis in range(3)]
+    high = [max(point[axis] for point in points) for axis in range(3)]
+    center = tuple((low[axis] + high[axis]) / 2 for axis in range(3))
+    return center, point_distance(low, high)
+
+def fit_similarity_transform(source_points, target_points):
+    """求把 source_points 对齐到 target_points 的相似变换（旋转、统一缩放、平移，Horn 四元数法）
+    
+    返回变换函数；点数不足3个或退化时返回 None
+    """
+    count = len(source_points)
+    if count < 3:
+        return None
+    source_center = [sum(point[axis] for point in source_points) / count for axis in range(3)]
+    target_center = [sum(point[axis] for point in target_points) / count for axis in range(3)]
+    
+    # 去中心后的协方差 S[i][j] = sum(a_i * b_j)
+    s = [[0.0] * 3 for _ in range(3)]
+    source_norm = target_norm = 0.0
+    for source, target in zip(source_points, target_points):
+        a = [source[axis] - source_center[axis] for axis in range(3)]
+        b = [target[axis] - target_center[axis] for axis in range(3)]
+        source_norm += a[0] * a[0] + a[1] * a[1] + a[2] * a[2]
+        target_norm += b[0] * b[0] + b[1] * b[1] + b[2] * b[2]
+        for i in range(3):
+            for j in range(3):
+                s[i][j] += a[i] * b[j]
+    if source_norm <= 1e-12 or target_norm <= 1e-12:
+        return None
+    
+    (sxx, sxy, sxz), (syx, syy, syz), (szx, szy, szz) = s
+    n = [
+        [sxx + syy + szz, syz - szy, szx - sxz, sxy - syx],
+        [syz - szy, sxx - syy - szz, sxy + syx, szx + sxz],
+        [szx - sxz, sxy + syx, -sxx + syy - szz, syz + szy],
+        [sxy - syx, szx + sxz, syz + szy, -sxx - syy + szz],
+    ]
+    # 最大特征值对应的特征向量即最优旋转的四元数：平移到正定后用幂迭代求解
+    shift = sum(abs(value) for row in n for value in row)
+    q = [1.0, 0.1, 0.1, 0.1]
+    for _ in range(200):
+        q = [sum(n[i][j] * q[j] for j in range(4)) + shift * q[i] for i in range(4)]
+        length = sum(value * value for value in q) ** 0.5
+        q = [value / length for value in q]
+    w, x, y, z = q
+    rotation = [
+        [1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+        [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)],
+        [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)],
+    ]
+    scale = (target_norm / source_norm) ** 0.5
+    return make_similarity_transform(rotation, scale, source_center, target_center)
+
+def make_similarity_transform(rotation, scale, source_center, target_center):
+    """返回变换函数: 以 source_center 为中心旋转、缩放后平移到 target_center"""
+    def transform(point):
+        a = [point[axis] - source_center[axis] for axis in range(3)]
+        return tuple(scale * sum(rotation[i][j] * a[j] for j in range(3)) + target_center[i] for i in range(3))
+    
+    return transform
+
+def symmetric_eigen(matrix):
+    """3x3 对称矩阵的特征值和特征向量（Jacobi 旋转法），返回 (特征值列表, 对应的单位特征向量列表)"""
+    a = [list(row) for row in matrix]
+    v = [[1.0 if i == j else 0.0 for j in range(3)] for i in range(3)]
+    for _ in range(50):
+        p, q = max(((0, 1), (0, 2), (1, 2)), key=lambda pair: abs(a[pair[0]][pair[1]]))
+        if abs(a[p][q]) <= 1e-12 * (abs(a[0][0]) + abs(a[1][1]) + abs(a[2][2])) or a[p][q] == 0.0:
+            break
+        theta = (a[q][q] - a[p][p]) / (2 * a[p][q])
+        t = (1.0 if theta >= 0 else -1.0) / (abs(theta) + (theta * theta + 1) ** 0.5)
+        c = 1 / (t * t + 1) ** 0.5
+        s = t * c
+        # A = J^T A J，J 为 (p, q) 平面内的旋转
+        for k in range(3):
+            a[k][p], a[k][q] = c * a[k][p] - s * a[k][q], s * a[k][p] + c * a[k][q]
+        for k in range(3):
+            a[p][k], a[q][k] = c * a[p][k] - s * a[q][k], s * a[p][k] + c * a[q][k]
+        for k in range(3):
+            v[k][p], v[k][q] = c * v[k][p] - s * v[k][q], s * v[k][p] + c * v[k][q]
+    return [a[k][k] for k in range(3)], [[v[i][k] for i in range(3)] for k in range(3)]
+
+def principal_axes(points):
+    """点集的 (中心, 按方差从大到小排列的三个主轴, 均方根半径)"""
+    count = len(points)
+    center = [sum(point[axis] for point in points) / count for axis in range(3)]
+    covariance = [[0.0] * 3 for _ in range(3)]
+    for point in points:
+        d = [point[axis] - center[axis] for axis in range(3)]
+        for i in range(3):
+            for j in range(3):
+                covariance[i][j] += d[i] * d[j]
+    radius = ((covariance[0][0] + covariance[1][1] + covariance[2][2]) / count) ** 0.5
+    values, vectors = symmetric_eigen(covariance)
+    order = sorted(range(3), key=lambda k: -values[k])
+    return center, [vectors[k] for k in order], radius
+
+def determinant(matrix):
+    (a, b, c), (d, e, f), (g, h, i) = matrix
+    return a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+
+def axis_alignments(source_axes, target_axes):
+    """把 source_axes 的每个主轴转到 target_axes 中某个主轴（任意排列和方向）的全部 24 个旋转矩阵
+    
+    方差接近的主轴顺序不稳定（如 T 姿势的身高和臂展），对称骨架的主轴方向也无法确定，因此全部列出
+    """
+    rotations = []
+    for permutation in itertools.permutations(range(3)):
+        for signs in itertools.product((1, -1), repeat=3):
+            rotation = [[sum(signs[k] * target_axes[permutation[k]][i] * source_axes[k][j] for k in range(3))
+                         for j in range(3)] for i in range(3)]
+            if determinant(rotation) > 0:
+                rotations.append(rotation)
+    return rotations
+
+class SpatialBoneMatcher:
+    """按骨骼位置为名称无法识别的骨骼查找参考骨骼
+    
+    参考骨架的骨骼头部位置建立最近邻索引；目标骨架先按已经通过名称匹配的骨骼（锚点）
+    对齐到参考骨架的尺寸和朝向（锚点少于3个时按主轴对齐），再按父级到子级的顺序
+    逐个查找头尾位置最接近、且父骨骼匹配关系一致的参考骨骼。
+    骨骼数据格式为 [(名称, 头部坐标, 尾部坐标, 父骨骼名称或 None)]
+    """
+    
+    def __init__(self, reference_bones):
+        self.bones = reference_bones
+        self.by_name = {bone[0]: bone for bone in reference_bones}
+        self.index = build_point_index([bone[1] for bone in reference_bones])
+        _, self.size = bounding_box([point for bone in reference_bones for point in bone[1:3]]) if reference_bones else (None, 0.0)
+    
+    def get_transform(self, target_bones, anchors):
+        """目标骨架坐标到参考骨架坐标的变换"""
+        target_by_name = {bone[0]: bone for bone in target_bones}
+        pairs = [(target_by_name[target_name][1], self.by_name[reference_name][1])
+                 for target_name, reference_name in anchors.items()
+                 if target_name in target_by_name and reference_name in self.by_name]
+        transform = fit_similarity_transform([pair[0] for pair in pairs], [pair[1] for pair in pairs])
+        if transform is not None:
+            return transform
+        
+        # 锚点不足：按主轴对齐朝向，按均方根半径对齐尺寸。主轴的顺序和方向不确定，
+        # 逐个尝试 24 种对齐方式，取抽样骨骼到最近参考骨骼的距离之和最小的；距离相同时取最接近不旋转的
+        target_center, target_axes, target_radius = principal_axes([point for bone in target_bones for point in bone[1:3]])
+        reference_center, reference_axes, reference_radius = principal_axes([point for bone in self.bones for point in bone[1:3]])
+        scale = reference_radius / target_radius if target_radius > 1e-12 else 1.0
+        step = max(1, len(target_bones) // SPATIAL_ORIENTATION_SAMPLES)
+        samples = [bone[1] for bone in target_bones[::step]]
+        tolerance = self.size * 1e-6 * len(samples)
+        
+        best = None
+        for rotation in axis_alignments(target_axes, reference_axes):
+            transform = make_similarity_transform(rotation, scale, target_center, reference_center)
+            cost = sum(self.index.find_n(transform(point), 1)[0][2] for point in samples)
+            trace = rotation[0][0] + rotation[1][1] + rotation[2][2]
+            if best is None or cost < best[0] - tolerance or (cost <= best[0] + tolerance and trace > best[1]):
+                best = (cost, trace, transform)
+        return best[2]
+    
+    def match(self, target_bones, target_names, anchors, claimed=()):
+        """为 target_names 中的骨骼查找参考骨骼
+        
+        anchors: {目标骨骼: 参考骨骼}，已经通过名称确定的匹配；claimed: 已被使用的参考骨骼。
+        返回 {目标骨骼: (参考骨骼, 得分)}，得分在 0~1 之间，距离越近越高
+        """
+        if not self.bones or not target_bones or not target_names:
+            return {}
+        max_distance = self.size * SPATIAL_MAX_DISTANCE
+        if max_distance <= 0:
+            return {}
+        
+        transform = self.get_transform(target_bones, anchors)
+        target_by_name = {bone[0]: bone for bone in target_bones}
+        assigned = dict(anchors)
+        claimed = set(claimed) | set(anchors.values())
+        pending = set(target_names)
+        results = {}
+        
+        for target_name in self.hierarchy_order(target_bones):
+            if target_name not in pending:
+                continue
+            _, head, tail, parent = target_by_name[target_name]
+            head = transform(head)
+            tail = transform(tail)
+            # 父骨骼已经匹配时，候选的父骨骼必须与之对应
+            expected_parent = assigned.get(parent) if parent is not None else None
+            
+            best_name = None
+            best_distance = max_distance
+            for _, index, head_distance in self.index.find_n(head, SPATIAL_NEIGHBOURS):
+                if head_distance > max_distance:
+                    break
+                reference_name, _, reference_tail, reference_parent = self.bones[index]
+                if reference_name in claimed:
+                    continue
+                if expected_parent is not None and reference_parent != expected_parent:
+                    continue
+                distance = (head_distance + point_distance(tail, reference_tail)) / 2
+                if distance <= best_distance:
+                    best_name = reference_name
+                    best_distance = distance
+            
+            if best_name is not None:
+                claimed.add(best_name)
+                assigned[target_name] = best_name
+                results[target_name] = (best_name, max(round(1.0 - best_distance / max_distance, 3), 0.001))
+        
+        return results
+    
+    @staticmethod
+    def hierarchy_order(bones):
+        """按层级深度排序（父骨骼在子骨骼之前），同一深度保持原顺序"""
+        parents = {bone[0]: bone[3] for bone in bones}
+        depths = {}
+        
+        def depth(name):
+            chain = []
+            while name is not None and name not in depths:
+                chain.append(name)
+                name = parents.get(name)
+                if len(chain) > len(parents):
+                    break  # 防止异常数据中的循环
+            base = depths.get(name, -1) if name is not None else -1
+            for offset, chained in enumerate(reversed(chain)):
+                depths[chained] = base + 1 + offset
+            return depths[chain[0]] if chain else depths[name]
+        
+        return sorted((bone[0] for bone in bones), key=depth)
+
+class StageProfiler:
+    """分阶段性能记录：各阶段耗时、辅助函数调用计数和骨骼数量等数值，可选同时采集 cProfile
+    
+    enabled 为 False 时所有记录都是空操作，调用方不需要另外判断
+    """
+    
+    def __init__(self, name, enabled=True, use_cprofile=False):
+        self.name = name
+        self.enabled = enabled
+        self.stages = OrderedDict()
+        self.counts = OrderedDict()
+        self.values = OrderedDict()
+        self.elapsed = 0.0
+        self.started = time.perf_counter()
+        self.cprofile = None
+        if enabled and use_cprofile:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+    
+    @contextmanager
+    def stage(self, name):
+        """记录一个阶段的耗时（同名阶段累加）"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+    
+    def add_time(self, name, seconds):
+        if self.enabled:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+    
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + amount
+    
+    def set_value(self, name, value):
+        if self.enabled:
+            self.values[name] = value
+    
+    def finish(self):
+        """结束记录，返回自身"""
+        self.elapsed = time.perf_counter() - self.started
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        return self
+    
+    def to_dict(self):
+        """导出为可写入 JSON 的数据（时间单位为毫秒）"""
+        data = {
+            "name": self.name,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            "counts": dict(self.counts),
+            "values": dict(self.values),
+        }
+        if self.cprofile is not None:
+            import io
+            import pstats
+            stream = io.StringIO()
+            pstats.Stats(self.cprofile, stream=stream).sort_stats("cumulative").print_stats(30)
+            data["cprofile_top"] = stream.getvalue()
+        return data
+    
+    def dump_cprofile(self, file_path):
+        """把 cProfile 数据写入文件（可用 pstats 或 snakeviz 查看），没有采集时返回 False"""
+        if self.cprofile is None:
+            return False
+        self.cprofile.dump_stats(file_path)
+        return True
+
+class BoneLibrary:
+    """已编译的骨骼映射库：名称解析器、变体索引和名称标准化缓存"""
+    
+    def __init__(self, data, cache=None):
+        self.data = data
+        self.signature = get_mapping_signature(data)
+        self.parser = BoneNameParser(data.get("side_identifiers", {}))
+        self.index = BoneMappingIndex(data.get("bone_regions", {}))
+        self.cache = cache if cache is not None else NormalizationCache(NORMALIZATION_CACHE_SIZE)
+    
+    @property
+    def version(self):
+        return self.data.get("version", "未知版本")
+    
+    @property
+    def last_updated(self):
+        return self.data.get("last_updated", "")
+    
+    @property
+    def regions(self):
+        """区域名称 -> 区域数据（保持库中顺序）"""
+        return self.data.get("bone_regions", {})
+    
+    def snapshot(self):
+        """导出为只含内置类型的数据，用于写入预编译快照"""
+        return {
+            "signature": self.signature,
+            "data": self.data,
+            "parser": self.parser.snapshot(),
+            "index": self.index.snapshot(),
+        }
+    
+    @classmethod
+    def from_snapshot(cls, state, cache=None):
+        """从预编译快照恢复，不重新解析和编译"""
+        library = cls.__new__(cls)
+        library.data = state["data"]
+        library.signature = state["signature"]
+        library.parser = BoneNameParser.from_snapshot(state["parser"])
+        library.index = BoneMappingIndex.from_snapshot(state["index"])
+        library.cache = cache if cache is not None else NormalizationCache(NORMALIZATION_CACHE_SIZE)
+        return library
+    
+    def extract_base_name_and_side(self, name):
+        """提取骨骼名称的基础部分和侧别信息"""
+        base_name, side, _ = self.parser.parse(name)
+        return base_name, side
+    
+    def map_to_standard_name(self, bone_name):
+        """将骨骼名称映射到 (标准名称, 侧别, 区域)，结果经过缓存"""
+        result = self.cache.get(bone_name)
+        if result is None:
+            result = self._map_to_standard_name(bone_name)
+            self.cache.put(bone_name, result)
+        return result
+    
+    def _map_to_standard_name(self, bone_name):
+        base_name, side = self.extract_base_name_and_side(bone_name)
+        
+        # 在映射库索引中查找匹配的标准名称
+        match = self.index.lookup(base_name)
+        if match:
+            return match[0], side, match[1]
+        
+        # 如果没有找到匹配，返回原始基础名称和侧别
+        return base_name, side, "other"
+    
+    def region_of(self, standard_name):
+        """获取标准名称所在区域，不在库中返回 None"""
+        return self.index.region_of(standard_name)
+    
+    def layer_of(self, bone_name):
+        """识别该骨骼名称的映射库层名称，不是叠加的映射库或未识别时返回空字符串"""
+        variant_layers = self.data.get("variant_layers")
+        if not variant_layers:
+            return ""
+        base_name, _ = self.extract_base_name_and_side(bone_name)
+        layer_name = variant_layers.get(base_name.lower())
+        if layer_name is None:
+            # 手指骨骼按“包含标准名称”规则识别，归属声明该标准名称的层
+            standard_name, _, region = self.map_to_standard_name(bone_name)
+            layer_name = self.data["standard_layers"].get(standard_name, "") if region != "other" else ""
+        return layer_name
+    
+    def reference_index(self, reference_names):
+        """为参考骨架建立索引，可用于多个目标骨架"""
+        return ReferenceBoneIndex(self, reference_names)
+    
+    def match_names(self, reference_index, target_names, include_fingers=False):
+        """为目标骨架的每个骨骼查找参考骨骼
+        
+        只处理映射库中有定义的骨骼，返回 [(原始名称, 匹配名称, 相似度, 区域, 侧别)]，
+        没有找到匹配的骨骼保持原名且相似度为0
+        """
+        results = []
+        for bone_name in target_names:
+            # 将目标骨骼映射到标准名称和侧别
+            standard_name, side, region = self.map_to_standard_name(bone_name)
+            
+            # 如果不处理手指且是手指骨骼，则跳过
+            if not include_fingers and region == "fingers":
+                continue  # 跳过这个骨骼，不进行匹配和重命名
+            
+            # 只处理映射库中有定义的骨骼
+            if self.index.region_of(standard_name) is None:
+                continue
+            
+            best_match, score = reference_index.find_match(bone_name, include_fingers)
+            if best_match:
+                results.append((bone_name, best_match, score, region, side))
+            else:
+                results.append((bone_name, bone_name, 0, region, side))
+        
+        return results
+    
+    def match(self, reference_names, target_names, options=None):
+        """匹配两组骨骼名称，返回 {目标骨骼名称: 参考骨骼名称}（只包含找到匹配的骨骼）
+        
+        options: {"include_fingers": 是否处理手指骨骼, "unique": 是否保证每个参考骨骼最多被一个目标骨骼使用}
+        """
+        options = options or {}
+        reference_index = self.reference_index(reference_names)
+        results = self.match_names(reference_index, target_names, options.get("include_fingers", False))
+        if options.get("unique"):
+            results, _ = reference_index.assign_unique(results)
+        return {original_name: matched_name for original_name, matched_name, score, _, _ in results if score > 0}
+
+# 增量更新文件的格式版本
+MAPPING_DELTA_FORMAT = 1
+# 按增量更新时最多连续应用的增量数量，超过时改为下载完整映射库
+MAX_DELTA_CHAIN = 32
+
+def dump_mapping_text(data):
+    """把映射库序列化为紧凑的 JSON 文本（无缩进和多余空格），用于写入缓存文件"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def get_mapping_content_hash(data):
+    """映射库内容的 SHA-256（区分键的顺序：标准名称的顺序决定变体冲突时的归属）"""
+    return hashlib.sha256(dump_mapping_text(data).encode('utf-8')).hexdigest()
+
+def get_mapping_version_key(data):
+    """映射库的版本标识 {"version", "last_updated"}，增量更新按它查找起点"""
+    return {"version": data.get("version", ""), "last_updated": data.get("last_updated", "")}
+
+def _diff_mapping_values(old, new, path, ops):
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        if old != new or type(old) is not type(new):
+            ops.append({"op": "set", "path": path, "value": new})
+        return
+    # 逐键更新只能删除键或在末尾追加键，键的顺序有其他变化时整体替换
+    expected_order = [key for key in old if key in new] + [key for key in new if key not in old]
+    if expected_order != list(new):
+        ops.append({"op": "set", "path": path, "value": new})
+        return
+    for key in old:
+        if key not in new:
+            ops.append({"op": "remove", "path": path + [key]})
+    for key, value in new.items():
+        if key in old:
+            _diff_mapping_values(old[key], value, path + [key], ops)
+        else:
+            ops.append({"op": "set", "path": path + [key], "value": value})
+
+def make_mapping_delta(old, new):
+    """生成从映射库 old 更新到 new 的增量
+    
+    返回 {"format", "from": 版本标识, "to": 版本标识, "sha256": new 的内容哈希, "ops": [...]}，
+    ops 中 set 操作写入 path 处的值，remove 操作删除 path 处的键；列表整体替换。
+    """
+    ops = []
+    _diff_mapping_values(old, new, [], ops)
+    return {
+        "format": MAPPING_DELTA_FORMAT,
+        "from": get_mapping_version_key(old),
+        "to": get_mapping_version_key(new),
+        "sha256": get_mapping_content_hash(new),
+        "ops": ops,
+    }
+
+def apply_mapping_delta(data, delta):
+    """把增量应用到映射库，返回新的映射库数据（不修改 data）
+    
+    增量的起点与 data 的版本标识不符、格式不支持或结果与增量记录的哈希不一致时抛出 ValueError
+    """
+    if not isinstance(delta, dict) or delta.get("format") != MAPPING_DELTA_FORMAT:
+        raise ValueError("不支持的增量格式")
+    if delta.get("from") != get_mapping_version_key(data):
+        raise ValueError("增量的起始版本与本地映射库不一致")
+    
+    result = json.loads(dump_mapping_text(data))
+    for op in delta.get("ops", []):
+        path = op.get("path")
+        if not path:
+            if op.get("op") != "set":
+                raise ValueError("无效的增量操作")
+            result = op["value"]
+            continue
+        
+        parent = result
+        for key in path[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+            if parent is None:
+                raise ValueError(f"增量路径不存在: {'/'.join(path)}")
+        if not isinstance(parent, dict):
+            raise ValueError(f"增量路径不存在: {'/'.join(path)}")
+        
+        if op.get("op") == "set":
+            parent[path[-1]] = op["value"]
+        elif op.get("op") == "remove":
+            parent.pop(path[-1], None)
+        else:
+            raise ValueError(f"未知的增量操作: {op.get('op')}")
+    
+    if delta.get("sha256") and get_mapping_content_hash(result) != delta["sha256"]:
+        raise ValueError("应用增量后的映射库与预期内容不一致")
+    return result
+
+def find_delta_chain(manifest, data):
+    """在增量清单中查找从 data 的版本到最新版本的增量链
+    
+    清单格式: {"latest": 版本标识, "sha256": 最新版本的内容哈希,
+               "deltas": [{"from": 版本标识, "to": 版本标识, "url": 增量文件地址}]}
+    已是最新版本时返回 []，找不到完整的增量链时返回 None
+    """
+    latest = manifest.get("latest")
+    current = get_mapping_version_key(data)
+    chain = []
+    while current != latest:
+        step = next((delta for delta in manifest.get("deltas", []) if delta.get("from") == current), None)
+        if step is None or len(chain) >= MAX_DELTA_CHAIN:
+            return None
+        chain.append(step)
+        current = step.get("to")
+    return chain
+
+def build_mapping_manifest(latest, deltas):
+    """生成增量清单，deltas: [(增量, 增量文件地址)]（地址可以是相对清单的路径）"""
+    return {
+        "format": MAPPING_DELTA_FORMAT,
+        "latest": get_mapping_version_key(latest),
+        "sha256": get_mapping_content_hash(latest),
+        "deltas": [{"from": delta["from"], "to": delta["to"], "url": url} for delta, url in deltas],
+    }
+
+# 映射库下载：镜像上的增量清单与映射库放在同一目录: 骨骼.json -> 骨骼.manifest.json
+MANIFEST_SUFFIX = ".manifest.json"
+# 下载超时（秒，面板中的“下载超时”可以修改）：从开始下载到有镜像成功的最长时间，
+# 每次连接和读取的套接字超时都取距离这个截止时间的剩余时间
+DOWNLOAD_TIMEOUT = 8.0
+DOWNLOAD_CHUNK_SIZE = 16384
+
+def write_file_atomic(file_path, content):
+    """先写入临时文件再替换，写入中途崩溃时原文件保持完整"""
+    temp_path = file_path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def read_mapping_cache(cache_path):
+    """读取本地缓存文件中的映射库，文件不存在或无效时返回 None"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and "bone_regions" in data else None
+
+def read_download_meta(meta_path, urls):
+    """读取上次从这些镜像之一下载时记录的 ETag / Last-Modified，没有记录或来自其他地址时返回空记录"""
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(meta, dict) or meta.get("url") not in urls:
+        return {}
+    return meta
+
+def write_download_meta(meta_path, meta):
+    """保存下载记录"""
+    try:
+        write_file_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+    except OSError as e:
+        print(f"保存下载记录失败: {str(e)}")
+
+class DownloadCancelled(Exception):
+    """其他镜像已经获胜，停止本次下载"""
+
+class MirrorDownloadError(Exception):
+    """所有镜像都失败"""
+    
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{url}: {error}" for url, error in errors))
+
+def get_remaining_timeout(deadline):
+    """距离截止时间（time.monotonic()）的剩余秒数，已经超时时抛出 TimeoutError"""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("下载超时")
+    return remaining
+
+def set_response_timeout(response, timeout):
+    """修改响应底层套接字的超时（取不到套接字时保持建立连接时的超时）"""
+    sock = getattr(getattr(response.fp, "raw", None), "_sock", None)
+    if sock is not None:
+        sock.settimeout(timeout)
+
+def fetch_mapping(url, timeout=DOWNLOAD_TIMEOUT, etag=None, last_modified=None, progress=None, cancel=None):
+    """下载映射库原始文本，支持条件请求
+    
+    返回 (文本, 响应记录)，服务器返回304（未修改）时文本为 None；
+    progress(已接收字节数, 总字节数或None) 在每个分块下载后调用；
+    cancel（threading.Event）被设置后在发出请求前或收到下一块数据后抛出 DownloadCancelled。
+    整个请求最多用 timeout 秒：连接和每次读取的套接字超时都是剩余的时间
+    """
+    import urllib.request
+    import urllib.error
+    
+    if cancel is not None and cancel.is_set():
+        raise DownloadCancelled()
+    deadline = time.monotonic() + timeout
+    
+    request = urllib.request.Request(url)
+    if etag:
+        request.add_header("If-None-Match", etag)
+    if last_modified:
+        request.add_header("If-Modified-Since", last_modified)
+    
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            length = response.headers.get("Content-Length")
+            total = int(length) if length and length.isdigit() else None
+            
+            chunks = []
+            received = 0
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise DownloadCancelled()
+                set_response_timeout(response, get_remaining_timeout(deadline))
+                # read1 收到数据就返回，不等凑满一个分块，取消在服务器缓慢发送时也能及时生效
+                chunk = response.read1(DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                received += len(chunk)
+                if progress:
+                    progress(received, total)
+            
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            return b"".join(chunks).decode('utf-8'), meta
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, {"url": url, "etag": etag, "last_modified": last_modified}
+        raise
+
+def get_manifest_url(url):
+    """镜像上映射库对应的增量清单地址"""
+    return (url[:-len(".json")] if url.endswith(".json") else url) + MANIFEST_SUFFIX
+
+def race_mirrors(urls, fetch, timeout=DOWNLOAD_TIMEOUT):
+    """同时向所有镜像发出请求，返回最先成功的 (结果, 镜像地址)
+    
+    fetch(url, cancel) 在各自的线程中执行，返回结果或抛出异常（下载失败或未通过校验）；
+    有镜像成功后设置 cancel，其余镜像在收到下一块数据后停止。
+    全部失败时抛出 MirrorDownloadError，超过 timeout 秒仍没有镜像成功时抛出 TimeoutError
+    """
+    cancel = threading.Event()
+    condition = threading.Condition()
+    state = {"winner": None, "result": None, "finished": 0}
+    errors = []
+    
+    def run(url):
+        try:
+            result = fetch(url, cancel)
+        except Exception as e:
+            with condition:
+                if not isinstance(e, DownloadCancelled):
+                    errors.append((url, describe_download_error(e)))
+                state["finished"] += 1
+                condition.notify_all()
+            return
+        with condition:
+            state["finished"] += 1
+            if state["winner"] is None:
+                state["winner"] = url
+                state["result"] = result
+                cancel.set()
+            condition.notify_all()
+    
+    for url in urls:
+        threading.Thread(target=run, args=(url,), name="bone-mapping-mirror", daemon=True).start()
+    
+    deadline = time.monotonic() + timeout
+    with condition:
+        while state["winner"] is None and state["finished"] < len(urls):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            condition.wait(remaining)
+        cancel.set()
+        if state["winner"] is not None:
+            return state["result"], state["winner"]
+        if state["finished"] < len(urls):
+            raise TimeoutError(f"{timeout:.0f} 秒内没有镜像返回有效的映射库")
+        raise MirrorDownloadError(list(errors))
+
+def fetch_mapping_manifest(url, timeout=DOWNLOAD_TIMEOUT, cancel=None):
+    """下载镜像上的增量清单，镜像没有清单或清单无效时返回 None"""
+    import urllib.error
+    
+    try:
+        text, _ = fetch_mapping(get_manifest_url(url), timeout, cancel=cancel)
+        manifest = json.loads(text)
+    except DownloadCancelled:
+        raise
+    except urllib.error.HTTPError as e:
+        # 自建镜像可以不提供清单，此时只校验映射库格式，不输出提示
+        if e.code != 404:
+            print(f"增量清单不可用 ({url}): {describe_download_error(e)}")
+        return None
+    except Exception as e:
+        print(f"增量清单不可用 ({url}): {describe_download_error(e)}")
+        return None
+    return manifest if isinstance(manifest, dict) and "latest" in manifest else None
+
+def fetch_mapping_delta(url, manifest, current, timeout=DOWNLOAD_TIMEOUT, progress=None, cancel=None):
+    """按增量清单从镜像下载增量，把本地映射库 current 更新到最新版本
+    
+    返回新的映射库数据，已是最新版本时返回 None；
+    清单中没有从当前版本出发的增量链或增量无法应用时抛出异常，调用方随后下载完整映射库；
+    timeout 是下载整条增量链的时间
+    """
+    import urllib.parse
+    
+    deadline = time.monotonic() + timeout
+    chain = find_delta_chain(manifest, current)
+    if chain is None:
+        raise ValueError("没有从本地版本到最新版本的增量")
+    if not chain:
+        if get_mapping_content_hash(current) != manifest.get("sha256"):
+            raise ValueError("本地映射库与最新版本的内容不一致")
+        return None
+    
+    data = current
+    for step in chain:
+        text, _ = fetch_mapping(urllib.parse.urljoin(get_manifest_url(url), step["url"]),
+                                get_remaining_timeout(deadline), progress=progress, cancel=cancel)
+        data = apply_mapping_delta(data, json.loads(text))
+    if get_mapping_content_hash(data) != manifest.get("sha256"):
+        raise ValueError("应用增量后的映射库与最新版本的内容不一致")
+    return data
+
+def fetch_mapping_from_mirror(url, timeout=DOWNLOAD_TIMEOUT, current=None, meta=None, progress=None, cancel=None):
+    """从单个镜像获取映射库更新：先读取增量清单，本地已有映射库时尝试增量更新，否则下载完整映射库
+    
+    完整映射库必须有效，镜像有清单时内容哈希还必须与清单中的最新版本一致；
+    只在该镜像就是上次下载所用的镜像时发送条件请求；清单、增量和完整下载共用 timeout 秒。
+    返回 (新的映射库数据或 None（未变化）, 下载记录, 说明)
+    """
+    meta = meta or {}
+    deadline = time.monotonic() + timeout
+    manifest = fetch_mapping_manifest(url, timeout, cancel)
+    expected_hash = manifest.get("sha256") if manifest else None
+    
+    if current is not None and manifest is not None:
+        try:
+            data = fetch_mapping_delta(url, manifest, current, get_remaining_timeout(deadline), progress, cancel)
+            # 增量更新后缓存文件与完整文件的 ETag 不再对应，下次完整下载时不发送条件请求
+            new_meta = {"url": url, "sha256": expected_hash}
+            return data, new_meta if data is not None else meta, f"增量更新: {url}"
+        except DownloadCancelled:
+            raise
+        except Exception as e:
+            print(f"增量更新不可用 ({url})，下载完整映射库: {str(e)}")
+    
+    conditional = current is not None and url == meta.get("url")
+    text, new_meta = fetch_mapping(url, get_remaining_timeout(deadline),
+                                   meta.get("etag") if conditional else None,
+                                   meta.get("last_modified") if conditional else None,
+                                   progress, cancel)
+    if text is None:
+        data = None
+        content_hash = get_mapping_content_hash(current)
+    else:
+        data = parse_mapping_text(text)
+        check_mapping_data(data)
+        content_hash = get_mapping_content_hash(data)
+    if expected_hash and content_hash != expected_hash:
+        raise ValueError("内容哈希与增量清单中的最新版本不一致")
+    return data, new_meta, f"完整下载: {url}"
+
+def fetch_mapping_update(urls, timeout=DOWNLOAD_TIMEOUT, current=None, meta=None, progress=None):
+    """同时从各镜像获取映射库更新，返回最先成功的镜像的 (新的映射库数据或 None, 下载记录, 说明)"""
+    def fetch(url, cancel):
+        return fetch_mapping_from_mirror(url, timeout, current, meta, progress, cancel)
+    
+    result, _ = race_mirrors(urls, fetch, timeout)
+    return result
+
+def describe_download_error(error):
+    """将下载异常转换为提示信息"""
+    import urllib.error
+    import urllib.parse
+    
+    if isinstance(error, MirrorDownloadError):
+        hosts = ", ".join(f"{urllib.parse.urlsplit(url).netloc or url}（{message}）" for url, message in error.errors)
+        return f"所有镜像均下载失败: {hosts}"
+    if isinstance(error, urllib.error.HTTPError):
+        return f"服务器返回错误 {error.code}"
+    if isinstance(error, TimeoutError) or (isinstance(error, urllib.error.URLError)
+                                           and isinstance(error.reason, TimeoutError)):
+        return "网络超时：服务器响应过慢"
+    if isinstance(error, urllib.error.URLError):
+        return "网络错误：无法访问链接"
+    return f"下载失败: {str(error)}"
+
+def update_mapping_cache(urls, cache_path, meta_path, current=None, timeout=DOWNLOAD_TIMEOUT, progress=None):
+    """从各镜像更新本地缓存文件（可以在后台线程中调用）
+    
+    current 为已加载的本地映射库，None 时读取 cache_path；只有下载记录来自这些镜像之一时才发送条件请求、
+    尝试增量更新（缓存可能来自手动加载的文件）。
+    返回 (映射库数据, 状态, 说明)，状态为：
+        "updated"    下载了新的映射库，已写入缓存文件和下载记录
+        "unchanged"  服务器上的映射库未变化，数据为本地缓存
+        "failed"     所有镜像都失败或超时，缓存文件和下载记录保持不变，数据为本地缓存（没有时为 None）
+    """
+    if current is None:
+        current = read_mapping_cache(cache_path)
+    meta = read_download_meta(meta_path, urls) if current is not None else {}
+    
+    try:
+        data, new_meta, method = fetch_mapping_update(urls, timeout, current if meta else None, meta, progress)
+    except Exception as e:
+        return current, "failed", describe_download_error(e)
+    
+    if data is None:
+        if new_meta:
+            write_download_meta(meta_path, new_meta)
+        return current, "unchanged", "映射库未变化，无需重新下载"
+    
+    write_file_atomic(cache_path, dump_mapping_text(data).encode('utf-8'))
+    write_download_meta(meta_path, new_meta)
+    return data, "updated", method
+
+def merge_mapping_layers(layers):
+    """按顺序叠加多层映射库，返回可直接编译的映射库数据
+    
+    layers: [(层名称, 映射库数据)]，第一层为基础库，靠后的层优先：
+    同一个变体（不区分大小写）只保留在声明它的最高优先级的层中；
+    区域和标准名称保持首次出现的顺序，侧别标识按层追加。
+    合并结果另外记录 "layers"（层名称和版本）、"variant_layers"（小写变体 -> 层名称）
+    和 "standard_layers"（标准名称 -> 最先声明它的层名称）。
+    变体等字符串经过驻留，各层共有的变体只保存一份。
+    """
+    owners = {}
+    for layer_name, data in reversed(layers):
+        for region_data in data.get("bone_regions", {}).values():
+            for variants in region_data.get("bones", {}).values():
+                for variant in variants:
+                    owners.setdefault(variant.lower(), layer_name)
+    
+    regions = {}
+    side_identifiers = {}
+    variant_layers = {}
+    standard_layers = {}
+    layer_info = []
+    for layer_name, data in layers:
+        layer_name = sys.intern(layer_name)
+        layer_info.append({"name": layer_name, "version": data.get("version", "")})
+        
+        for key, identifiers in data.get("side_identifiers", {}).items():
+            merged = side_identifiers.setdefault(key, [])
+            merged.extend(identifier for identifier in identifiers if identifier not in merged)
+        
+        for region_name, region_data in data.get("bone_regions", {}).items():
+            region = regions.get(region_name)
+            if region is None:
+                region = regions[region_name] = {key: value for key, value in region_data.items() if key != "bones"}
+                region["bones"] = {}
+            for standard_name, variants in region_data.get("bones", {}).items():
+                standard_name = sys.intern(standard_name)
+                standard_layers.setdefault(standard_name, layer_name)
+                merged = region["bones"].setdefault(standard_name, [])
+                seen = {variant.lower() for variant in merged}
+                for variant in variants:
+                    key = variant.lower()
+                    if key in seen or owners[key] != layer_name:
+                        continue
+                    key = sys.intern(key)
+                    seen.add(key)
+                    merged.append(sys.intern(variant))
+                    variant_layers[key] = layer_name
+    
+    base = layers[0][1] if layers else {}
+    versions = [f"{info['name']} {info['version']}".strip() for info in layer_info[1:]]
+    return {
+        "version": " + ".join([base.get("version", "未知版本")] + versions),
+        "last_updated": max((data.get("last_updated", "") for _, data in layers), default=""),
+        "bone_regions": regions,
+        "side_identifiers": side_identifiers,
+        "layers": layer_info,
+        "variant_layers": variant_layers,
+        "standard_layers": standard_layers,
+    }
+
+def load_library(file_path, cache=None):
+    """从JSON文件加载并编译映射库"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = parse_mapping_text(f.read())
+    check_mapping_data(data)
+    return BoneLibrary(data, cache)
+
+def plan_bone_renames(rename_map, existing_names):
+    """计算无冲突的批量重命名步骤
+    
+    链式重命名（A→B 同时 B→C）按依赖顺序执行，循环重命名（A→B 同时 B→A）借助临时名称打破，
+    不会产生 .001 后缀。多个骨骼改为同一名称、或目标名称被不参与重命名的骨骼占用时跳过。
+    返回 (步骤列表 [(当前名称, 新名称)], 实际重命名的骨骼数, 冲突列表 [(原名称, 目标名称)])
+    """
+    existing = set(existing_names)
+    pending = {}
+    claimed = set()
+    conflicts = []
+    
+    for old_name, new_name in rename_map.items():
+        if old_name not in existing or old_name == new_name:
+            continue
+        if new_name in claimed:
+            conflicts.append((old_name, new_name))
+            continue
+        claimed.add(new_name)
+        pending[old_name] = new_name
+    
+    # 目标名称 -> 等待该名称被腾出的骨骼
+    waiting = {new_name: old_name for old_name, new_name in pending.items()}
+    
+    # 目标名称被保持原名的骨骼占用时跳过；被跳过的骨骼也保持原名，可能连带阻塞等待它的骨骼
+    blocked = deque(old_name for old_name, new_name in pending.items()
+                    if new_name in existing and new_name not in pending)
+    while blocked:
+        old_name = blocked.popleft()
+        new_name = pending.pop(old_name)
+        del waiting[new_name]
+        conflicts.append((old_name, new_name))
+        waiter = waiting.get(old_name)
+        if waiter is not None:
+            blocked.append(waiter)
+    
+    renamed_count = len(pending)
+    ready = deque(old_name for old_name, new_name in pending.items() if new_name not in pending)
+    used_names = existing | claimed
+    steps = []
+    temp_index = 0
+    
+    while pending:
+        while ready:
+            old_name = ready.popleft()
+            steps.append((old_name, pending.pop(old_name)))
+            waiter = waiting.pop(old_name, None)
+            if waiter is not None:
+                ready.append(waiter)
+        
+        if pending:
+            # 剩下的都在循环中：先把其中一个改为临时名称
+            old_name = next(iter(pending))
+            while f"~rename{temp_index}" in used_names:
+                temp_index += 1
+            temp_name = f"~rename{temp_index}"
+            used_names.add(temp_name)
+            
+            steps.append((old_name, temp_name))
+            new_name = pending.pop(old_name)
+            pending[temp_name] = new_name
+            waiting[new_name] = temp_name
+            ready.append(waiting.pop(old_name))
+    
+    return steps, renamed_count, conflicts
+
+def parse_mapping_text(data):
+    """解析映射库文本"""
+    import ast
+    
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError as e:
+        # 如果标准JSON解析失败，尝试使用ast.literal_eval
+        try:
+            return ast.literal_eval(data)
+        except:
+            raise e
+
+def check_mapping_data(data):
+    """检查解析后的映射库结构，无效时抛出 ValueError"""
+    if not isinstance(data, dict) or "bone_regions" not in data:
+        raise ValueError("无效的骨骼映射库格式: 缺少bone_regions字段")
@@ -0,0 +1,22 @@
+"""命令行批量处理入口
+
+    blender -b --python BoneRename/cli.py -- --reference 参考.blend --input 模型目录
+
+Blender 以脚本方式执行本文件，此时它不属于任何包，需要把插件包所在的目录加入 sys.path 后按包导入插件。
+"""
+
+import os
+import sys
+
+package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if package_parent not in sys.path:
+    sys.path.insert(0, package_parent)
+
+import BoneRename
+
+if __name__ == "__main__":
+    # "--" 之后有参数时进入批量处理，否则（包括只有 "--"）只注册插件
+    cli_args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if cli_args:
+        sys.exit(BoneRename.run_cli(cli_args))
+    BoneRename.register()
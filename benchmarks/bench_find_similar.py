@@ -0,0 +1,130 @@
+"""相似度匹配的微基准
+
+比较 ReferenceBoneIndex._find_similar（候选去重、长度/字符计数上界剪枝、复用 SequenceMatcher）
+与剪枝前逐个参考骨骼计算 SequenceMatcher.ratio() 的写法：
+    
+    python benchmarks/bench_find_similar.py                  # 默认 500,2000,5000 个骨骼
+    python benchmarks/bench_find_similar.py --sizes 10000
+
+参考骨架由 rig_generator 生成：人形骨骼名称带拼写改动（映射库无法识别），其余为大量不在映射库中的骨骼，
+目标骨骼全部落到相似度匹配。两种写法对每个目标的结果必须完全相同，否则返回 1；
+剪枝版本的加速比低于 --min-speedup 时同样返回 1。
+"""
+
+import gc
+import os
+import sys
+import time
+import argparse
+from difflib import SequenceMatcher
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+# 匹配核心在插件包内，按包导入（没有 bpy 时包的 __init__ 不会加载插件界面）
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from BoneRename.bone_matcher import load_library
+from rig_generator import generate_case
+from run_benchmarks import DEFAULT_MAPPING_FILE, median
+
+DEFAULT_SIZES = [500, 2000, 5000]
+
+def find_similar_unpruned(index, target_standard, target_side):
+    """剪枝前的写法：对每个参考骨骼都完整计算一次相似度"""
+    best_match = None
+    best_score = 0
+    
+    for source_name, source_standard, source_side, source_region in index.entries:
+        # 确保左右侧匹配
+        if target_side and source_side and target_side != source_side:
+            continue  # 侧别不匹配，跳过
+        
+        # 计算标准名称的相似度
+        score = SequenceMatcher(None, target_standard.lower(), source_standard.lower()).ratio()
+        
+        # 如果侧别匹配，增加相似度权重
+        if target_side == source_side:
+            score = min(score * 1.2, 1.0)  # 增加20%的相似度，但不超过1.0
+        
+        if score > best_score and score > 0.8:  # 提高相似度阈值
+            best_score = score
+            best_match = source_name
+    
+    # 只有当相似度非常高时才返回匹配结果
+    if best_score > 0.9:  # 非常高的相似度阈值
+        return best_match, best_score
+    
+    return None, 0  # 没有找到合适的匹配
+
+def find_similar_pruned(index, target_standard, target_side):
+    """当前的写法（跳过按目标缓存的结果，只测相似度计算本身）"""
+    return index._find_similar(target_standard.lower(), target_side)
+
+def similar_queries(library, case):
+    """目标骨骼中精确匹配失败、会进入相似度匹配的 (标准名称, 侧别)，去重后保持顺序"""
+    index = library.reference_index(case["reference"])
+    queries = []
+    for name in case["target"]:
+        standard_name, side, region = library.map_to_standard_name(name)
+        if region == "other" or (standard_name, side) in index.exact:
+            continue
+        if (standard_name, side) not in queries:
+            queries.append((standard_name, side))
+    return queries
+
+def time_lookups(library, case, queries, find_similar, repeat):
+    """每次运行都重新建立参考骨架索引（不计时），返回 (查找耗时中位数, 结果列表)"""
+    samples = []
+    results = None
+    for _ in range(repeat):
+        index = library.reference_index(case["reference"])
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            results = [find_similar(index, standard_name, side) for standard_name, side in queries]
+            samples.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return median(samples), results
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="相似度匹配微基准")
+    parser.add_argument("--mapping", default=DEFAULT_MAPPING_FILE, help="骨骼映射库 JSON（默认: 骨骼.json）")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="参考骨架的骨骼数量，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每种写法的运行次数（取中位数）")
+    parser.add_argument("--min-speedup", type=float, default=1.0, help="剪枝版本至少应达到的加速比")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    library = load_library(args.mapping)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    repeat = max(1, args.repeat)
+    
+    failures = []
+    print(f"{'参考骨骼数':<10}{'查找次数':>8}{'剪枝前':>14}{'剪枝后':>14}{'加速比':>10}")
+    for size in sizes:
+        case = generate_case("unity", size, near_miss=True)
+        queries = similar_queries(library, case)
+        unpruned_seconds, expected = time_lookups(library, case, queries, find_similar_unpruned, repeat)
+        pruned_seconds, actual = time_lookups(library, case, queries, find_similar_pruned, repeat)
+        speedup = unpruned_seconds / pruned_seconds if pruned_seconds else float("inf")
+        print(f"{len(case['reference']):<14}{len(queries):>8}{unpruned_seconds * 1000:>14.2f}ms{pruned_seconds * 1000:>12.2f}ms{speedup:>10.1f}x")
+        
+        for (standard_name, side), before, after in zip(queries, expected, actual):
+            if before != after:
+                failures.append(f"{case['name']} {standard_name} {side}: 剪枝前 {before}，剪枝后 {after}")
+        if speedup < args.min_speedup:
+            failures.append(f"{case['name']}: 加速比 {speedup:.1f}x 低于 {args.min_speedup:.1f}x")
+    
+    if failures:
+        print("相似度匹配结果不一致或没有加速:")
+        for failure in failures:
+            print("  " + failure)
+        return 1
+    print("结果一致")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
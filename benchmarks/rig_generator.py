@@ -0,0 +1,198 @@
+"""合成测试骨架生成器
+
+按映射库针对的几种命名风格生成指定数量骨骼的骨架，同时给出标准答案（目标骨骼 -> 参考骨骼）。
+人形骨骼之外用头发、裙摆、饰品等骨骼链补足数量，这些骨骼不应被重命名（标准答案为 None）。
+"""
+
+import random
+
+# 人形骨骼的标准名称，以及是否分左右
+HUMANOID_BONES = [
+    ("Hips", False), ("Spine", False), ("Chest", False), ("Neck", False), ("Head", False),
+    ("Shoulder", True), ("UpperArm", True), ("LowerArm", True), ("Hand", True),
+    ("UpperLeg", True), ("LowerLeg", True), ("Foot", True), ("Toe", True),
+]
+FINGER_BONES = [
+    (f"{finger}_{segment}", True)
+    for finger in ("Thumb", "Index", "Middle", "Ring", "Pinky")
+    for segment in ("Proximal", "Intermediate", "Distal")
+]
+
+# 各命名风格中标准名称对应的骨骼名称（没有的键表示该风格中没有这个骨骼）
+# 日文 MMD 和 mixamo 是常见模型的实际写法，映射库目前大多不认识，准确率按实际结果记录在基准线中
+STYLE_NAMES = {
+    "unity": {name: name for name, _ in HUMANOID_BONES + FINGER_BONES},
+    "mmd_jp": {
+        "Hips": "下半身", "Spine": "上半身", "Chest": "上半身2", "Neck": "首", "Head": "頭",
+        "Shoulder": "肩", "UpperArm": "腕", "LowerArm": "ひじ", "Hand": "手首",
+        "UpperLeg": "足", "LowerLeg": "ひざ", "Foot": "足首", "Toe": "つま先",
+        "Thumb_Proximal": "親指０", "Thumb_Intermediate": "親指１", "Thumb_Distal": "親指２",
+        "Index_Proximal": "人指１", "Index_Intermediate": "人指２", "Index_Distal": "人指３",
+        "Middle_Proximal": "中指１", "Middle_Intermediate": "中指２", "Middle_Distal": "中指３",
+        "Ring_Proximal": "薬指１", "Ring_Intermediate": "薬指２", "Ring_Distal": "薬指３",
+        "Pinky_Proximal": "小指１", "Pinky_Intermediate": "小指２", "Pinky_Distal": "小指３",
+    },
+    "mmd_cn": {
+        "Hips": "骨盆", "Spine": "脊柱", "Chest": "胸部", "Neck": "脖子", "Head": "头部",
+        "Shoulder": "肩膀", "UpperArm": "上臂", "LowerArm": "前臂", "Hand": "手",
+        "UpperLeg": "大腿", "LowerLeg": "小腿", "Foot": "脚", "Toe": "脚趾",
+        "Thumb_Proximal": "拇指近节", "Thumb_Intermediate": "拇指中节", "Thumb_Distal": "拇指远节",
+        "Index_Proximal": "食指近节", "Index_Intermediate": "食指中节", "Index_Distal": "食指远节",
+        "Middle_Proximal": "中指近节", "Middle_Intermediate": "中指中节", "Middle_Distal": "中指远节",
+        "Ring_Proximal": "无名指近节", "Ring_Intermediate": "无名指中节", "Ring_Distal": "无名指远节",
+        "Pinky_Proximal": "小指近节", "Pinky_Intermediate": "小指中节", "Pinky_Distal": "小指远节",
+    },
+    # 映射库中手指没有拼音写法，拼音风格只生成主干骨骼
+    "pinyin": {
+        "Hips": "yaobu", "Spine": "jizhu", "Chest": "xiongbu", "Neck": "bozi", "Head": "toubu",
+        "Shoulder": "jianbang", "UpperArm": "shangbi", "LowerArm": "qianbi", "Hand": "shou",
+        "UpperLeg": "datui", "LowerLeg": "xiaotui", "Foot": "jiao", "Toe": "jiaozhi",
+    },
+    "mixamo": {
+        "Hips": "Hips", "Spine": "Spine", "Chest": "Spine2", "Neck": "Neck", "Head": "Head",
+        "Shoulder": "Shoulder", "UpperArm": "Arm", "LowerArm": "ForeArm", "Hand": "Hand",
+        "UpperLeg": "UpLeg", "LowerLeg": "Leg", "Foot": "Foot", "Toe": "ToeBase",
+        "Thumb_Proximal": "HandThumb1", "Thumb_Intermediate": "HandThumb2", "Thumb_Distal": "HandThumb3",
+        "Index_Proximal": "HandIndex1", "Index_Intermediate": "HandIndex2", "Index_Distal": "HandIndex3",
+        "Middle_Proximal": "HandMiddle1", "Middle_Intermediate": "HandMiddle2", "Middle_Distal": "HandMiddle3",
+        "Ring_Proximal": "HandRing1", "Ring_Intermediate": "HandRing2", "Ring_Distal": "HandRing3",
+        "Pinky_Proximal": "HandPinky1", "Pinky_Intermediate": "HandPinky2", "Pinky_Distal": "HandPinky3",
+    },
+}
+
+# 侧别标记的写法：(左, 右) 两个格式，{name} 为骨骼名称
+SIDE_FORMATS = {
+    ".L": ("{name}.L", "{name}.R"),
+    "_L": ("{name}_L", "{name}_R"),
+    "_l": ("{name}_l", "{name}_r"),
+    "-left": ("{name}-left", "{name}-right"),
+    "_left": ("{name}_left", "{name}_right"),
+    # 日文 MMD 的写法：侧别直接连在名称前面，解析器要求分隔符，目前识别不出侧别
+    "左": ("左{name}", "右{name}"),
+    # 带分隔符的前缀写法可以识别
+    "左_": ("左_{name}", "右_{name}"),
+    # mixamo 的写法：侧别连在名称前，整体带 mixamorig: 前缀（不分左右的骨骼见 format_bone）
+    "mixamo": ("mixamorig:Left{name}", "mixamorig:Right{name}"),
+}
+
+# 各命名风格默认使用的侧别标记
+STYLE_SIDES = {
+    "unity": ".L",
+    "mmd_jp": "左",
+    "mmd_cn": "左_",
+    "pinyin": "_l",
+    "mixamo": "mixamo",
+}
+
+# 参考骨架使用的命名：标准名称 + .L/.R
+REFERENCE_STYLE = ("unity", ".L")
+
+# 补足骨骼数量用的骨骼链（头发、裙摆、饰品等，不在映射库中）
+FILLER_CHAINS = ["Hair", "Skirt", "Ribbon", "Tail", "Ear", "Cape", "Sleeve", "Accessory", "Twist", "Jiggle"]
+
+def format_side(side_format, name, side):
+    """给骨骼名称加上侧别标记"""
+    if side is None:
+        return name
+    left_format, right_format = SIDE_FORMATS[side_format]
+    return (left_format if side == "LEFT" else right_format).format(name=name)
+
+def format_bone(style, side_format, standard_name, side):
+    """生成一个骨骼名称，风格中没有该骨骼时返回 None"""
+    name = STYLE_NAMES[style].get(standard_name)
+    if name is None:
+        return None
+    if side_format == "mixamo" and side is None:
+        return f"mixamorig:{name}"
+    return format_side(side_format, name, side)
+
+def near_miss_name(name, rng):
+    """对名称中的一个字母做重复、删除或与前一个字母交换，得到映射库不认识、但与原名相近的名称"""
+    positions = [index for index in range(1, len(name)) if name[index].isalpha()]
+    while True:
+        position = rng.choice(positions)
+        edit = rng.choice(("repeat", "drop", "swap"))
+        if edit == "repeat":
+            result = name[:position] + name[position] + name[position:]
+        elif edit == "drop":
+            result = name[:position] + name[position + 1:]
+        else:
+            result = name[:position - 1] + name[position] + name[position - 1] + name[position + 1:]
+        if result.lower() != name.lower():
+            return result
+
+def humanoid_bones(style, side_format, include_fingers=True):
+    """生成人形骨骼：[(骨骼名称, 标准名称, 侧别)]"""
+    bones = []
+    for standard_name, sided in HUMANOID_BONES + (FINGER_BONES if include_fingers else []):
+        for side in (("LEFT", "RIGHT") if sided else (None,)):
+            name = format_bone(style, side_format, standard_name, side)
+            if name is not None:
+                bones.append((name, standard_name, side))
+    return bones
+
+def filler_bones(count, rng, side_format, taken):
+    """生成 count 个不在映射库中的骨骼名称"""
+    bones = []
+    chain_index = 0
+    while len(bones) < count:
+        chain = rng.choice(FILLER_CHAINS)
+        length = rng.randint(2, 8)
+        sided = rng.random() < 0.3
+        for segment in range(length):
+            base = f"{chain}_{chain_index:03d}_{segment}"
+            names = [base]
+            if sided:
+                names = [format_side(side_format, base, "LEFT"), format_side(side_format, base, "RIGHT")]
+            for name in names:
+                if len(bones) < count and name not in taken:
+                    taken.add(name)
+                    bones.append(name)
+        chain_index += 1
+    return bones
+
+def generate_case(style, size, side_format=None, seed=0, include_fingers=True, near_miss=False):
+    """生成一组测试数据
+    
+    near_miss 为 True 时参考骨架的人形骨骼名称各带一处拼写改动（同一骨骼左右两侧相同），
+    映射库无法识别，目标骨骼只能经过相似度匹配找到它们
+    
+    返回 {"name", "reference": [参考骨骼名称], "target": [目标骨骼名称], "golden": {目标骨骼名称: 参考骨骼名称或 None}}
+    """
+    case_name = f"{style}-{size}" if side_format is None else f"{style}[{side_format}]-{size}"
+    side_format = side_format or STYLE_SIDES[style]
+    seed_key = f"{style}:{side_format}:{size}:{seed}"
+    if near_miss:
+        case_name += "~near_miss"
+        seed_key += ":near_miss"
+    rng = random.Random(seed_key)
+    
+    reference = {}
+    misspelled = {}
+    for name, standard_name, side in humanoid_bones(*REFERENCE_STYLE, include_fingers=include_fingers):
+        if near_miss:
+            if standard_name not in misspelled:
+                misspelled[standard_name] = near_miss_name(STYLE_NAMES[REFERENCE_STYLE[0]][standard_name], rng)
+            name = format_side(REFERENCE_STYLE[1], misspelled[standard_name], side)
+        reference[(standard_name, side)] = name
+    
+    target_humanoid = humanoid_bones(style, side_format, include_fingers)
+    golden = {name: reference.get((standard_name, side)) for name, standard_name, side in target_humanoid}
+    
+    taken = set(golden) | set(reference.values())
+    target_fillers = filler_bones(max(0, size - len(target_humanoid)), rng, side_format, taken)
+    reference_fillers = filler_bones(max(0, size - len(reference)), rng, REFERENCE_STYLE[1], taken)
+    for name in target_fillers:
+        golden[name] = None
+    
+    target_names = [name for name, _, _ in target_humanoid] + target_fillers
+    reference_names = list(reference.values()) + reference_fillers
+    rng.shuffle(target_names)
+    rng.shuffle(reference_names)
+    
+    return {
+        "name": case_name,
+        "reference": reference_names,
+        "target": target_names,
+        "golden": golden,
+    }
@@ -0,0 +1,256 @@
+"""骨骼匹配性能基准
+
+对合成骨架和真实骨架数据分阶段计时，并按标准答案统计匹配准确率：
+    
+    python benchmarks/run_benchmarks.py                      # 运行并与基准线比较，退化时返回 1
+    python benchmarks/run_benchmarks.py --update-baseline    # 记录新的基准线
+    python benchmarks/run_benchmarks.py --corpus 真实骨架目录  # 改用其他目录中的 JSON 数据（--corpus "" 不运行）
+
+阶段：
+    normalization  名称标准化（清空缓存后对参考和目标骨骼各标准化一次）
+    exact          建立参考骨架索引并对目标骨骼按 (标准名称, 侧别) 精确查找
+    fuzzy          精确查找失败的骨骼按相似度匹配（~near_miss 用例的参考骨骼名称带拼写改动，专门覆盖这一阶段）
+    rename         根据匹配结果规划无冲突的批量重命名
+    total          从空缓存开始完整匹配一次并规划重命名
+
+真实骨架数据为 JSON 文件：{"reference": [...], "target": [...], "golden": {目标骨骼: 参考骨骼或 null}}
+默认的 benchmarks/corpus 按常见导出工具（VRoid、日文 MMD、Mixamo、Rigify、Blender 元骨架、Cats 插件）的骨骼命名整理，
+参考骨架为 Unity Humanoid 命名，标准答案人工标注；映射库不认识的写法照实计入，准确率低于 100% 是实际水平。
+准确率下降、匹配错误或误匹配增加都视为退化。
+每个阶段取多次运行的中位数；基准线与运行的机器有关，更换机器后需要重新记录。
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+# 匹配核心在插件包内，按包导入（没有 bpy 时包的 __init__ 不会加载插件界面）
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from BoneRename.bone_matcher import load_library, plan_bone_renames
+from rig_generator import STYLE_NAMES, SIDE_FORMATS, generate_case
+
+DEFAULT_MAPPING_FILE = os.path.join(os.path.dirname(BENCHMARK_DIR), "骨骼.json")
+DEFAULT_BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_CORPUS_DIR = os.path.join(BENCHMARK_DIR, "corpus")
+
+DEFAULT_SIZES = [50, 500, 5000]
+STAGES = ["normalization", "exact", "fuzzy", "rename", "total"]
+
+# 侧别标记单独测试时使用的命名风格
+SIDE_SWEEP_STYLE = "unity"
+SIDE_SWEEP_SIZE = 500
+
+# 计时比基准线慢超过该比例、且绝对差值超过 MIN_REGRESSION 秒时视为退化
+# （毫秒级的阶段受调度和缓存影响，抖动常达一倍以上，只靠比例会误报）
+DEFAULT_TOLERANCE = 0.5
+MIN_REGRESSION = 0.005
+DEFAULT_REPEAT = 9
+
+def build_cases(sizes, styles, corpus_dir=None):
+    """生成全部测试数据"""
+    cases = []
+    for style in styles:
+        for size in sizes:
+            cases.append(generate_case(style, size))
+    # 参考骨骼名称带拼写改动，覆盖相似度匹配
+    for size in sizes:
+        cases.append(generate_case(SIDE_SWEEP_STYLE, size, near_miss=True))
+    # 各种侧别标记
+    for side_format in SIDE_FORMATS:
+        cases.append(generate_case(SIDE_SWEEP_STYLE, SIDE_SWEEP_SIZE, side_format))
+    
+    if corpus_dir:
+        for file_name in sorted(os.listdir(corpus_dir)):
+            if not file_name.lower().endswith(".json"):
+                continue
+            with open(os.path.join(corpus_dir, file_name), 'r', encoding='utf-8') as f:
+                case = json.load(f)
+            case["name"] = "corpus:" + os.path.splitext(file_name)[0]
+            cases.append(case)
+    return cases
+
+def time_stages(library, case):
+    """运行一次所有阶段，返回 ({阶段: 秒}, 匹配结果)"""
+    reference_names = case["reference"]
+    target_names = case["target"]
+    timings = {}
+    
+    library.cache.clear()
+    start = time.perf_counter()
+    for name in reference_names:
+        library.map_to_standard_name(name)
+    for name in target_names:
+        library.map_to_standard_name(name)
+    timings["normalization"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    reference_index = library.reference_index(reference_names)
+    misses = []
+    for name in target_names:
+        standard_name, side, _ = library.map_to_standard_name(name)
+        if library.region_of(standard_name) is None:
+            continue
+        if reference_index.exact.get((standard_name, side)) is None:
+            misses.append((standard_name, side))
+    timings["exact"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for standard_name, side in misses:
+        reference_index.find_similar(standard_name, side)
+    timings["fuzzy"] = time.perf_counter() - start
+    
+    mapping = library.match(reference_names, target_names, {"include_fingers": True})
+    start = time.perf_counter()
+    plan_bone_renames(mapping, target_names)
+    timings["rename"] = time.perf_counter() - start
+    
+    library.cache.clear()
+    start = time.perf_counter()
+    mapping = library.match(reference_names, target_names, {"include_fingers": True})
+    plan_bone_renames(mapping, target_names)
+    timings["total"] = time.perf_counter() - start
+    
+    return timings, mapping
+
+def score_accuracy(mapping, golden):
+    """按标准答案统计
+    
+    准确率只按应当匹配的骨骼计算：正确、匹配错误、漏匹配；
+    不该重命名的骨骼（标准答案为 None）被重命名时计为误匹配
+    """
+    correct = wrong = missed = false_positive = 0
+    for target_name, expected in golden.items():
+        matched = mapping.get(target_name)
+        if expected is None:
+            if matched is not None and matched != target_name:
+                false_positive += 1
+        elif matched == expected:
+            correct += 1
+        elif matched is None:
+            missed += 1
+        else:
+            wrong += 1
+    expected_total = correct + wrong + missed
+    return {
+        "accuracy": round(correct / expected_total, 4) if expected_total else 1.0,
+        "correct": correct,
+        "wrong": wrong,
+        "missed": missed,
+        "false_positive": false_positive,
+    }
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+def run_case(library, case, repeat):
+    """多次运行取每个阶段的中位数"""
+    samples = {stage: [] for stage in STAGES}
+    mapping = None
+    for _ in range(repeat):
+        # 与 timeit 相同，计时期间关闭垃圾回收，避免回收时机不同造成的抖动
+        gc.collect()
+        gc.disable()
+        try:
+            timings, mapping = time_stages(library, case)
+        finally:
+            gc.enable()
+        for stage, elapsed in timings.items():
+            samples[stage].append(elapsed)
+    return {
+        "bones": len(case["target"]),
+        "timings": {stage: round(median(samples[stage]), 6) for stage in STAGES},
+        "quality": score_accuracy(mapping, case["golden"]),
+    }
+
+def compare_with_baseline(results, baseline, tolerance):
+    """返回退化列表 [说明]"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for stage, elapsed in result["timings"].items():
+            base_elapsed = base["timings"].get(stage)
+            if base_elapsed is None:
+                continue
+            if elapsed > base_elapsed * (1 + tolerance) and elapsed - base_elapsed > MIN_REGRESSION:
+                regressions.append(f"{name} {stage}: {elapsed * 1000:.2f}ms (基准线 {base_elapsed * 1000:.2f}ms)")
+        base_quality = base.get("quality", {})
+        quality = result["quality"]
+        if quality["accuracy"] < base_quality.get("accuracy", 0):
+            regressions.append(f"{name} 准确率: {quality['accuracy']:.2%} (基准线 {base_quality['accuracy']:.2%})")
+        if quality["wrong"] > base_quality.get("wrong", quality["wrong"]):
+            regressions.append(f"{name} 匹配错误: {quality['wrong']} (基准线 {base_quality['wrong']})")
+        if quality["false_positive"] > base_quality.get("false_positive", quality["false_positive"]):
+            regressions.append(f"{name} 误匹配: {quality['false_positive']} (基准线 {base_quality['false_positive']})")
+    return regressions
+
+def print_results(results):
+    header = f"{'用例':<30}{'骨骼数':>7}" + "".join(f"{stage:>15}" for stage in STAGES) + f"{'准确率':>9}{'误匹配':>7}"
+    print(header)
+    for name, result in results.items():
+        row = f"{name:<32}{result['bones']:>8}"
+        row += "".join(f"{result['timings'][stage] * 1000:>13.2f}ms" for stage in STAGES)
+        row += f"{result['quality']['accuracy']:>10.1%}{result['quality']['false_positive']:>9}"
+        print(row)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="骨骼匹配性能基准")
+    parser.add_argument("--mapping", default=DEFAULT_MAPPING_FILE, help="骨骼映射库 JSON（默认: 骨骼.json）")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="骨骼数量，逗号分隔")
+    parser.add_argument("--styles", default=",".join(STYLE_NAMES), help="命名风格，逗号分隔")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="真实骨架数据目录（JSON 文件，默认: benchmarks/corpus）")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个用例的运行次数（取中位数）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_FILE, help="基准线文件")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果记录为基准线")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许比基准线慢的比例")
+    parser.add_argument("--output", help="把本次结果写入 JSON 文件")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    library = load_library(args.mapping)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    styles = [style for style in args.styles.split(",") if style]
+    
+    results = {}
+    for case in build_cases(sizes, styles, args.corpus):
+        results[case["name"]] = run_case(library, case, max(1, args.repeat))
+    print_results(results)
+    
+    report = {"library_version": library.version, "results": results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"已记录基准线: {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print("没有基准线，使用 --update-baseline 记录")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f).get("results", {})
+    
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("性能或准确率退化:")
+        for regression in regressions:
+            print("  " + regression)
+        return 1
+    print("未发现退化")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
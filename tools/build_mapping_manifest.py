@@ -0,0 +1,63 @@
+"""生成仓库根目录的增量清单 骨骼.manifest.json
+
+插件从各镜像下载 骨骼.json 时先读取同目录的清单，按清单中的内容哈希校验下载结果，
+因此每次修改 骨骼.json（或发布新的增量文件）后都要重新生成清单：
+
+    python tools/build_mapping_manifest.py                                  # 重新生成清单
+    python tools/build_mapping_manifest.py --delta deltas/3.3-3.4.json      # 同时登记增量文件（路径相对清单）
+    python tools/build_mapping_manifest.py --check                          # 清单与 骨骼.json 不一致时返回 1
+"""
+
+import os
+import sys
+import json
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 匹配核心在插件包内，按包导入（没有 bpy 时包的 __init__ 不会加载插件界面）
+sys.path.insert(0, ROOT_DIR)
+
+from BoneRename.bone_matcher import build_mapping_manifest, parse_mapping_text
+
+DEFAULT_MAPPING_FILE = os.path.join(ROOT_DIR, "骨骼.json")
+
+def get_manifest_path(mapping_path):
+    """映射库对应的清单路径: 骨骼.json -> 骨骼.manifest.json"""
+    return os.path.splitext(mapping_path)[0] + ".manifest.json"
+
+def load_json(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_mapping_text(f.read())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成映射库的增量清单")
+    parser.add_argument("--mapping", default=DEFAULT_MAPPING_FILE, help="映射库 JSON（默认: 骨骼.json）")
+    parser.add_argument("--delta", action="append", default=[], help="增量文件路径（相对清单所在目录），可重复指定")
+    parser.add_argument("--check", action="store_true", help="只检查现有清单是否与映射库一致")
+    args = parser.parse_args(argv)
+    
+    manifest_path = get_manifest_path(args.mapping)
+    manifest_dir = os.path.dirname(manifest_path)
+    deltas = [(load_json(os.path.join(manifest_dir, path)), path.replace(os.sep, "/")) for path in args.delta]
+    manifest = build_mapping_manifest(load_json(args.mapping), deltas)
+    
+    if args.check:
+        try:
+            current = load_json(manifest_path)
+        except OSError:
+            current = None
+        if not isinstance(current, dict) or current.get("sha256") != manifest["sha256"] \
+                or current.get("latest") != manifest["latest"]:
+            print(f"清单已过期，请运行 python tools/build_mapping_manifest.py: {manifest_path}")
+            return 1
+        print("清单与映射库一致")
+        return 0
+    
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"已写入清单: {manifest_path} (版本 {manifest['latest']['version']}, sha256 {manifest['sha256'][:12]})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
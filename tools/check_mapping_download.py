@@ -0,0 +1,332 @@
+"""用本机镜像检查映射库下载：完整下载、未变化（清单 / 304）、增量链、增量链断开时改为完整下载、所有镜像不可用时保留本地缓存、
+响应缓慢的镜像在下载超时内完成、落选镜像的下载被取消
+    
+    python tools/check_mapping_download.py
+
+在本机启动几个 HTTP 服务器充当镜像，提供 tools/fixtures/mapping_download 中的映射库（lib.json，版本 3.0）、
+增量清单和 1.0 -> 2.0 -> 3.0 两个增量；v1.json 是增量链的起点。
+每个场景在临时目录中调用 bone_matcher.update_mapping_cache（插件的下载按钮使用同一个函数），
+检查返回的状态、缓存文件、下载记录和各镜像收到的请求。有任何场景失败时返回 1。
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 匹配核心在插件包内，按包导入（没有 bpy 时包的 __init__ 不会加载插件界面）
+sys.path.insert(0, ROOT_DIR)
+
+from BoneRename.bone_matcher import dump_mapping_text, read_download_meta, update_mapping_cache, write_download_meta
+
+FIXTURE_DIR = os.path.join(ROOT_DIR, "tools", "fixtures", "mapping_download")
+CHECK_TIMEOUT = 5.0
+# 缓慢镜像：每个响应前等待的秒数（超过原先 3 秒的单次读取超时），以及这个场景使用的下载超时（清单和映射库两次请求）
+SLOW_MIRROR_DELAY = 4.0
+SLOW_MIRROR_TIMEOUT = 15.0
+# 逐块发送的镜像：每块字节数和间隔，完整发送映射库需要十几秒
+TRICKLE_CHUNK_SIZE = 32
+TRICKLE_INTERVAL = 0.2
+# 落选镜像被取消后，服务器应在这段时间内发现连接已断开
+CANCEL_GRACE = 2.0
+
+class MirrorServer:
+    """本机镜像：按路径提供文件，带 ETag 并支持 If-None-Match（304），记录收到的请求"""
+    
+    def __init__(self, files, status=None, delay=0.0, trickle=None):
+        # files: {请求路径: 内容}；status 不为 None 时所有请求都返回该状态码（模拟故障的镜像）；
+        # delay: 响应前等待的秒数；trickle 不为 None 时每隔 trickle 秒发送 TRICKLE_CHUNK_SIZE 字节
+        self.files = files
+        self.status = status
+        self.delay = delay
+        self.trickle = trickle
+        self.requests = []
+        # 逐块发送时客户端断开连接的时间（time.monotonic()）
+        self.disconnected = None
+        self.disconnect_event = threading.Event()
+        mirror = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = '"' + hashlib.sha1(mirror.files.get(self.path, b"")).hexdigest() + '"'
+                conditional = self.headers.get("If-None-Match")
+                if mirror.status is not None:
+                    code = mirror.status
+                elif self.path not in mirror.files:
+                    code = 404
+                elif conditional == etag:
+                    code = 304
+                else:
+                    code = 200
+                mirror.requests.append((self.path, code, conditional is not None))
+                if mirror.delay:
+                    time.sleep(mirror.delay)
+                
+                self.send_response(code)
+                if code == 200:
+                    content = mirror.files[self.path]
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    if mirror.trickle is None:
+                        self.wfile.write(content)
+                    else:
+                        self.write_slowly(content)
+                else:
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+            
+            def write_slowly(self, content):
+                try:
+                    for start in range(0, len(content), TRICKLE_CHUNK_SIZE):
+                        self.wfile.write(content[start:start + TRICKLE_CHUNK_SIZE])
+                        self.wfile.flush()
+                        time.sleep(mirror.trickle)
+                except (BrokenPipeError, ConnectionResetError):
+                    mirror.disconnected = time.monotonic()
+                    mirror.disconnect_event.set()
+                    self.close_connection = True
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/lib.json"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def paths(self):
+        return [path for path, _, _ in self.requests]
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+        return f.read()
+
+def fixture_files(manifest=True, deltas=("deltas/1.0-2.0.json", "deltas/2.0-3.0.json")):
+    """镜像提供的文件：映射库、（可选的）增量清单和其中登记的增量"""
+    files = {"/lib.json": load_fixture("lib.json")}
+    if manifest:
+        data = json.loads(load_fixture("lib.manifest.json"))
+        data["deltas"] = [step for step in data["deltas"] if step["url"] in deltas]
+        files["/lib.manifest.json"] = json.dumps(data).encode('utf-8')
+        for url in deltas:
+            files["/" + url] = load_fixture(url)
+    return files
+
+def closed_port_url():
+    """一个没有服务器监听的本机地址（连接被拒绝）"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    url = f"http://127.0.0.1:{server.server_address[1]}/lib.json"
+    server.server_close()
+    return url
+
+class Workspace:
+    """临时配置目录中的缓存文件和下载记录"""
+    
+    def __init__(self):
+        self.dir = tempfile.mkdtemp(prefix="bone_mapping_check_")
+        self.cache_path = os.path.join(self.dir, "bone_data.json")
+        self.meta_path = os.path.join(self.dir, "bone_data.meta.json")
+    
+    def seed(self, data, url=None):
+        """写入本地缓存，url 不为 None 时同时写入来自该镜像的下载记录"""
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            f.write(dump_mapping_text(data))
+        if url is not None:
+            write_download_meta(self.meta_path, {"url": url})
+    
+    def cache_bytes(self):
+        try:
+            with open(self.cache_path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def update(self, urls, timeout=CHECK_TIMEOUT):
+        return update_mapping_cache(urls, self.cache_path, self.meta_path, timeout=timeout)
+    
+    def close(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def check_full_download(latest):
+    """空缓存：完整下载，写入缓存文件和带 ETag 的下载记录；不可用的镜像不影响结果"""
+    mirror = MirrorServer(fixture_files())
+    workspace = Workspace()
+    try:
+        data, status, message = workspace.update([closed_port_url(), mirror.url])
+        meta = read_download_meta(workspace.meta_path, [mirror.url])
+        return [
+            (status == "updated", f"状态 {status}: {message}"),
+            (data == latest, "返回最新版本"),
+            (workspace.cache_bytes() == dump_mapping_text(latest).encode('utf-8'), "缓存文件为最新版本"),
+            (bool(meta.get("etag")), "下载记录包含 ETag"),
+            ("/lib.json" in mirror.paths(), "下载了完整映射库"),
+        ]
+    finally:
+        mirror.close()
+        workspace.close()
+
+def check_unchanged_by_manifest(latest):
+    """缓存已是清单中的最新版本：只读取清单，不下载映射库"""
+    mirror = MirrorServer(fixture_files())
+    workspace = Workspace()
+    try:
+        workspace.seed(latest, mirror.url)
+        before = workspace.cache_bytes()
+        data, status, message = workspace.update([mirror.url])
+        return [
+            (status == "unchanged", f"状态 {status}: {message}"),
+            (data == latest, "返回本地缓存"),
+            (workspace.cache_bytes() == before, "缓存文件未改写"),
+            (mirror.paths() == ["/lib.manifest.json"], f"只请求了清单: {mirror.paths()}"),
+        ]
+    finally:
+        mirror.close()
+        workspace.close()
+
+def check_not_modified(latest):
+    """镜像没有清单：第二次下载发送 If-None-Match，服务器返回 304"""
+    mirror = MirrorServer(fixture_files(manifest=False))
+    workspace = Workspace()
+    try:
+        _, first_status, _ = workspace.update([mirror.url])
+        mirror.requests.clear()
+        data, status, message = workspace.update([mirror.url])
+        return [
+            (first_status == "updated", f"第一次完整下载: {first_status}"),
+            (status == "unchanged", f"状态 {status}: {message}"),
+            (data == latest, "返回本地缓存"),
+            (("/lib.json", 304, True) in mirror.requests, f"条件请求返回 304: {mirror.requests}"),
+        ]
+    finally:
+        mirror.close()
+        workspace.close()
+
+def check_delta_chain(start, latest):
+    """缓存为 1.0：按清单依次应用两个增量更新到 3.0，不下载完整映射库"""
+    mirror = MirrorServer(fixture_files())
+    workspace = Workspace()
+    try:
+        workspace.seed(start, mirror.url)
+        data, status, message = workspace.update([mirror.url])
+        return [
+            (status == "updated" and message.startswith("增量更新"), f"状态 {status}: {message}"),
+            (data == latest, "返回最新版本"),
+            (workspace.cache_bytes() == dump_mapping_text(latest).encode('utf-8'), "缓存文件为最新版本"),
+            (mirror.paths() == ["/lib.manifest.json", "/deltas/1.0-2.0.json", "/deltas/2.0-3.0.json"],
+             f"只请求了清单和增量: {mirror.paths()}"),
+        ]
+    finally:
+        mirror.close()
+        workspace.close()
+
+def check_chain_gap(start, latest):
+    """清单缺少 1.0 -> 2.0 的增量：改为下载完整映射库"""
+    mirror = MirrorServer(fixture_files(deltas=("deltas/2.0-3.0.json",)))
+    workspace = Workspace()
+    try:
+        workspace.seed(start, mirror.url)
+        data, status, message = workspace.update([mirror.url])
+        return [
+            (status == "updated" and message.startswith("完整下载"), f"状态 {status}: {message}"),
+            (data == latest, "返回最新版本"),
+            ("/lib.json" in mirror.paths() and "/deltas/2.0-3.0.json" not in mirror.paths(),
+             f"下载了完整映射库: {mirror.paths()}"),
+        ]
+    finally:
+        mirror.close()
+        workspace.close()
+
+def check_all_mirrors_down(latest):
+    """所有镜像都失败：返回本地缓存，缓存文件和下载记录保持不变"""
+    failing = MirrorServer(fixture_files(), status=500)
+    workspace = Workspace()
+    try:
+        workspace.seed(latest, failing.url)
+        cache_before = workspace.cache_bytes()
+        meta_before = read_download_meta(workspace.meta_path, [failing.url])
+        data, status, message = workspace.update([closed_port_url(), failing.url])
+        return [
+            (status == "failed", f"状态 {status}: {message}"),
+            ("所有镜像均下载失败" in message, "提示所有镜像均失败"),
+            (data == latest, "返回本地缓存"),
+            (workspace.cache_bytes() == cache_before, "缓存文件未改写"),
+            (read_download_meta(workspace.meta_path, [failing.url]) == meta_before, "下载记录未改写"),
+        ]
+    finally:
+        failing.close()
+        workspace.close()
+
+def check_slow_mirror(latest):
+    """唯一的镜像每个响应前等待 SLOW_MIRROR_DELAY 秒：下载超时足够长时应当成功"""
+    mirror = MirrorServer(fixture_files(manifest=False), delay=SLOW_MIRROR_DELAY)
+    workspace = Workspace()
+    try:
+        data, status, message = workspace.update([mirror.url], SLOW_MIRROR_TIMEOUT)
+        return [
+            (status == "updated", f"状态 {status}: {message}"),
+            (data == latest, "返回最新版本"),
+        ]
+    finally:
+        mirror.close()
+        workspace.close()
+
+def check_cancel_loser(latest):
+    """两个镜像同时下载：快的镜像成功后，逐块发送的镜像应很快被断开，而不是下载到结束"""
+    fast = MirrorServer(fixture_files(manifest=False))
+    slow = MirrorServer(fixture_files(manifest=False), trickle=TRICKLE_INTERVAL)
+    workspace = Workspace()
+    try:
+        data, status, message = workspace.update([slow.url, fast.url])
+        finished = time.monotonic()
+        slow.disconnect_event.wait(CANCEL_GRACE)
+        lag = None if slow.disconnected is None else slow.disconnected - finished
+        return [
+            (status == "updated" and fast.url in message, f"状态 {status}: {message}"),
+            (data == latest, "返回最新版本"),
+            ("/lib.json" in slow.paths(), f"两个镜像都收到了请求: {slow.paths()}"),
+            (lag is not None, f"落选镜像在 {CANCEL_GRACE:.0f} 秒内断开连接" if lag is None
+             else f"落选镜像断开连接: {lag:.2f} 秒"),
+        ]
+    finally:
+        fast.close()
+        slow.close()
+        workspace.close()
+
+def main():
+    start = json.loads(load_fixture("v1.json"))
+    latest = json.loads(load_fixture("lib.json"))
+    checks = [
+        ("完整下载", lambda: check_full_download(latest)),
+        ("未变化（增量清单）", lambda: check_unchanged_by_manifest(latest)),
+        ("未变化（304）", lambda: check_not_modified(latest)),
+        ("增量链", lambda: check_delta_chain(start, latest)),
+        ("增量链断开", lambda: check_chain_gap(start, latest)),
+        ("所有镜像不可用", lambda: check_all_mirrors_down(latest)),
+        ("缓慢镜像", lambda: check_slow_mirror(latest)),
+        ("取消落选镜像", lambda: check_cancel_loser(latest)),
+    ]
+    
+    failed = False
+    for name, check in checks:
+        results = check()
+        passed = all(ok for ok, _ in results)
+        print(f"{'通过' if passed else '失败'}  {name}")
+        for ok, description in results:
+            if not ok:
+                print(f"      {description}")
+        failed = failed or not passed
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
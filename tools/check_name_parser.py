@@ -0,0 +1,147 @@
+"""检查 BoneNameParser 与原先逐个侧别标识编译正则的解析结果是否一致
+    
+    python tools/check_name_parser.py                   # 语料 + 20000 个随机名称
+    python tools/check_name_parser.py --random 500000   # 更多随机名称
+    python tools/check_name_parser.py --random 0        # 只检查语料
+
+语料为 tools/bone_name_corpus.txt。每个名称分别按映射库的侧别标识和 CUSTOM_SIDE_IDENTIFIERS 解析，
+后者包含带内部分隔符、必须走正则的标识符。比较 (基础名称, 侧别)，有任何不一致时返回 1。
+"""
+
+import os
+import re
+import sys
+import random
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 匹配核心在插件包内，按包导入（没有 bpy 时包的 __init__ 不会加载插件界面）
+sys.path.insert(0, ROOT_DIR)
+
+from BoneRename.bone_matcher import BoneNameParser, parse_mapping_text
+
+DEFAULT_MAPPING_FILE = os.path.join(ROOT_DIR, "骨骼.json")
+DEFAULT_CORPUS_FILE = os.path.join(ROOT_DIR, "tools", "bone_name_corpus.txt")
+
+# 自定义映射库可能使用的侧别标识：重复项、大小写变体、带内部分隔符和前导分隔符的写法
+CUSTOM_SIDE_IDENTIFIERS = {
+    "left": ["Left Side", "l.", ".L.", "_l_", "左侧", "左", "L", "lf", "-lf", "k"],
+    "right": ["Right Side", "r.", ".R.", "_r_", "右侧", "右", "R", "rt", "-rt", "K"],
+}
+
+# 随机名称的组成部分
+RANDOM_WORDS = ["Upper", "Arm", "Hand", "Hips", "Spine", "Hair", "Twist", "上臂", "手指", "Left", "Right", "Side"]
+RANDOM_DELIMITERS = [".", "_", "-", " ", "__", "._", "-.", " _"]
+RANDOM_EDGE_CHARS = ["１", "٣", "K", "İ", "ß", "ı", "ſ", "Σ", "ς", "．", "＿", "\\", ":", "|"]
+
+def extract_base_name_and_side_regex(name, side_identifiers):
+    """原先的实现：每次调用都为每个侧别标识编译正则，再多次 re.sub"""
+    left_ids = side_identifiers.get("left", [])
+    right_ids = side_identifiers.get("right", [])
+    
+    # 初始化结果
+    base_name = name
+    side = None
+    
+    # 使用正则表达式确保精确匹配侧别标识
+    # 先检查右侧标识
+    for identifier in right_ids:
+        # 使用单词边界确保完整匹配
+        pattern = re.compile(r'(^|[\._\- ])' + re.escape(identifier) + r'([\._\- ]|$)', re.IGNORECASE)
+        if pattern.search(name):
+            # 移除侧别标识
+            base_name = pattern.sub(r'\1\2', name).strip('._- ')
+            side = 'RIGHT'
+            break
+    
+    if side is None:
+        for identifier in left_ids:
+            pattern = re.compile(r'(^|[\._\- ])' + re.escape(identifier) + r'([\._\- ]|$)', re.IGNORECASE)
+            if pattern.search(name):
+                base_name = pattern.sub(r'\1\2', name).strip('._- ')
+                side = 'LEFT'
+                break
+    
+    # 如果未检测到侧别标识，尝试从名称末尾检测
+    if side is None:
+        # 检查名称末尾的侧别标识
+        end_pattern = re.compile(r'[\._\- ]([lr])$', re.IGNORECASE)
+        end_match = end_pattern.search(name)
+        if end_match:
+            side_char = end_match.group(1).lower()
+            if side_char == 'l':
+                side = 'LEFT'
+            elif side_char == 'r':
+                side = 'RIGHT'
+            base_name = end_pattern.sub('', name).strip('._- ')
+    
+    # 移除数字后缀
+    base_name = re.sub(r'[\d_\.\-]+$', '', base_name).strip('._- ')
+    
+    # 进一步清理基础名称
+    base_name = re.sub(r'^[\._\- ]+|[\._\- ]+$', '', base_name)
+    
+    return base_name, side
+
+def load_corpus(file_path):
+    """读取语料，只去掉换行符"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return [line.rstrip("\r\n") for line in f if not line.startswith("#")]
+
+def random_names(count, side_identifiers, seed):
+    """用侧别标识、常见词、分隔符、数字和大小写折叠的边界字符拼出随机名称"""
+    rng = random.Random(seed)
+    identifiers = [identifier for ids in side_identifiers.values() for identifier in ids]
+    pieces = [identifiers, RANDOM_WORDS, RANDOM_DELIMITERS, list("0123456789"), RANDOM_EDGE_CHARS]
+    weights = [4, 4, 5, 2, 1]
+    names = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 6)):
+            part = rng.choice(rng.choices(pieces, weights)[0])
+            if rng.random() < 0.2:
+                part = part.upper() if rng.random() < 0.5 else part.swapcase()
+            parts.append(part)
+        names.append("".join(parts))
+    return names
+
+def check_names(names, side_identifiers):
+    """返回不一致列表 [(名称, 原先的结果, 解析器的结果)]"""
+    parser = BoneNameParser(side_identifiers)
+    mismatches = []
+    for name in names:
+        expected = extract_base_name_and_side_regex(name, side_identifiers)
+        base_name, side, _ = parser.parse(name)
+        if (base_name, side) != expected:
+            mismatches.append((name, expected, (base_name, side)))
+    return mismatches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="检查骨骼名称解析器与原先正则实现的一致性")
+    parser.add_argument("--mapping", default=DEFAULT_MAPPING_FILE, help="映射库 JSON（默认: 骨骼.json）")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_FILE, help="语料文件，每行一个名称")
+    parser.add_argument("--random", type=int, default=20000, help="每组侧别标识额外检查的随机名称数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机名称的种子")
+    args = parser.parse_args(argv)
+    
+    with open(args.mapping, 'r', encoding='utf-8') as f:
+        mapping_data = parse_mapping_text(f.read())
+    corpus = load_corpus(args.corpus)
+    
+    identifier_sets = [
+        ("映射库", mapping_data.get("side_identifiers", {})),
+        ("自定义", CUSTOM_SIDE_IDENTIFIERS),
+    ]
+    failed = False
+    for label, side_identifiers in identifier_sets:
+        names = corpus + random_names(args.random, side_identifiers, f"{args.seed}:{label}")
+        mismatches = check_names(names, side_identifiers)
+        print(f"{label}侧别标识: {len(names)} 个名称，{len(mismatches)} 个不一致")
+        for name, expected, actual in mismatches[:20]:
+            print(f"  {name!r}: 原先 {expected}，解析器 {actual}")
+        failed = failed or bool(mismatches)
+    
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())